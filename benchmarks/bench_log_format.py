@@ -0,0 +1,66 @@
+"""
+Compare log formatter throughput: the previous `ColourFormatter`, which built a new
+`logging.Formatter` and recoloured the record for every call, against the cached
+`ColourFormatter` and the `JsonFormatter`.
+
+Run with `python -m benchmarks.bench_log_format`.
+"""
+
+import logging
+import time
+
+from benchmarks.utils import print_comparison
+from src.core.logger import ColourFormatter, JsonFormatter
+
+
+class LegacyColourFormatter(ColourFormatter):
+    """The original implementation, which mutated the record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        level_colour = self.LEVEL_COLOURS.get(record.levelno, self.RESET)
+        record.levelname = f"{level_colour}{record.levelname}{self.RESET}"
+        record.trace_id = f"{self.CYAN}{record.trace_id}{self.RESET}"
+        formatter = logging.Formatter(self.FORMAT_STR)
+        return formatter.format(record)
+
+
+def make_record() -> logging.LogRecord:
+    """Build a record like the ones logged by the auth middleware."""
+    record = logging.LogRecord(
+        "src.middlewares.auth",
+        logging.INFO,
+        __file__,
+        80,
+        "Username of logged in user: %s",
+        ("jane.doe",),
+        None,
+    )
+    record.trace_id = "3f0c4d0e-8f7a-4c1e-9d55-2b1a6f1f0a9e"
+    return record
+
+
+def records_per_second(formatter: logging.Formatter, iterations: int) -> dict:
+    """Format fresh records in a loop and return the throughput."""
+    records = [make_record() for _ in range(iterations)]
+    start = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    elapsed = time.perf_counter() - start
+    return {
+        "records_per_s": iterations / elapsed,
+        "us_per_record": elapsed * 1e6 / iterations,
+    }
+
+
+def main(iterations: int = 200_000) -> None:
+    """Run the benchmark and print the results."""
+    results = {
+        "legacy colour": records_per_second(LegacyColourFormatter(), iterations),
+        "colour": records_per_second(ColourFormatter(), iterations),
+        "json": records_per_second(JsonFormatter(), iterations),
+    }
+    print_comparison(results)
+
+
+if __name__ == "__main__":
+    main()
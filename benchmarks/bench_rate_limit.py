@@ -0,0 +1,111 @@
+"""
+Compare the pure ASGI GCRA `RateLimitMiddleware` against slowapi's
+`SlowAPIMiddleware` with its default in-memory fixed window storage.
+
+Every request comes from a different client address, so both limiters track
+100,000 distinct keys by the end of the run. Memory is the `tracemalloc` growth
+while 100,000 keys are added to each limiter directly, outside of any app.
+
+slowapi is no longer a dependency of the app, install it to run the comparison. Run
+with `pip install slowapi && python -m benchmarks.bench_rate_limit`.
+"""
+
+import asyncio
+import ipaddress
+import itertools
+import tracemalloc
+from typing import Callable
+
+from fastapi import FastAPI
+from limits import parse
+from slowapi import Limiter
+from slowapi.middleware import SlowAPIMiddleware
+from slowapi.util import get_remote_address
+
+from benchmarks.utils import make_scope, print_comparison, time_asgi
+from src.core.rate_limit import RateLimiter, parse_rate_limit
+from src.middlewares import RateLimitMiddleware
+
+LIMIT = "100/minute"
+KEYS = 100_000
+
+
+def _ping() -> dict[str, str]:
+    return {"message": "pong"}
+
+
+def build_slowapi_app() -> FastAPI:
+    """Build an app limited by slowapi, as `create_app` used to."""
+    app = FastAPI()
+    app.state.limiter = Limiter(key_func=get_remote_address, default_limits=[LIMIT])
+    app.add_middleware(SlowAPIMiddleware)
+    app.get("/")(_ping)
+    return app
+
+
+def build_gcra_app() -> FastAPI:
+    """Build an app limited by the GCRA middleware."""
+    app = FastAPI()
+    app.add_middleware(
+        RateLimitMiddleware, limiter=RateLimiter(parse_rate_limit(LIMIT))
+    )
+    app.get("/")(_ping)
+    return app
+
+
+def distinct_clients() -> Callable[[], dict]:
+    """Return a scope factory giving every request a new client address."""
+    addresses = (str(ipaddress.IPv4Address(0x0A000000 + i)) for i in itertools.count())
+
+    def factory() -> dict:
+        scope = make_scope("/")
+        scope["client"] = (next(addresses), 50000)
+        return scope
+
+    return factory
+
+
+def slowapi_memory() -> float:
+    """Measure the memory used by slowapi's limiter for `KEYS` keys, in MiB."""
+    limiter = Limiter(key_func=get_remote_address)
+    item = parse(LIMIT)
+    tracemalloc.start()
+    for i in range(KEYS):
+        limiter.limiter.hit(item, f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}")
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used / 1024 / 1024
+
+
+def gcra_memory() -> float:
+    """Measure the memory used by the GCRA limiter for `KEYS` keys, in MiB."""
+    limiter = RateLimiter(parse_rate_limit(LIMIT))
+
+    async def hit_all() -> None:
+        for i in range(KEYS):
+            await limiter.hit(f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}")
+
+    tracemalloc.start()
+    asyncio.run(hit_all())
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used / 1024 / 1024
+
+
+def run(app: FastAPI, memory: Callable[[], float]) -> dict[str, float]:
+    """Time `KEYS` requests from distinct clients and measure the key memory."""
+    stats = time_asgi(app, distinct_clients(), iterations=KEYS, warmup=0)
+    return {**stats, "memory_mib": memory()}
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    results = {
+        "slowapi": run(build_slowapi_app(), slowapi_memory),
+        "GCRA": run(build_gcra_app(), gcra_memory),
+    }
+    print_comparison(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare `StandardRoute`'s response model fast path against FastAPI's default
+`APIRoute`, per route, for latency and memory allocated per request.
+
+The routes mirror the application's: `/` returns a `MessageResponse` in the
+`StandardResponse` envelope, `/register` returns a `Token` in the envelope and
+`/token` returns a bare `Token` through `JSONResponse`.
+
+Run with `python -m benchmarks.bench_response_model`.
+"""
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from benchmarks.utils import (
+    make_scope,
+    measure_allocations,
+    print_comparison,
+    time_asgi,
+)
+from src.models import MessageResponse, Token
+from src.routes import StandardResponse, StandardRoute
+
+EXPIRES_AT = datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat()
+
+
+def build_app(route_class: type[APIRoute]) -> FastAPI:
+    """Build an app whose routes use `route_class`."""
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/", response_model=MessageResponse)
+    def index() -> MessageResponse:
+        return MessageResponse(message="Successfully connected to the API")
+
+    @router.get("/register", response_model=Token)
+    async def register() -> Token:
+        return Token(access_token="a" * 160, token_type="bearer", expires_at=EXPIRES_AT)
+
+    @router.get("/token", response_model=Token, response_class=JSONResponse)
+    async def login() -> Token:
+        return Token(access_token="a" * 160, token_type="bearer", expires_at=EXPIRES_AT)
+
+    app = FastAPI(default_response_class=StandardResponse)
+    app.include_router(router)
+    return app
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    apps = {"APIRoute": build_app(APIRoute), "StandardRoute": build_app(StandardRoute)}
+    for path in ("/", "/register", "/token"):
+        print(f"\n{path}")
+        results = {}
+        for name, app in apps.items():
+            results[name] = {
+                **time_asgi(app, lambda path=path: make_scope(path)),
+                **measure_allocations(app, lambda path=path: make_scope(path)),
+            }
+        print_comparison(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare the pure ASGI `TraceIdMiddleware` against the previous
+`BaseHTTPMiddleware` implementation.
+
+Run with `python -m benchmarks.bench_trace_id`.
+"""
+
+import uuid
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from benchmarks.utils import print_comparison, time_asgi
+from src.core.context import trace_id_var
+from src.middlewares.trace_id import TraceIdMiddleware
+
+
+class LegacyTraceIdMiddleware(BaseHTTPMiddleware):
+    """The original `BaseHTTPMiddleware` based implementation."""
+
+    async def dispatch(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        trace_id = str(uuid.uuid4())
+        request.state.trace_id = trace_id
+        trace_id_var.set(trace_id)
+        response = await call_next(request)
+        response.headers["X-Trace-ID"] = trace_id
+        return response
+
+
+def _endpoint(_: Request) -> PlainTextResponse:
+    return PlainTextResponse("ok")
+
+
+def build_app(middleware: type | None) -> Starlette:
+    """Build a minimal app with a single route wrapped by `middleware`."""
+    return Starlette(
+        routes=[Route("/", _endpoint)],
+        middleware=[Middleware(middleware)] if middleware else [],
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    results = {
+        "no middleware": time_asgi(build_app(None)),
+        "BaseHTTPMiddleware": time_asgi(build_app(LegacyTraceIdMiddleware)),
+        "pure ASGI": time_asgi(build_app(TraceIdMiddleware)),
+    }
+    print_comparison(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Load benchmarks of the whole application: every route and auth flow is driven
+through the full middleware stack built by `create_app`, either in-process over
+ASGI or over HTTP against a uvicorn server in a subprocess.
+
+Each scenario reports throughput, p50/p95/p99 latency and, in-process, the peak
+memory allocated per request as JSON. Results can be compared against a baseline
+saved by an earlier run, failing when a metric regresses beyond a threshold.
+
+Run with `python -m benchmarks.load --help`.
+"""
@@ -0,0 +1,109 @@
+"""
+Run the load benchmarks and print the results as JSON.
+
+Examples:
+
+    python -m benchmarks.load --output baseline.json
+    python -m benchmarks.load --mode all --baseline baseline.json
+
+Exits with status 1 when a metric regressed beyond its threshold from the baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+from typing import Any
+
+from benchmarks.load.baseline import Thresholds, compare, load_baseline
+from benchmarks.load.runner import run_in_process, run_uvicorn
+from benchmarks.load.scenarios import SCENARIOS
+
+MODES = {"in_process": ["in_process"], "uvicorn": ["uvicorn"]}
+MODES["all"] = MODES["in_process"] + MODES["uvicorn"]
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument("--mode", choices=MODES, default="in_process")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="scenario to run, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiply the number of requests of each scenario",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="uvicorn worker processes"
+    )
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--baseline", help="compare against the results in this file")
+    defaults = Thresholds()
+    parser.add_argument(
+        "--max-throughput-drop", type=float, default=defaults.throughput_drop
+    )
+    parser.add_argument(
+        "--max-latency-increase", type=float, default=defaults.latency_increase
+    )
+    parser.add_argument(
+        "--max-allocation-increase", type=float, default=defaults.allocation_increase
+    )
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the selected scenarios in each selected mode."""
+    results: dict[str, Any] = {}
+    for mode in MODES[args.mode]:
+        results[mode] = {}
+        for name in args.scenario or SCENARIOS:
+            scenario = SCENARIOS[name]()
+            requests = max(1, round(scenario.requests * args.scale))
+            print(f"Running {mode}/{name}", file=sys.stderr)
+            if mode == "uvicorn":
+                results[mode][name] = await run_uvicorn(
+                    scenario, requests, args.workers
+                )
+            else:
+                results[mode][name] = await run_in_process(scenario, requests)
+    return results
+
+
+def main() -> None:
+    """Run the benchmarks, report the results and check them against a baseline."""
+    args = parse_args()
+    report = {
+        "python": platform.python_version(),
+        "results": asyncio.run(run(args)),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+    if args.baseline:
+        regressions = compare(
+            report["results"],
+            load_baseline(args.baseline),
+            Thresholds(
+                args.max_throughput_drop,
+                args.max_latency_increase,
+                args.max_allocation_increase,
+            ),
+        )
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare load benchmark results against a baseline saved by an earlier run.
+
+Results are keyed by mode and then scenario. Scenarios missing from either side are
+skipped, so a baseline can cover a subset of the scenarios.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    """The largest relative change of each metric that is not a regression."""
+
+    throughput_drop: float = 0.10
+    latency_increase: float = 0.15
+    allocation_increase: float = 0.10
+
+
+def load_baseline(path: str) -> dict[str, Any]:
+    """Read the results stored in a baseline file."""
+    with open(path, encoding="utf-8") as file:
+        return dict(json.load(file)["results"])
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], thresholds: Thresholds
+) -> list[str]:
+    """Return a description of each metric that regressed from the baseline."""
+    # Metric, whether lower values are better, and the largest allowed change
+    checks = [
+        ("throughput_rps", False, thresholds.throughput_drop),
+        ("p50_ms", True, thresholds.latency_increase),
+        ("p95_ms", True, thresholds.latency_increase),
+        ("p99_ms", True, thresholds.latency_increase),
+        ("alloc_peak_kb", True, thresholds.allocation_increase),
+    ]
+    regressions = []
+    for mode, scenarios in results.items():
+        for name, stats in scenarios.items():
+            base = baseline.get(mode, {}).get(name)
+            if base is None:
+                continue
+            for metric, lower_is_better, limit in checks:
+                if not base.get(metric) or metric not in stats:
+                    continue
+                change = stats[metric] / base[metric] - 1
+                if (change if lower_is_better else -change) > limit:
+                    regressions.append(
+                        f"{mode}/{name}: {metric} {base[metric]:.2f} -> "
+                        f"{stats[metric]:.2f} ({change:+.1%}, limit "
+                        f"{limit if lower_is_better else -limit:+.1%})"
+                    )
+            if stats["unexpected_statuses"] > base["unexpected_statuses"]:
+                regressions.append(
+                    f"{mode}/{name}: {stats['unexpected_statuses']} unexpected "
+                    f"statuses, baseline {base['unexpected_statuses']}"
+                )
+    return regressions
@@ -0,0 +1,255 @@
+"""
+Drive a scenario against the application and summarise the results.
+
+In-process, requests go through the ASGI interface of an app built by `create_app`
+with its lifespan running, so the numbers cover the middlewares, routing, validation
+and serialization but no networking. Against uvicorn, the app is served by the
+production supervisor (`src.core.server.run`) in a subprocess and requests are sent
+over HTTP with keep-alive connections, so latency also includes the client.
+"""
+
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.load.scenarios import LoadRequest, Scenario
+from benchmarks.utils import make_scope
+from src.core.settings import settings
+from src.main import create_app
+
+Send = Callable[[LoadRequest], Awaitable[int]]
+
+# Requests measured for allocations in-process, the app is much slower while traced
+ALLOCATION_REQUESTS = 200
+
+
+@contextmanager
+def override_settings(overrides: dict[str, Any]) -> Iterator[None]:
+    """Set settings for the duration of the block."""
+    previous = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+def asgi_sender(app: FastAPI) -> Send:
+    """Return a function sending a request to `app` and returning the status code."""
+
+    async def send_request(request: LoadRequest) -> int:
+        scope = make_scope(
+            request.path,
+            request.method,
+            [(name.encode(), value.encode()) for name, value in request.headers],
+        )
+        messages = [{"type": "http.request", "body": request.body, "more_body": False}]
+        status = 0
+
+        async def receive() -> dict[str, Any]:
+            return messages.pop() if messages else {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(scope, receive, send)
+        return status
+
+    return send_request
+
+
+def http_sender(client: httpx.AsyncClient) -> Send:
+    """Return a function sending a request with `client` and returning the status."""
+
+    async def send_request(request: LoadRequest) -> int:
+        response = await client.request(
+            request.method,
+            request.path,
+            headers=list(request.headers),
+            content=request.body or None,
+        )
+        return response.status_code
+
+    return send_request
+
+
+async def drive(
+    send: Send, requests: list[LoadRequest], concurrency: int
+) -> tuple[list[float], Counter[int], float]:
+    """Send `requests` from `concurrency` concurrent clients.
+
+    Returns the latency of each request in seconds, the count of each status code and
+    the total time taken.
+    """
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    pending = iter(requests)
+
+    async def client() -> None:
+        for request in pending:
+            start = time.perf_counter()
+            statuses[await send(request)] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def measure_allocations(send: Send, requests: list[LoadRequest]) -> float:
+    """Return the mean peak memory allocated by a request in KiB, one at a time."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for request in requests:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await send(request)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return statistics.fmean(peaks) / 1024
+
+
+def summarise(
+    scenario: Scenario,
+    latencies: list[float],
+    statuses: Counter[int],
+    elapsed: float,
+) -> dict[str, Any]:
+    """Return the throughput, latency percentiles and status codes of a run."""
+    timings = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        return timings[min(len(timings) - 1, int(len(timings) * fraction))] * 1000
+
+    return {
+        "requests": len(timings),
+        "concurrency": scenario.concurrency,
+        "throughput_rps": len(timings) / elapsed,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "unexpected_statuses": sum(
+            count
+            for status, count in statuses.items()
+            if status not in scenario.expected_statuses
+        ),
+    }
+
+
+def build_requests(scenario: Scenario, count: int, first: int = 0) -> list[LoadRequest]:
+    """Build `count` requests of a scenario, numbered from `first`."""
+    return [scenario.build(number) for number in range(first, first + count)]
+
+
+async def run_in_process(scenario: Scenario, requests: int) -> dict[str, Any]:
+    """Run a scenario against an in-process app and return its summary."""
+    warmup = build_requests(scenario, max(1, requests // 10))
+    timed = build_requests(scenario, requests, len(warmup))
+    traced = build_requests(
+        scenario, min(requests, ALLOCATION_REQUESTS), len(warmup) + requests
+    )
+    with override_settings(scenario.settings):
+        app = create_app()
+    async with app.router.lifespan_context(app):
+        send = asgi_sender(app)
+        await drive(send, warmup, scenario.concurrency)
+        summary = summarise(scenario, *await drive(send, timed, scenario.concurrency))
+        summary["alloc_peak_kb"] = await measure_allocations(send, traced)
+    return summary
+
+
+def free_port() -> int:
+    """Return a local TCP port that is not in use."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float) -> None:
+    """Wait until a server accepts connections on `port`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Server did not accept connections on port {port}")
+
+
+@contextmanager
+def uvicorn_server(
+    overrides: dict[str, Any], workers: int, timeout: float = 30.0
+) -> Iterator[str]:
+    """Serve the app with the production supervisor in a subprocess.
+
+    The settings overrides are passed as environment variables, and the server's
+    output is discarded. Yields the base URL of the server.
+    """
+    port = free_port()
+    env = {
+        **os.environ,
+        **{name.upper(): str(value) for name, value in overrides.items()},
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": str(workers),
+    }
+    process = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-c", "from src.core.server import run; run()"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port, process, timeout)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+async def run_uvicorn(
+    scenario: Scenario, requests: int, workers: int = 1
+) -> dict[str, Any]:
+    """Run a scenario against a uvicorn server in a subprocess and return its
+    summary."""
+    warmup = build_requests(scenario, max(1, requests // 10))
+    timed = build_requests(scenario, requests, len(warmup))
+    limits = httpx.Limits(
+        max_connections=scenario.concurrency,
+        max_keepalive_connections=scenario.concurrency,
+    )
+    with uvicorn_server(scenario.settings, workers) as url:
+        async with httpx.AsyncClient(
+            base_url=url, limits=limits, timeout=60.0
+        ) as client:
+            send = http_sender(client)
+            await drive(send, warmup, scenario.concurrency)
+            return summarise(scenario, *await drive(send, timed, scenario.concurrency))
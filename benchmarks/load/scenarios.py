@@ -0,0 +1,138 @@
+"""
+The load scenarios: the requests each one sends, the statuses it expects and the
+settings the application is built with.
+
+Scenarios other than the rate limit storm raise the rate limit out of the way, so
+they measure their route rather than 429 responses. Logins and registrations hash a
+password with bcrypt on every request, so they send far fewer requests.
+"""
+
+import itertools
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from urllib.parse import urlencode
+
+from src.core.security import create_access_token
+from src.core.settings import settings
+from src.models import TokenData
+
+# Demo user seeded in the in-memory user store
+USERNAME = "user"
+PASSWORD = "password"
+
+UNLIMITED = {"rate_limit": "1000000/second"}
+
+
+@dataclass(frozen=True)
+class LoadRequest:
+    """An HTTP request sent by a scenario."""
+
+    method: str
+    path: str
+    headers: tuple[tuple[str, str], ...] = ()
+    body: bytes = b""
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A load scenario.
+
+    `build` returns the request to send for the request number it is given, and is
+    called before timing starts.
+    """
+
+    name: str
+    build: Callable[[int], LoadRequest]
+    expected_statuses: frozenset[int]
+    requests: int = 2_000
+    concurrency: int = 16
+    settings: dict[str, Any] = field(default_factory=lambda: dict(UNLIMITED))
+
+
+def bearer(token: str) -> tuple[str, str]:
+    """Returns an authorization header carrying `token`."""
+    return ("authorization", f"Bearer {token}")
+
+
+def valid_token() -> str:
+    """Returns a token for the demo user, valid for an hour."""
+    expire = datetime.now(timezone.utc) + timedelta(hours=1)
+    return create_access_token(TokenData(sub=USERNAME, exp=expire))
+
+
+def index_valid_token() -> Callable[[int], LoadRequest]:
+    """Authenticated requests to the index route."""
+    request = LoadRequest("GET", settings.api_v1_prefix + "/", (bearer(valid_token()),))
+    return lambda _: request
+
+
+def index_invalid_token() -> Callable[[int], LoadRequest]:
+    """Requests to the index route with a token signed by another key."""
+    token = valid_token()
+    request = LoadRequest(
+        "GET", settings.api_v1_prefix + "/", (bearer(token[:-4] + "AAAA"),)
+    )
+    return lambda _: request
+
+
+def login() -> Callable[[int], LoadRequest]:
+    """OAuth2 password logins of the demo user."""
+    body = urlencode(
+        {"grant_type": "password", "username": USERNAME, "password": PASSWORD}
+    ).encode()
+    request = LoadRequest(
+        "POST",
+        settings.api_v1_prefix + "/token",
+        (("content-type", "application/x-www-form-urlencoded"),),
+        body,
+    )
+    return lambda _: request
+
+
+def register() -> Callable[[int], LoadRequest]:
+    """Registrations of new users, by the authenticated demo user."""
+    headers = (bearer(valid_token()), ("content-type", "application/json"))
+    # Unique across runs of the scenario against the same server
+    numbers = itertools.count()
+    stamp = int(datetime.now(timezone.utc).timestamp() * 1000)
+
+    def build(_: int) -> LoadRequest:
+        username = f"load-{stamp}-{next(numbers)}"
+        body = json.dumps(
+            {
+                "username": username,
+                "password": PASSWORD,
+                "first_name": "Load",
+                "last_name": "Test",
+                "email": f"{username}@example.com",
+            }
+        ).encode()
+        return LoadRequest("POST", settings.api_v1_prefix + "/register", headers, body)
+
+    return build
+
+
+SCENARIOS: dict[str, Callable[[], Scenario]] = {
+    "index_valid_token": lambda: Scenario(
+        "index_valid_token", index_valid_token(), frozenset({200})
+    ),
+    "index_invalid_token": lambda: Scenario(
+        "index_invalid_token", index_invalid_token(), frozenset({401})
+    ),
+    "login": lambda: Scenario(
+        "login", login(), frozenset({200}), requests=40, concurrency=4
+    ),
+    "register": lambda: Scenario(
+        "register", register(), frozenset({200}), requests=40, concurrency=4
+    ),
+    # Every request comes from the same client, so all but the first few are limited
+    "rate_limit_storm": lambda: Scenario(
+        "rate_limit_storm",
+        index_valid_token(),
+        frozenset({200, 429}),
+        concurrency=64,
+        settings={"rate_limit": "10/minute"},
+    ),
+}
@@ -0,0 +1,7 @@
+"""
+Microbenchmarks of the security primitives and models, see `benchmarks.micro.suite`
+for the cases.
+
+Run with `python -m benchmarks.micro` to benchmark the working tree, or compare two
+git revisions with e.g. `python -m benchmarks.micro --compare main HEAD`.
+"""
@@ -0,0 +1,145 @@
+"""
+Run the microbenchmarks against the working tree, or against two git revisions and
+print a comparison table.
+
+Each revision is checked out in a temporary git worktree, and this tree's
+`suite.py` is run by path in a subprocess with the worktree first on the Python
+path, so every revision is measured by the same cases. A revision of `.` is the
+working tree, including uncommitted changes.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+SUITE = Path(__file__).with_name("suite.py")
+WORKING_TREE = "."
+
+
+def repository_root() -> Path:
+    """Return the root of the git repository containing this file."""
+    output = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"],
+        cwd=SUITE.parent,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return Path(output.strip())
+
+
+@contextmanager
+def checkout(revision: str) -> Iterator[Path]:
+    """Yield a directory containing the tree of `revision`."""
+    root = repository_root()
+    if revision == WORKING_TREE:
+        yield root
+        return
+    with tempfile.TemporaryDirectory(prefix="microbench-") as directory:
+        path = Path(directory) / "tree"
+        subprocess.run(
+            ["git", "worktree", "add", "--quiet", "--detach", str(path), revision],
+            cwd=root,
+            check=True,
+        )
+        try:
+            yield path
+        finally:
+            subprocess.run(
+                ["git", "worktree", "remove", "--force", str(path)],
+                cwd=root,
+                check=True,
+            )
+
+
+def run_suite(tree: Path, suite_args: list[str], capture: bool) -> str:
+    """Run the suite against a tree and return its output if captured."""
+    env = {**os.environ, "PYTHONPATH": str(tree)}
+    # The suite does not need a real secret, and `.env` is not in a worktree
+    env.setdefault("SECRET_KEY", "microbenchmark-secret")
+    return subprocess.run(
+        [sys.executable, str(SUITE), *suite_args],
+        cwd=tree,
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE if capture else None,
+        text=True,
+    ).stdout
+
+
+def benchmark_revision(revision: str, suite_args: list[str]) -> dict[str, Any]:
+    """Run the suite against a revision and return its results."""
+    print(f"Benchmarking {revision}", file=sys.stderr)
+    with checkout(revision) as tree:
+        return dict(json.loads(run_suite(tree, suite_args, capture=True)))
+
+
+def print_comparison(
+    base: str, target: str, before: dict[str, Any], after: dict[str, Any]
+) -> None:
+    """Print the results of two revisions side by side, with the relative change."""
+    names = list(before) + [name for name in after if name not in before]
+    width = max(len(name) for name in names) + 2
+    print(
+        "".ljust(width)
+        + f"{base} ns/op"[-16:].rjust(16)
+        + f"{target} ns/op"[-16:].rjust(16)
+        + "change".rjust(9)
+        + "bytes/op".rjust(11)
+        + "bytes/op".rjust(11)
+    )
+    for name in names:
+        old, new = before.get(name), after.get(name)
+        change = (
+            f"{new['ns_per_op'] / old['ns_per_op'] - 1:+.1%}" if old and new else "-"
+        )
+        print(
+            name.ljust(width)
+            + (f"{old['ns_per_op']:16,.0f}" if old else "-".rjust(16))
+            + (f"{new['ns_per_op']:16,.0f}" if new else "-".rjust(16))
+            + change.rjust(9)
+            + (f"{old['bytes_per_op']:11,.0f}" if old else "-".rjust(11))
+            + (f"{new['bytes_per_op']:11,.0f}" if new else "-".rjust(11))
+        )
+
+
+def main() -> None:
+    """Benchmark the working tree, or compare two revisions."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro")
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="REVISION",
+        help=f"compare a base revision against a target (default: {WORKING_TREE!r},"
+        " the working tree)",
+    )
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--min-time", default="0.2", help="seconds per timed run")
+    parser.add_argument("--repeat", default="5", help="timed runs per case")
+    args = parser.parse_args()
+
+    suite_args = ["--min-time", args.min_time, "--repeat", args.repeat]
+    if args.filter:
+        suite_args += ["--filter", args.filter]
+    if not args.compare:
+        run_suite(repository_root(), ["--table", *suite_args], capture=False)
+        return
+    if len(args.compare) > 2:
+        parser.error("--compare takes a base and at most one target revision")
+
+    base, target = (args.compare + [WORKING_TREE])[:2]
+    before = benchmark_revision(base, suite_args)
+    after = benchmark_revision(target, suite_args)
+    print_comparison(
+        base, "working tree" if target == WORKING_TREE else target, before, after
+    )
+
+
+if __name__ == "__main__":
+    main()
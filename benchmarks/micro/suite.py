@@ -0,0 +1,321 @@
+"""
+Microbenchmarks of the security primitives and models on the auth hot path.
+
+Each case calls one function with fixed arguments and reports the time per call in
+nanoseconds and the memory allocated by a call in bytes (the `tracemalloc` peak
+above the memory in use before the call):
+
+- `get_password_hash` and `verify_password` for several bcrypt cost factors. The
+  application always uses bcrypt's default cost, so `bcrypt.gensalt` is patched
+  while a hashing case runs, and verification uses a hash of each cost.
+- `create_access_token` and `decode_token` for each JWT algorithm and several
+  subject sizes, with a key ring of a key for the algorithm (or, in revisions before
+  the key ring, `src.core.security.ALGORITHM`) patched in while the case runs. The
+  asymmetric algorithms need a key ring and `cryptography`.
+- `get_user_base` with the profile served from the user cache and from the user
+  repository.
+- The `TokenData` and `UserBase` constructors for several subject and name sizes.
+
+This module only imports the standard library and `src`, so it can be run by path
+against a checkout of another revision, see `benchmarks.micro`. Cases whose setup
+fails, e.g. because a function does not exist in that revision, are skipped.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator
+
+BCRYPT_COSTS = (4, 8, 10, 12)
+JWT_ALGORITHMS = ("HS256", "HS384", "HS512")
+# Algorithms only benchmarked with a key ring
+ASYMMETRIC_JWT_ALGORITHMS = ("ES256", "EdDSA")
+# Sizes in bytes of the token subject and user names
+PAYLOAD_SIZES = (16, 256, 4096)
+# Calls traced to measure allocations
+ALLOCATION_CALLS = 20
+
+
+@dataclass(frozen=True)
+class Case:
+    """A function to benchmark.
+
+    `patches` are `(object, attribute, value)` triples set while the case runs.
+    """
+
+    name: str
+    func: Callable[[], Any]
+    is_async: bool = False
+    patches: tuple[tuple[Any, str, Any], ...] = ()
+
+
+def password_cases() -> Iterator[Case]:
+    """Hashing and verification for each bcrypt cost factor."""
+    # pylint: disable=import-outside-toplevel
+    import bcrypt
+
+    from src.core import security
+
+    for cost in BCRYPT_COSTS:
+        gensalt = functools.partial(bcrypt.gensalt, rounds=cost)
+        hashed = bcrypt.hashpw(b"password", gensalt()).decode()
+        yield Case(
+            f"get_password_hash[cost={cost}]",
+            functools.partial(security.get_password_hash, "password"),
+            patches=((security.bcrypt, "gensalt", gensalt),),
+        )
+        yield Case(
+            f"verify_password[cost={cost}]",
+            functools.partial(security.verify_password, "password", hashed),
+        )
+
+
+def pem_private_key(algorithm: str) -> bytes:
+    """A new private key for an asymmetric JWT algorithm, in PEM format."""
+    # pylint: disable=import-outside-toplevel
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+    key = (
+        ec.generate_private_key(ec.SECP256R1())
+        if algorithm == "ES256"
+        else ed25519.Ed25519PrivateKey.generate()
+    )
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def token_signing(security: Any, algorithm: str) -> tuple[Any, dict[str, str], tuple]:
+    """The key and headers signing tokens for an algorithm, and the patches making
+    the application use it."""
+    if not hasattr(security, "get_key_ring"):
+        return security.SECRET_KEY, {}, ((security, "ALGORITHM", algorithm),)
+
+    # pylint: disable=import-outside-toplevel
+    from src.core.key_ring import KeyRing, load_key
+
+    material = (
+        security.SECRET_KEY
+        if algorithm in JWT_ALGORITHMS
+        else pem_private_key(algorithm)
+    )
+    ring = KeyRing([load_key("bench", algorithm, material)], "bench")
+    patches = ((security, "get_key_ring", functools.partial(lambda ring: ring, ring)),)
+    return ring.signing_key, {"kid": "bench"}, patches
+
+
+def token_cases() -> Iterator[Case]:
+    """Token creation and decoding for each algorithm and subject size."""
+    # pylint: disable=import-outside-toplevel
+    import jwt
+    from jwt.algorithms import has_crypto
+
+    from src.core import security
+    from src.models import TokenData
+
+    algorithms = JWT_ALGORITHMS
+    if hasattr(security, "get_key_ring") and has_crypto:
+        algorithms += ASYMMETRIC_JWT_ALGORITHMS
+    expire = datetime.now(timezone.utc) + timedelta(days=1)
+    for algorithm in algorithms:
+        key, headers, patches = token_signing(security, algorithm)
+        for size in PAYLOAD_SIZES:
+            data = TokenData(sub="u" * size, exp=expire)
+            token = jwt.encode(
+                data.model_dump(exclude_none=True), key, algorithm, headers=headers
+            )
+            yield Case(
+                f"create_access_token[{algorithm},sub={size}B]",
+                functools.partial(security.create_access_token, data),
+                patches=patches,
+            )
+            yield Case(
+                f"decode_token[{algorithm},sub={size}B]",
+                functools.partial(security.decode_token, token),
+                patches=patches,
+            )
+
+
+def user_cases() -> Iterator[Case]:
+    """User profile lookups, from the cache and from the repository."""
+    # pylint: disable=import-outside-toplevel
+    from src.services import users
+
+    username = users.SEED_USERS[0].username
+
+    async def uncached() -> Any:
+        users.user_cache.clear()
+        return await users.get_user_base(username)
+
+    yield Case(
+        "get_user_base[cached]",
+        functools.partial(users.get_user_base, username),
+        is_async=True,
+    )
+    yield Case("get_user_base[uncached]", uncached, is_async=True)
+
+
+def model_cases() -> Iterator[Case]:
+    """Model construction and validation for each subject and name size."""
+    # pylint: disable=import-outside-toplevel
+    from src.models import TokenData, UserBase
+
+    expire = datetime.now(timezone.utc) + timedelta(days=1)
+    for size in PAYLOAD_SIZES:
+        yield Case(
+            f"TokenData[sub={size}B]",
+            functools.partial(TokenData, sub="u" * size, exp=expire),
+        )
+        yield Case(
+            f"UserBase[names={size}B]",
+            functools.partial(
+                UserBase,
+                username="u" * size,
+                first_name="f" * size,
+                last_name="l" * size,
+                email="user@example.com",
+            ),
+        )
+
+
+CASE_GROUPS = [password_cases, token_cases, user_cases, model_cases]
+
+
+def collect_cases(pattern: str | None = None) -> tuple[list[Case], list[str]]:
+    """Build the cases whose name contains `pattern`.
+
+    Returns the cases and a description of each group whose setup failed.
+    """
+    cases, skipped = [], []
+    for group in CASE_GROUPS:
+        try:
+            group_cases = list(group())
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            skipped.append(f"{group.__name__}: {error!r}")
+            continue
+        cases.extend(
+            case for case in group_cases if not pattern or pattern in case.name
+        )
+    return cases, skipped
+
+
+def run_calls(case: Case, calls: int) -> float:
+    """Call the case `calls` times and return the elapsed time in nanoseconds."""
+    func = case.func
+    if not case.is_async:
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            func()
+        return time.perf_counter_ns() - start
+
+    async def run() -> int:
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            await func()
+        return time.perf_counter_ns() - start
+
+    return asyncio.run(run())
+
+
+def trace_allocations(case: Case, calls: int) -> float:
+    """Return the mean memory allocated by a call of the case in bytes.
+
+    Async cases are traced inside a running event loop, so setting up the loop is
+    not counted.
+    """
+    peaks: list[int] = []
+
+    def before_call() -> int:
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def after_call(before: int) -> None:
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+
+    async def run() -> None:
+        for _ in range(calls):
+            before = before_call()
+            await case.func()
+            after_call(before)
+
+    tracemalloc.start()
+    try:
+        if case.is_async:
+            asyncio.run(run())
+        else:
+            for _ in range(calls):
+                before = before_call()
+                case.func()
+                after_call(before)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+
+def measure(case: Case, min_time: float, repeat: int) -> dict[str, float]:
+    """Time a case and trace its allocations.
+
+    The number of calls per run is doubled until a run takes `min_time` seconds, and
+    the fastest of `repeat` runs is reported.
+    """
+    previous = [
+        (target, name, getattr(target, name)) for target, name, _ in case.patches
+    ]
+    for target, name, value in case.patches:
+        setattr(target, name, value)
+    try:
+        calls = 1
+        while (elapsed := run_calls(case, calls)) < min_time * 1e9:
+            calls *= 2
+        best = min([elapsed] + [run_calls(case, calls) for _ in range(repeat - 1)])
+        return {
+            "ns_per_op": best / calls,
+            "bytes_per_op": trace_allocations(case, min(calls, ALLOCATION_CALLS)),
+        }
+    finally:
+        for target, name, value in previous:
+            setattr(target, name, value)
+
+
+def main() -> None:
+    """Run the cases and print the results as JSON, or as a table with `--table`."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--table", action="store_true")
+    args = parser.parse_args()
+
+    cases, skipped = collect_cases(args.filter)
+    results = {}
+    for case in cases:
+        print(f"Running {case.name}", file=sys.stderr)
+        results[case.name] = measure(case, args.min_time, args.repeat)
+    for reason in skipped:
+        print(f"Skipped {reason}", file=sys.stderr)
+
+    if not results:
+        sys.exit("No cases to run")
+    if not args.table:
+        print(json.dumps(results, indent=2))
+        return
+    width = max(len(name) for name in results) + 2
+    print("".ljust(width) + "ns/op".rjust(16) + "bytes/op".rjust(12))
+    for name, stats in results.items():
+        print(
+            f"{name.ljust(width)}{stats['ns_per_op']:16,.0f}"
+            f"{stats['bytes_per_op']:12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Shared helpers for driving ASGI applications in-process during benchmarks.
+"""
+
+import asyncio
+import statistics
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable
+
+ASGIApp = Callable[[dict, Callable, Callable], Awaitable[None]]
+
+
+def make_scope(
+    path: str = "/", method: str = "GET", headers: list | None = None
+) -> dict[str, Any]:
+    """Build a minimal HTTP scope for a request to `path`."""
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers or [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+async def _receive() -> dict[str, Any]:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(_: dict[str, Any]) -> None:
+    return None
+
+
+async def _time_requests(
+    app: ASGIApp, scope_factory: Callable[[], dict], iterations: int
+) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        scope = scope_factory()
+        start = time.perf_counter_ns()
+        await app(scope, _receive, _send)
+        timings.append((time.perf_counter_ns() - start) / 1000)
+    return timings
+
+
+def time_asgi(
+    app: ASGIApp,
+    scope_factory: Callable[[], dict] = make_scope,
+    iterations: int = 20_000,
+    warmup: int = 1_000,
+) -> dict[str, float]:
+    """Drive `app` in-process and return latency statistics in microseconds."""
+
+    async def run() -> list[float]:
+        await _time_requests(app, scope_factory, warmup)
+        return await _time_requests(app, scope_factory, iterations)
+
+    timings = sorted(asyncio.run(run()))
+    return {
+        "mean_us": statistics.fmean(timings),
+        "p50_us": timings[len(timings) // 2],
+        "p99_us": timings[int(len(timings) * 0.99)],
+    }
+
+
+def measure_allocations(
+    app: ASGIApp,
+    scope_factory: Callable[[], dict] = make_scope,
+    iterations: int = 1_000,
+    warmup: int = 100,
+) -> dict[str, float]:
+    """Drive `app` in-process and return the peak memory allocated per request.
+
+    The peak is measured with `tracemalloc` relative to the memory in use before each
+    request, so it counts short-lived allocations that are freed again.
+    """
+
+    async def run() -> list[int]:
+        await _time_requests(app, scope_factory, warmup)
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(iterations):
+                scope = scope_factory()
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                await app(scope, _receive, _send)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - before)
+        finally:
+            tracemalloc.stop()
+        return peaks
+
+    peaks = sorted(asyncio.run(run()))
+    return {
+        "mean_peak_kb": statistics.fmean(peaks) / 1024,
+        "p50_peak_kb": peaks[len(peaks) // 2] / 1024,
+    }
+
+
+def print_comparison(results: dict[str, dict[str, float]]) -> None:
+    """Print a table of benchmark results, one row per variant."""
+    columns = list(next(iter(results.values())))
+    name_width = max(len(name) for name in results) + 2
+    print("".ljust(name_width) + "".join(column.rjust(14) for column in columns))
+    for name, stats in results.items():
+        print(
+            name.ljust(name_width)
+            + "".join(f"{stats[column]:14.2f}" for column in columns)
+        )
@@ -1,6 +1,6 @@
-import uvicorn
+from src.core.server import run
 
 
 def main():
 
-    uvicorn.run("src.main:api")
+    run()
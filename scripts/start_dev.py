@@ -4,8 +4,9 @@ import uvicorn
 def main():
 
     uvicorn.run(
-        "src.main:api",
+        "src.main:create_app",
         host="0.0.0.0",
         port=8000,
         reload=True,
+        factory=True,
     )
@@ -2,6 +2,143 @@
 Module for managing the context across the application.
 """
 
+import time
 from contextvars import ContextVar
+from types import TracebackType
 
 trace_id_var: ContextVar[str | None] = ContextVar("trace_id", default=None)
+
+
+class ServerTiming:
+    """Durations of the stages of a request, reported in the `Server-Timing` header.
+
+    Stages are recorded in two ways:
+    - `mark(name)` attributes the time since the previous mark to `name`, so marks
+      placed along the request path split its latency into consecutive stages.
+    - `span(name)` times a block, e.g. one step within a stage.
+
+    Durations recorded more than once under the same name are added up.
+    """
+
+    __slots__ = ("start", "last_mark", "durations")
+
+    def __init__(self) -> None:
+        """Start timing a request."""
+        self.start = self.last_mark = time.perf_counter()
+        self.durations: dict[str, float] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        """Adds a duration to a stage.
+
+        Args:
+            name (str): The stage name.
+            duration (float): The duration in seconds.
+        """
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def mark(self, name: str) -> None:
+        """Ends the current stage, attributing the time since the previous mark to it.
+
+        Args:
+            name (str): The name of the stage that just ended.
+        """
+        now = time.perf_counter()
+        self.add(name, now - self.last_mark)
+        self.last_mark = now
+
+    def span(self, name: str) -> "TimingSpan":
+        """Returns a context manager timing a block as a stage.
+
+        Args:
+            name (str): The stage name.
+
+        Returns:
+            TimingSpan: The context manager.
+        """
+        return TimingSpan(self, name)
+
+    def header_value(self) -> str:
+        """Renders the stages and the total so far as a `Server-Timing` header value.
+
+        Returns:
+            str: e.g. `auth;dur=0.412, handler;dur=1.208, total;dur=2.051`, in
+                 milliseconds.
+        """
+        total = time.perf_counter() - self.start
+        return ", ".join(
+            f"{name};dur={duration * 1000:.3f}"
+            for name, duration in [*self.durations.items(), ("total", total)]
+        )
+
+
+class TimingSpan:
+    """Context manager adding the duration of a block to a `ServerTiming` stage."""
+
+    __slots__ = ("timing", "name", "start")
+
+    def __init__(self, timing: ServerTiming, name: str):
+        """
+        Initialise the span.
+
+        Args:
+            timing (ServerTiming): The request timing to record into.
+            name (str): The stage name.
+        """
+        self.timing = timing
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.timing.add(self.name, time.perf_counter() - self.start)
+
+
+class _NoSpan:
+    """Context manager doing nothing, used when requests are not timed."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+
+NO_SPAN = _NoSpan()
+
+# Set by `ServerTimingMiddleware` when `settings.server_timing_enabled` is on
+server_timing_var: ContextVar[ServerTiming | None] = ContextVar(
+    "server_timing", default=None
+)
+
+
+def timing_span(name: str) -> TimingSpan | _NoSpan:
+    """Returns a context manager timing a block of the current request.
+
+    Args:
+        name (str): The stage name.
+
+    Returns:
+        TimingSpan | _NoSpan: The span, or a no-op if the request is not timed.
+    """
+    timing = server_timing_var.get()
+    return NO_SPAN if timing is None else TimingSpan(timing, name)
+
+
+def timing_mark(name: str) -> None:
+    """Ends a stage of the current request, if it is timed. See `ServerTiming.mark`.
+
+    Args:
+        name (str): The name of the stage that just ended.
+    """
+    timing = server_timing_var.get()
+    if timing is not None:
+        timing.mark(name)
@@ -0,0 +1,143 @@
+"""
+Bounded thread pool for CPU heavy work such as password hashing.
+
+Work submitted here runs on a dedicated, separately sized pool instead of AnyIO's
+shared thread limiter, so a burst of hashing cannot starve unrelated sync routes.
+Admission control rejects new work once the pool and its queue are full.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, ParamSpec, TypeVar
+
+from src.exceptions.service_unavailable import ServiceUnavailableError
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """Thread pool with a queue depth limit and timing metrics.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more may wait for
+    a free worker. Submitting beyond that raises a `ServiceUnavailableError`, which
+    is turned into a 503 response with a `Retry-After` header.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, retry_after: int):
+        """
+        Initialise the executor. Worker threads are only started on first use.
+
+        Args:
+            name (str): Name used for worker threads and error messages.
+            max_workers (int): The number of worker threads.
+            max_queue (int): The number of jobs allowed to wait for a worker.
+            retry_after (int): Seconds clients are asked to wait when rejected.
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "run_seconds_total": 0.0,
+            "run_seconds_max": 0.0,
+        }
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The underlying thread pool, created on first access."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.name
+            )
+        return self._executor
+
+    async def run(self, func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """Runs a function on the pool and waits for its result.
+
+        Args:
+            func (Callable): The blocking function to run.
+            *args: Positional arguments for the function.
+            **kwargs: Keyword arguments for the function.
+
+        Returns:
+            T: The function's return value.
+
+        Raises:
+            ServiceUnavailableError: If the pool and its queue are full.
+        """
+        if self.pending >= self.max_workers + self.max_queue:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise ServiceUnavailableError(
+                f"Too many concurrent {self.name} requests, please retry later",
+                retry_after=self.retry_after,
+            )
+
+        with self._lock:
+            self.pending += 1
+        submitted_at = time.perf_counter()
+        job = functools.partial(func, *args, **kwargs)
+        try:
+            future = self.executor.submit(self._timed, submitted_at, job)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+        # A job holds its place until it finishes, even if the caller is cancelled
+        # while it runs, and is added before the result is passed to the caller
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _: Future[T]) -> None:
+        """Frees the place of a job that finished or was cancelled before running."""
+        with self._lock:
+            self.pending -= 1
+
+    def _timed(self, submitted_at: float, job: Callable[[], T]) -> T:
+        """Runs a job on a worker thread and records its queue wait and run time."""
+        started_at = time.perf_counter()
+        try:
+            return job()
+        finally:
+            self._record(started_at - submitted_at, time.perf_counter() - started_at)
+
+    def _record(self, queue_wait: float, run_time: float) -> None:
+        """Adds one completed job to the timing metrics."""
+        with self._lock:
+            stats = self._stats
+            stats["completed"] += 1
+            stats["queue_wait_seconds_total"] += queue_wait
+            stats["queue_wait_seconds_max"] = max(
+                stats["queue_wait_seconds_max"], queue_wait
+            )
+            stats["run_seconds_total"] += run_time
+            stats["run_seconds_max"] = max(stats["run_seconds_max"], run_time)
+
+    def stats(self) -> dict[str, float]:
+        """Returns the executor metrics.
+
+        Returns:
+            dict[str, float]: The number of pending, completed and rejected jobs and
+                              the total and maximum queue wait and run times.
+        """
+        with self._lock:
+            return {"pending": self.pending, **self._stats}
+
+    def shutdown(self) -> None:
+        """Waits for running jobs to finish and stops the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
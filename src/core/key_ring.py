@@ -0,0 +1,336 @@
+"""
+Ring of JWT signing keys indexed by key ID (`kid`).
+
+Keys are parsed once when the ring is loaded into PyJWT `PyJWK` objects, so verifying
+a token skips PyJWT's per-call key preparation (PEM parsing for asymmetric keys,
+format checks for HMAC secrets). Tokens are signed with the ring's active key, which
+is named in their `kid` header, and verified with the key their header names. Tokens
+without a `kid` header are verified with the key with ID `DEFAULT_KEY_ID`, the key
+built from `settings.secret_key` when no key file is configured.
+
+A key file is a JSON document listing the keys and naming the active one:
+
+    {
+      "active": "2026-10",
+      "keys": [
+        {"kid": "2026-10", "alg": "ES256", "key_file": "2026-10.pem"},
+        {"kid": "2026-07", "alg": "EdDSA", "key": "-----BEGIN PUBLIC KEY-----..."},
+        {"kid": "default", "alg": "HS256", "key": "<old secret>"}
+      ]
+    }
+
+Each key is given inline with `key` or as a path relative to the key file with
+`key_file`: an HMAC secret, or a PEM private or public key for `ES256`, `ES384`,
+`ES512`, `RS256` or `EdDSA`. Keys given as public keys can only verify tokens. The
+public keys of asymmetric keys are published as a JWKS, HMAC secrets never are.
+
+To rotate keys without downtime, add the new key to the file, wait until services
+verifying tokens have refetched the JWKS, make it the active key, and remove the old
+key once the tokens signed with it have expired. The file is reloaded when it changes,
+see `KeyRingFile`.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import jwt
+from jwt.algorithms import HMACAlgorithm, get_default_algorithms
+
+from src.core.logger import setup_logger
+from src.core.response_cache import make_etag
+
+logger = setup_logger(__name__)
+
+# Key ID of tokens without a `kid` header, and of the key built from the secret key
+DEFAULT_KEY_ID = "default"
+# Encoded token headers remembered per ring, tokens signed by a key share one header
+MAX_HEADERS = 64
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """A key of the ring.
+
+    Attributes:
+        kid (str): The key ID.
+        algorithm (str): The JWT algorithm the key is used with.
+        verifying_key (jwt.PyJWK): The prepared key verifying signatures.
+        signing_key (jwt.PyJWK | None): The prepared key signing tokens, None for keys
+                                        only given as public keys.
+        public_jwk (dict[str, Any] | None): The public key as a JWK, None for HMAC
+                                            secrets, which are never published.
+    """
+
+    kid: str
+    algorithm: str
+    verifying_key: jwt.PyJWK
+    signing_key: jwt.PyJWK | None
+    public_jwk: dict[str, Any] | None
+
+
+def load_key(kid: str, algorithm: str, material: str | bytes) -> SigningKey:
+    """Parses a key for an algorithm.
+
+    Args:
+        kid (str): The key ID.
+        algorithm (str): The JWT algorithm, e.g. `HS256`, `ES256` or `EdDSA`.
+        material (str | bytes): The HMAC secret, or the PEM private or public key.
+
+    Returns:
+        SigningKey: The prepared key.
+
+    Raises:
+        ValueError: If the algorithm is not supported or the key does not suit it.
+    """
+    algorithms = get_default_algorithms()
+    if algorithm not in algorithms or algorithm == "none":
+        raise ValueError(f"Key {kid!r} has an unsupported algorithm: {algorithm!r}")
+    alg_obj = algorithms[algorithm]
+    try:
+        prepared = alg_obj.prepare_key(material)
+    except (jwt.InvalidKeyError, ValueError, TypeError) as error:
+        raise ValueError(f"Key {kid!r} is not a valid {algorithm} key") from error
+
+    if isinstance(alg_obj, HMACAlgorithm):
+        key = jwt.PyJWK(alg_obj.to_jwk(prepared, as_dict=True), algorithm)
+        return SigningKey(kid, algorithm, key, key, None)
+
+    # Private keys have a public key, public keys do not
+    is_private = hasattr(prepared, "public_key")
+    public = prepared.public_key() if is_private else prepared
+    public_jwk = {
+        **alg_obj.to_jwk(public, as_dict=True),
+        "kid": kid,
+        "alg": algorithm,
+        "use": "sig",
+    }
+    signing_key = (
+        jwt.PyJWK(alg_obj.to_jwk(prepared, as_dict=True), algorithm)
+        if is_private
+        else None
+    )
+    return SigningKey(
+        kid, algorithm, jwt.PyJWK(public_jwk, algorithm), signing_key, public_jwk
+    )
+
+
+class KeyRing:
+    """
+    The keys tokens are signed and verified with, indexed by key ID.
+    """
+
+    def __init__(self, keys: list[SigningKey], active_kid: str):
+        """
+        Initialise the ring and render its JWKS.
+
+        Args:
+            keys (list[SigningKey]): The keys.
+            active_kid (str): The ID of the key new tokens are signed with.
+
+        Raises:
+            ValueError: If key IDs repeat, or the active key is missing or can only
+                        verify tokens.
+        """
+        self.keys = {key.kid: key for key in keys}
+        if len(self.keys) != len(keys):
+            raise ValueError("Key IDs must be unique")
+        active = self.keys.get(active_kid)
+        if active is None or active.signing_key is None:
+            raise ValueError(f"Active key {active_kid!r} is not a private key")
+        self.active = active
+        self.signing_key: jwt.PyJWK = active.signing_key
+        self.jwks = json.dumps(
+            {"keys": [key.public_jwk for key in keys if key.public_jwk is not None]},
+            separators=(",", ":"),
+        ).encode()
+        self.jwks_etag = make_etag(self.jwks)
+        # Key of each encoded token header seen, so headers are only parsed once
+        self.headers: dict[str, SigningKey] = {}
+
+    @classmethod
+    def from_secret(
+        cls, secret: str, algorithm: str, kid: str = DEFAULT_KEY_ID
+    ) -> "KeyRing":
+        """Returns a ring of a single HMAC key.
+
+        Args:
+            secret (str): The HMAC secret.
+            algorithm (str): The HMAC algorithm, e.g. `HS256`.
+            kid (str): The key ID.
+
+        Returns:
+            KeyRing: The ring.
+        """
+        return cls([load_key(kid, algorithm, secret)], kid)
+
+    def get(self, kid: str | None) -> SigningKey:
+        """Returns the key verifying a token.
+
+        Args:
+            kid (str | None): The token's `kid` header, None when it has none.
+
+        Returns:
+            SigningKey: The key with the ID.
+
+        Raises:
+            jwt.InvalidTokenError: If the ring has no key with the ID.
+        """
+        key = self.keys.get(DEFAULT_KEY_ID if kid is None else kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown key ID: {kid!r}")
+        return key
+
+    def get_for_token(self, token: str) -> SigningKey:
+        """Returns the key verifying a token, named by its `kid` header.
+
+        The header is only parsed the first time it is seen, since every token signed
+        by a key has the same encoded header.
+
+        Args:
+            token (str): The JWT token string.
+
+        Returns:
+            SigningKey: The key with the token's key ID.
+
+        Raises:
+            jwt.InvalidTokenError: If the token is malformed or the ring has no key
+                                   with its key ID.
+        """
+        header = token.partition(".")[0]
+        key = self.headers.get(header)
+        if key is None:
+            key = self.get(jwt.get_unverified_header(token).get("kid"))
+            if len(self.headers) < MAX_HEADERS:
+                self.headers[header] = key
+        return key
+
+
+def load_key_ring(path: str) -> KeyRing:
+    """Loads a key ring from a key file.
+
+    Args:
+        path (str): The path of the JSON key file.
+
+    Returns:
+        KeyRing: The ring.
+
+    Raises:
+        OSError: If a file cannot be read.
+        ValueError: If the file is not a valid key file.
+    """
+    with open(path, encoding="utf-8") as file:
+        document = json.load(file)
+    directory = os.path.dirname(path)
+    keys = []
+    try:
+        for entry in document["keys"]:
+            if "key_file" in entry:
+                key_path = os.path.join(directory, entry["key_file"])
+                with open(key_path, "rb") as key_file:
+                    material: str | bytes = key_file.read()
+            else:
+                material = entry["key"]
+            keys.append(load_key(entry["kid"], entry["alg"], material))
+        return KeyRing(keys, document["active"])
+    except KeyError as error:
+        raise ValueError(f"Invalid key file {path}: missing {error}") from error
+    except TypeError as error:
+        raise ValueError(f"Invalid key file {path}: {error}") from error
+
+
+class KeyRingFile:
+    """
+    A key file, reloaded on a background thread when it changes.
+    """
+
+    def __init__(self, path: str, reload_interval: float):
+        """
+        Initialise the key file.
+
+        Args:
+            path (str): The path of the JSON key file.
+            reload_interval (float): The time between checks for changes in seconds,
+                                     0 to never reload the file.
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self.mtime = 0.0
+        self.stopping = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def load(self) -> KeyRing:
+        """Loads the key ring and remembers the file's modification time.
+
+        Returns:
+            KeyRing: The ring.
+
+        Raises:
+            OSError: If a file cannot be read.
+            ValueError: If the file is not a valid key file.
+        """
+        mtime = os.stat(self.path).st_mtime
+        ring = load_key_ring(self.path)
+        self.mtime = mtime
+        return ring
+
+    def changed(self) -> bool:
+        """Returns whether the file changed since it was loaded.
+
+        Returns:
+            bool: True if the file should be reloaded.
+        """
+        try:
+            return os.stat(self.path).st_mtime != self.mtime
+        except OSError:
+            return False
+
+    def reload(self, on_reload: Callable[[KeyRing], None]) -> None:
+        """Loads the ring if the file changed. A file that fails to load is logged and
+        the previous ring kept.
+
+        Args:
+            on_reload (Callable[[KeyRing], None]): Called with the reloaded ring.
+        """
+        if not self.changed():
+            return
+        try:
+            ring = self.load()
+        except (OSError, ValueError) as error:
+            logger.error("Failed to reload the signing keys: %s", error)
+            return
+        on_reload(ring)
+        logger.info("Reloaded the signing keys, active key %r", ring.active.kid)
+
+    def start(self, on_reload: Callable[[KeyRing], None]) -> None:
+        """Starts checking the file for changes on a background thread, unless
+        reloading is disabled.
+
+        Args:
+            on_reload (Callable[[KeyRing], None]): Called with each reloaded ring.
+        """
+        if self.reload_interval <= 0 or self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(
+            target=self.run, args=(on_reload,), name="key-ring-reload", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stops the background thread, if running."""
+        thread, self.thread = self.thread, None
+        if thread is not None:
+            self.stopping.set()
+            thread.join()
+
+    def run(self, on_reload: Callable[[KeyRing], None]) -> None:
+        """Checks the file once per reload interval until stopped.
+
+        Args:
+            on_reload (Callable[[KeyRing], None]): Called with each reloaded ring.
+        """
+        while not self.stopping.wait(self.reload_interval):
+            self.reload(on_reload)
@@ -0,0 +1,119 @@
+"""
+Logging filters that limit the volume of hot-path log statements.
+
+During an error storm or a credential-stuffing attack the same few log statements
+fire for every request. These filters are attached to individual loggers by
+`setup_logger`, as configured in `settings.log_filters`, and drop records before any
+handler formats them:
+- `SamplingFilter` keeps a random fraction of records.
+- `RateLimitFilter` caps each message template with a token bucket and reports how
+  many records were suppressed on the next record that gets through.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+from src.utils.ttl_cache import TTLCache
+
+
+class SamplingFilter(logging.Filter):
+    """Logging filter that keeps each record with a fixed probability."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, rate: float, rng: Callable[[], float] = random.random):
+        """
+        Initialise the filter.
+
+        Args:
+            rate (float): The fraction of records to keep, between 0 and 1.
+            rng (Callable[[], float]): Returns a random number in [0, 1).
+        """
+        super().__init__()
+        self.rate = rate
+        self.rng = rng
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decides whether to keep the record.
+
+        Args:
+            record (logging.LogRecord): The log record.
+
+        Returns:
+            bool: True if the record is sampled.
+        """
+        return self.rate >= 1 or self.rng() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
+    """Logging filter that caps the rate of each message template.
+
+    Every distinct level and message template (the unformatted `msg`) gets a token
+    bucket holding up to `burst` tokens that refills at `rate` tokens per second.
+    Records are dropped while their bucket is empty. The next record with the same
+    template that is let through has "(N similar messages suppressed)" appended.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_templates: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialise the filter.
+
+        Args:
+            rate (float): Records per second allowed for each message template.
+            burst (int): Records allowed in a burst before the rate applies.
+            max_templates (int): The number of templates to track. The least recently
+                                 logged template is forgotten beyond that.
+            clock (Callable[[], float]): The time source used to refill buckets.
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.suppressed = 0
+        # Bucket state per template: [tokens, last refill time, suppressed count]
+        self._buckets: TTLCache[tuple[int, str], list[float]] = TTLCache(max_templates)
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decides whether to keep the record, taking a token from its bucket.
+
+        Args:
+            record (logging.LogRecord): The log record.
+
+        Returns:
+            bool: True if the template's bucket had a token.
+        """
+        key = (record.levelno, str(record.msg))
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now, 0]
+                self._buckets.set(key, bucket)
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                self.suppressed += 1
+                return False
+            bucket[0] = tokens - 1
+            suppressed, bucket[2] = int(bucket[2]), 0
+
+        if suppressed:
+            record.msg = (
+                f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            )
+            record.args = None
+        return True
@@ -1,10 +1,31 @@
 """
 Custom logger setup for the API.
+
+All loggers share a single handler. With `settings.log_queue_enabled`, that handler
+only puts records on a bounded queue and a background thread formats and writes
+them, so logging never does blocking I/O on the event loop. The background thread
+runs between `start_log_listener` and `stop_log_listener`, which the application
+lifespan calls. Outside of that window records are written synchronously.
+
+Loggers listed in `settings.log_filters` also get sampling and rate limit filters, see
+`src.core.log_filters`.
 """
 
+import copy
 import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Literal
 
 from src.core.context import trace_id_var
+from src.core.log_filters import RateLimitFilter, SamplingFilter
+from src.core.settings import LogFilterConfig, settings
+from src.utils.serialization import dumps
+
+_handler: logging.Handler | None = None
 
 
 class ColourFormatter(logging.Formatter):
@@ -34,7 +55,47 @@ class ColourFormatter(logging.Formatter):
         "%(levelname)s: \t  %(asctime)s %(name)s:%(lineno)d [%(trace_id)s] %(message)s"
     )
 
-    def format(self, record: logging.LogRecord) -> str:
+    def __init__(self) -> None:
+        """
+        Initialise the formatter.
+
+        The format string for each log level, with the level and trace ID colour codes
+        baked in, is built up front so formatting a record neither builds a formatter
+        nor modifies the record.
+        """
+        super().__init__(self.FORMAT_STR, defaults={"trace_id": "-"})
+        self._styles = {
+            level: self._build_style(colour)
+            for level, colour in self.LEVEL_COLOURS.items()
+        }
+        self._default_style = self._build_style(self.RESET)
+        self._time_cache: tuple[int, str] = (-1, "")
+
+    def _build_style(self, level_colour: str) -> logging.PercentStyle:
+        """Builds a format style with colour codes around the level and trace ID."""
+        log_format = self.FORMAT_STR.replace(
+            "%(levelname)s", f"{level_colour}%(levelname)s{self.RESET}"
+        ).replace("%(trace_id)s", f"{self.CYAN}%(trace_id)s{self.RESET}")
+        return logging.PercentStyle(log_format, defaults={"trace_id": "-"})
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        """Formats the record creation time, reusing the text within a second.
+
+        Args:
+            record (logging.LogRecord): The log record.
+            datefmt (str | None): Unused, the default time format is always used.
+
+        Returns:
+            str: The creation time, e.g. `2024-01-01 12:00:00,123`.
+        """
+        second = int(record.created)
+        cached_second, text = self._time_cache
+        if second != cached_second:
+            text = time.strftime(self.default_time_format, self.converter(second))
+            self._time_cache = (second, text)
+        return f"{text},{int(record.msecs):03d}"
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
         """Formats the log record with colour applied to the log level.
 
         Args:
@@ -43,19 +104,39 @@ class ColourFormatter(logging.Formatter):
         Returns:
             str: The formatted log message with the coloured log level.
         """
-        log_level = record.levelno
-        log_format = self.FORMAT_STR
-        level_colour = self.LEVEL_COLOURS.get(log_level, self.RESET)
-
-        # Format colour sections
-        record.levelname = f"{level_colour}{record.levelname}{self.RESET}"
-        record.trace_id = (
-            f"{self.CYAN}{record.trace_id}{self.RESET}"  #  type: ignore[attr-defined]
-        )
+        return self._styles.get(record.levelno, self._default_style).format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Logging formatter that writes each record as a single line of JSON.
+
+    Every line has the `timestamp` (ISO 8601, UTC), `level`, `logger`, `trace_id` and
+    `message` keys, plus `exception` when the record carries exception information.
+    """
 
-        # Apply the default formatter with the updated levelname
-        formatter = logging.Formatter(log_format)
-        return formatter.format(record)
+    def format(self, record: logging.LogRecord) -> str:
+        """Formats the log record as a JSON object.
+
+        Args:
+            record (logging.LogRecord): The log record to be formatted.
+
+        Returns:
+            str: The JSON encoded log record.
+        """
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return dumps(entry).decode("utf-8")
 
 
 class TraceIDFilter(logging.Filter):
@@ -78,6 +159,185 @@ class TraceIDFilter(logging.Filter):
         return True
 
 
+class _Listener(QueueListener):
+    """Queue listener that waits for space in a full queue to stop."""
+
+    def enqueue_sentinel(self) -> None:
+        """Blocks until the stop sentinel fits in the queue."""
+        self.queue.put(self._sentinel)  # type: ignore[attr-defined]
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Logging handler that hands records to a background thread via a bounded queue.
+
+    When the queue is full, records are either dropped and counted (`"drop"`) or the
+    logging call waits for space (`"block"`). While no listener is running, records
+    are passed straight to the target handler.
+    """
+
+    def __init__(
+        self,
+        target: logging.Handler,
+        max_size: int,
+        policy: Literal["drop", "block"] = "block",
+    ):
+        """
+        Initialise the handler. The listener thread is started by `start`.
+
+        Args:
+            target (logging.Handler): The handler that formats and writes records.
+            max_size (int): The maximum number of records waiting to be written.
+            policy (Literal["drop", "block"]): What to do when the queue is full.
+        """
+        self.records: queue.Queue[logging.LogRecord] = queue.Queue(max_size)
+        super().__init__(self.records)
+        self.target = target
+        self.policy = policy
+        self.dropped = 0
+        self._listener: QueueListener | None = None
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Copies the record and merges its arguments into the message.
+
+        Formatting, including any traceback, is left to the listener thread. The
+        original record is not changed, so other handlers still see the template.
+
+        Args:
+            record (logging.LogRecord): The record being logged.
+
+        Returns:
+            logging.LogRecord: The record to enqueue.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Puts a record on the queue, applying the full queue policy.
+
+        Args:
+            record (logging.LogRecord): The prepared record.
+        """
+        if self._listener is None:
+            self.target.handle(record)
+        elif self.policy == "block":
+            self.records.put(record)
+        else:
+            try:
+                self.records.put_nowait(record)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+
+    def start(self) -> None:
+        """Starts the background thread writing queued records."""
+        with self._lock:
+            if self._listener is None:
+                self._listener = _Listener(
+                    self.records, self.target, respect_handler_level=True
+                )
+                self._listener.start()
+
+    def stop(self) -> None:
+        """Writes all queued records and stops the background thread."""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+        # Records enqueued while the listener was stopping
+        while True:
+            try:
+                self.target.handle(self.records.get_nowait())
+            except queue.Empty:
+                break
+
+    def stats(self) -> dict[str, int]:
+        """Returns the queue metrics.
+
+        Returns:
+            dict[str, int]: The number of queued and dropped records.
+        """
+        return {"queued": self.records.qsize(), "dropped": self.dropped}
+
+
+def get_log_handler() -> logging.Handler:
+    """Returns the handler shared by all loggers, creating it on first use.
+
+    Returns:
+        logging.Handler: A `BoundedQueueHandler` writing to stderr when
+                         `settings.log_queue_enabled`, otherwise a `StreamHandler`.
+                         Records are formatted as selected by `settings.log_format`.
+    """
+    global _handler  # pylint: disable=global-statement
+    if _handler is None:
+        handler: logging.Handler = logging.StreamHandler()
+        handler.setFormatter(
+            JsonFormatter() if settings.log_format == "json" else ColourFormatter()
+        )
+        if settings.log_queue_enabled:
+            handler = BoundedQueueHandler(
+                handler,
+                max_size=settings.log_queue_size,
+                policy=settings.log_queue_policy,
+            )
+        handler.addFilter(TraceIDFilter())
+        _handler = handler
+    return _handler
+
+
+def start_log_listener() -> None:
+    """Starts writing log records on a background thread, if queueing is enabled."""
+    handler = get_log_handler()
+    if isinstance(handler, BoundedQueueHandler):
+        handler.start()
+
+
+def stop_log_listener() -> None:
+    """Flushes queued log records and stops the background thread, if running."""
+    handler = get_log_handler()
+    if isinstance(handler, BoundedQueueHandler):
+        handler.stop()
+
+
+def get_log_filter_config(name: str) -> LogFilterConfig | None:
+    """Returns the volume limits configured for a logger or its closest parent.
+
+    Args:
+        name (str): The logger name.
+
+    Returns:
+        LogFilterConfig | None: The entry in `settings.log_filters`, if any.
+    """
+    while True:
+        config = settings.log_filters.get(name)
+        if config is not None or not name:
+            return config
+        name = name.rpartition(".")[0]
+
+
+def add_log_filters(logger: logging.Logger) -> None:
+    """Attaches the sampling and rate limit filters configured for a logger.
+
+    Filters are only attached once, so this can be called repeatedly.
+
+    Args:
+        logger (logging.Logger): The logger to configure.
+    """
+    config = get_log_filter_config(logger.name)
+    if config is None or any(
+        isinstance(log_filter, (SamplingFilter, RateLimitFilter))
+        for log_filter in logger.filters
+    ):
+        return
+    if config.sample_rate < 1:
+        logger.addFilter(SamplingFilter(config.sample_rate))
+    if config.rate_limit is not None:
+        logger.addFilter(RateLimitFilter(config.rate_limit, config.burst))
+
+
 def setup_logger(name: str = __name__) -> logging.Logger:
     """Configure and return a logger with standard output and formatting.
 
@@ -93,16 +353,14 @@ def setup_logger(name: str = __name__) -> logging.Logger:
     Returns:
         logging.Logger: A configured logger instance.
     """
-
-    handler = logging.StreamHandler()
-    handler.setFormatter(ColourFormatter())
-    handler.addFilter(TraceIDFilter())
+    handler = get_log_handler()
 
     # Custom module logger
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
     if not logger.handlers:
         logger.addHandler(handler)
+    add_log_filters(logger)
 
     # Explicitly configure Uvicorn loggers
     for logger_name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
@@ -110,5 +368,6 @@ def setup_logger(name: str = __name__) -> logging.Logger:
         uvicorn_logger.setLevel(logging.INFO)
         uvicorn_logger.handlers = [handler]  # Replace default handler
         uvicorn_logger.propagate = False  # Avoid duplicate logs
+        add_log_filters(uvicorn_logger)
 
     return logger
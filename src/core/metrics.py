@@ -0,0 +1,642 @@
+"""
+Application metrics in the Prometheus text format.
+
+Metrics are counters, gauges and histograms with labels. Each labelled series is a
+few float slots in a flat buffer, so recording an observation is a lock and one or
+two in-place float additions, well under a microsecond. Hot paths should resolve
+their series once with `labels()` and keep the child.
+
+With `settings.metrics_dir` set, every process keeps its buffer in a memory-mapped
+file named after its PID in that directory, and `/metrics` sums the files of all
+processes, so counts cover every worker. Gauges only sum the files of live processes.
+A new process adopts the file of a dead one, keeping its counts and resetting its
+gauges, so recycled workers don't leave a growing number of files behind. The
+directory must only be accessible to the app's user, and only regular files of that
+user are adopted or read, never symbolic links. Otherwise the process keeps its
+metrics in memory.
+
+A file starts with a header (magic, capacity, number of slots used), followed by a
+key for each slot and then the slot values as native doubles. A slot key is the JSON
+of `[metric name, label values, sample]`, where the sample is "" for counters and
+gauges, or the bucket bound or "sum" for histograms.
+"""
+
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Sequence
+
+from src.core.logger import setup_logger
+from src.core.settings import settings
+from src.utils.private_files import (
+    ensure_private_directory,
+    is_private_file,
+    open_private_file,
+)
+
+logger = setup_logger(__name__)
+
+MAGIC = b"METRICS1"
+HEADER = struct.Struct("<8sII")
+# Magic, capacity and number of slots used
+HEADER_SIZE = 16
+KEY_SIZE = 248
+SLOT_SIZE = KEY_SIZE + 8
+FILE_SUFFIX = ".metrics"
+
+# Slot values, a memoryview cast to doubles. Typed loosely as typeshed only allows
+# int items
+Values = Any
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+
+def format_value(value: float) -> str:
+    """Formats a sample value or bucket bound as Prometheus expects it.
+
+    Args:
+        value (float): The value.
+
+    Returns:
+        str: The value, "+Inf" for infinity.
+    """
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    """Escapes a label value for the text exposition format.
+
+    Args:
+        value (str): The label value.
+
+    Returns:
+        str: The escaped value.
+    """
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def is_process_alive(pid: int) -> bool:
+    """Returns whether a process is running.
+
+    Args:
+        pid (int): The process ID.
+
+    Returns:
+        bool: True if a process with that ID exists.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_slots(data: bytes) -> dict[str, float]:
+    """Reads the slots of a metrics buffer.
+
+    Args:
+        data (bytes): The buffer contents.
+
+    Returns:
+        dict[str, float]: The value of each slot by key.
+    """
+    if len(data) < HEADER_SIZE:
+        return {}
+    magic, capacity, used = HEADER.unpack_from(data)
+    if magic != MAGIC or len(data) < HEADER_SIZE + capacity * SLOT_SIZE:
+        return {}
+    values_offset = HEADER_SIZE + capacity * KEY_SIZE
+    slots = {}
+    for index in range(min(used, capacity)):
+        key = data[
+            HEADER_SIZE + index * KEY_SIZE : HEADER_SIZE + (index + 1) * KEY_SIZE
+        ]
+        (value,) = struct.unpack_from("d", data, values_offset + index * 8)
+        slots[key.rstrip(b"\0").decode("utf-8")] = value
+    return slots
+
+
+def reset_metrics_directory(directory: str) -> None:
+    """Creates a metrics directory or removes the files of a previous run.
+
+    Args:
+        directory (str): The directory shared by the worker processes.
+
+    Raises:
+        PermissionError: If other users can access the directory.
+    """
+    ensure_private_directory(directory)
+    for name in os.listdir(directory):
+        if name.endswith(FILE_SUFFIX):
+            os.remove(os.path.join(directory, name))
+
+
+class MetricsRegistry:
+    """The metrics of a process and the buffer holding their values."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, directory: str | None = None, capacity: int = 4096):
+        """
+        Initialise an empty registry. The buffer is created on first use.
+
+        Args:
+            directory (str | None): Directory shared by all worker processes, or
+                                    None to keep the values in process memory.
+            capacity (int): The maximum number of slots. Series created beyond it
+                            are recorded but not exported.
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.metrics: dict[str, Metric] = {}
+        self._buffer: mmap.mmap | bytearray | None = None
+        self._values: Values | None = None
+        self._slots: dict[str, int] = {}
+        self._full = False
+
+    def register(self, metric: "Metric") -> None:
+        """Adds a metric to the registry.
+
+        Args:
+            metric (Metric): The metric.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered.
+        """
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def allocate(self, keys: Sequence[str]) -> tuple[Values, int]:
+        """Returns consecutive value slots for the keys, creating them if needed.
+
+        Must be called with `lock` held.
+
+        Args:
+            keys (Sequence[str]): The slot keys.
+
+        Returns:
+            tuple[Values, int]: The values and the index of the first slot.
+        """
+        if self._values is None:
+            self._open()
+        assert self._buffer is not None and self._values is not None
+        index = self._slots.get(keys[0])
+        if index is not None:
+            return self._values, index
+
+        encoded = [key.encode("utf-8") for key in keys]
+        used = len(self._slots)
+        if used + len(keys) > self.capacity or any(
+            len(key) > KEY_SIZE for key in encoded
+        ):
+            if not self._full:
+                logger.warning("Metrics buffer full, new series are not exported")
+                self._full = True
+            return memoryview(bytearray(8 * len(keys))).cast("d"), 0
+
+        for offset, key in enumerate(encoded):
+            start = HEADER_SIZE + (used + offset) * KEY_SIZE
+            self._buffer[start : start + KEY_SIZE] = key.ljust(KEY_SIZE, b"\0")
+            self._values[used + offset] = 0.0
+            self._slots[keys[offset]] = used + offset
+        # Publish the slots only once their keys and values are written
+        HEADER.pack_into(self._buffer, 0, MAGIC, self.capacity, used + len(keys))
+        return self._values, used
+
+    def _open(self) -> None:
+        """Creates the buffer, adopting the file of a dead process if there is one."""
+        size = HEADER_SIZE + self.capacity * SLOT_SIZE
+        buffer: mmap.mmap | bytearray
+        fd = None
+        if self.directory is not None:
+            try:
+                fd = open_private_file(self._claim_file(), os.O_RDWR | os.O_CREAT)
+            except OSError as error:
+                logger.error("Metrics kept in process memory: %s", error)
+                self.directory = None
+        if fd is None:
+            buffer = bytearray(size)
+            HEADER.pack_into(buffer, 0, MAGIC, self.capacity, 0)
+        else:
+            try:
+                if os.fstat(fd).st_size != size:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, size)
+                buffer = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+            slots = read_slots(bytes(buffer))
+            if HEADER.unpack_from(buffer)[:2] != (MAGIC, self.capacity):
+                buffer[:] = bytes(size)
+                HEADER.pack_into(buffer, 0, MAGIC, self.capacity, 0)
+                slots = {}
+            self._slots = {key: index for index, key in enumerate(slots)}
+
+        self._buffer = buffer
+        self._values = memoryview(buffer)[
+            HEADER_SIZE + self.capacity * KEY_SIZE :
+        ].cast("d")
+        # Gauges of an adopted file describe the dead process, not this one
+        for key, index in self._slots.items():
+            metric = self.metrics.get(json.loads(key)[0])
+            if metric is None or metric.kind == "gauge":
+                self._values[index] = 0.0
+
+    def _claim_file(self) -> str:
+        """Returns the path of this process' file, renaming a dead process' file.
+
+        Raises:
+            PermissionError: If other users can access the directory.
+        """
+        assert self.directory is not None
+        ensure_private_directory(self.directory)
+        path = os.path.join(self.directory, f"{os.getpid()}{FILE_SUFFIX}")
+        for name in os.listdir(self.directory):
+            pid = name.removesuffix(FILE_SUFFIX)
+            if name == pid or not pid.isdigit() or is_process_alive(int(pid)):
+                continue
+            dead_path = os.path.join(self.directory, name)
+            if not is_private_file(dead_path):
+                continue
+            try:
+                os.rename(dead_path, path)
+            except FileNotFoundError:
+                continue  # Adopted by another process
+            return path
+        return path
+
+    def collect(self) -> dict[str, float]:
+        """Returns the value of every slot, summed over all processes.
+
+        Returns:
+            dict[str, float]: The values by slot key.
+        """
+        if self.directory is None:
+            with self.lock:
+                return read_slots(bytes(self._buffer)) if self._buffer else {}
+
+        totals: dict[str, float] = {}
+        for name in os.listdir(self.directory):
+            pid = name.removesuffix(FILE_SUFFIX)
+            if name == pid or not pid.isdigit():
+                continue
+            try:
+                fd = open_private_file(os.path.join(self.directory, name), os.O_RDONLY)
+                with os.fdopen(fd, "rb") as file:
+                    slots = read_slots(file.read())
+            except FileNotFoundError:
+                continue  # Renamed by a process adopting it
+            except OSError:
+                continue  # Not a file of ours, e.g. a symbolic link
+            alive = is_process_alive(int(pid))
+            for key, value in slots.items():
+                if alive or self._kind(key) != "gauge":
+                    totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def _kind(self, key: str) -> str:
+        """Returns the type of the metric a slot belongs to."""
+        metric = self.metrics.get(json.loads(key)[0])
+        return metric.kind if metric is not None else ""
+
+    def render(self) -> bytes:
+        """Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            bytes: The exposition, version 0.0.4.
+        """
+        samples: dict[str, list[tuple[tuple[str, ...], str, float]]] = {}
+        for key, value in self.collect().items():
+            name, label_values, sample = json.loads(key)
+            samples.setdefault(name, []).append((tuple(label_values), sample, value))
+
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(sorted(samples.get(metric.name, ()))))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class Metric:
+    """A named metric with labelled series."""
+
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: MetricsRegistry | None = None,
+    ):
+        """
+        Initialise and register the metric.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text.
+            labelnames (Sequence[str]): The names of the labels.
+            registry (MetricsRegistry | None): The registry to add the metric to.
+                                               Defaults to the application registry.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry if registry is not None else REGISTRY
+        self._children: dict[tuple[str, ...], Any] = {}
+        self.registry.register(self)
+
+    def slot_keys(self, label_values: tuple[str, ...]) -> list[str]:
+        """Returns the slot keys of a series."""
+        return [json.dumps([self.name, label_values, ""])]
+
+    def _allocate(self, label_values: tuple[str, ...]) -> tuple[Values, int]:
+        """Allocates the slots of a series."""
+        if len(label_values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        with self.registry.lock:
+            return self.registry.allocate(self.slot_keys(label_values))
+
+    def label_pairs(self, label_values: Sequence[str], extra: str = "") -> str:
+        """Renders the labels of a sample, e.g. `{method="GET"}`."""
+        pairs = [
+            f'{name}="{escape_label(value)}"'
+            for name, value in zip(self.labelnames, label_values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self, samples: list[tuple[tuple[str, ...], str, float]]) -> list[str]:
+        """Renders the samples of the metric.
+
+        Args:
+            samples (list[tuple[tuple[str, ...], str, float]]): The label values,
+                sample name and value of each slot, sorted.
+
+        Returns:
+            list[str]: The exposition lines.
+        """
+        return [
+            f"{self.name}{self.label_pairs(labels)} {format_value(value)}"
+            for labels, _, value in samples
+        ]
+
+
+class CounterChild:
+    """A counter series."""
+
+    __slots__ = ("_values", "_index", "_lock")
+
+    def __init__(self, values: Values, index: int, lock: threading.Lock):
+        self._values = values
+        self._index = index
+        self._lock = lock
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increments the counter.
+
+        Args:
+            amount (float): The non-negative amount to add.
+        """
+        with self._lock:
+            self._values[self._index] += amount
+
+    def get(self) -> float:
+        """Returns the value recorded by this process."""
+        return float(self._values[self._index])
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def labels(self, *label_values: str) -> CounterChild:
+        """Returns the series for the label values.
+
+        Args:
+            *label_values (str): One value per label name.
+
+        Returns:
+            CounterChild: The series.
+        """
+        child = self._children.get(label_values)
+        if child is None:
+            values, index = self._allocate(label_values)
+            child = self._children[label_values] = CounterChild(
+                values, index, self.registry.lock
+            )
+        return child
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increments the counter of a metric without labels."""
+        self.labels().inc(amount)
+
+
+class GaugeChild(CounterChild):
+    """A gauge series."""
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrements the gauge.
+
+        Args:
+            amount (float): The amount to subtract.
+        """
+        with self._lock:
+            self._values[self._index] -= amount
+
+    def set(self, value: float) -> None:
+        """Sets the gauge.
+
+        Args:
+            value (float): The new value.
+        """
+        self._values[self._index] = value
+
+
+class Gauge(Metric):
+    """A value that goes up and down, summed over the live processes."""
+
+    kind = "gauge"
+
+    def labels(self, *label_values: str) -> GaugeChild:
+        """Returns the series for the label values.
+
+        Args:
+            *label_values (str): One value per label name.
+
+        Returns:
+            GaugeChild: The series.
+        """
+        child = self._children.get(label_values)
+        if child is None:
+            values, index = self._allocate(label_values)
+            child = self._children[label_values] = GaugeChild(
+                values, index, self.registry.lock
+            )
+        return child
+
+
+class HistogramChild:
+    """A histogram series: one count per bucket, then the sum of observations."""
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ("_values", "_index", "_lock", "_bounds", "_sum")
+
+    def __init__(
+        self,
+        values: Values,
+        index: int,
+        lock: threading.Lock,
+        bounds: tuple[float, ...],
+    ):
+        self._values = values
+        self._index = index
+        self._lock = lock
+        self._bounds = bounds
+        self._sum = index + len(bounds)
+
+    def observe(self, value: float) -> None:
+        """Records an observation.
+
+        Args:
+            value (float): The observed value, e.g. a duration in seconds.
+        """
+        bucket = self._index + bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._values[bucket] += 1
+            self._values[self._sum] += value
+
+
+class Histogram(Metric):
+    """Observations counted in buckets, e.g. request durations."""
+
+    kind = "histogram"
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: MetricsRegistry | None = None,
+    ):
+        """
+        Initialise and register the histogram.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text.
+            labelnames (Sequence[str]): The names of the labels.
+            buckets (Sequence[float]): The upper bounds of the buckets. A `+Inf`
+                                       bucket is always added.
+            registry (MetricsRegistry | None): The registry to add the metric to.
+                                               Defaults to the application registry.
+        """
+        self.bounds = tuple(sorted(set(buckets) | {math.inf}))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def slot_keys(self, label_values: tuple[str, ...]) -> list[str]:
+        """Returns the slot keys of a series, the buckets then the sum."""
+        return [
+            json.dumps([self.name, label_values, sample])
+            for sample in [*map(format_value, self.bounds), "sum"]
+        ]
+
+    def labels(self, *label_values: str) -> HistogramChild:
+        """Returns the series for the label values.
+
+        Args:
+            *label_values (str): One value per label name.
+
+        Returns:
+            HistogramChild: The series.
+        """
+        child = self._children.get(label_values)
+        if child is None:
+            values, index = self._allocate(label_values)
+            child = self._children[label_values] = HistogramChild(
+                values, index, self.registry.lock, self.bounds
+            )
+        return child
+
+    def render(self, samples: list[tuple[tuple[str, ...], str, float]]) -> list[str]:
+        """Renders the cumulative buckets, sum and count of each series."""
+        series: dict[tuple[str, ...], dict[str, float]] = {}
+        for labels, sample, value in samples:
+            series.setdefault(labels, {})[sample] = value
+
+        lines = []
+        for labels, values in series.items():
+            count = 0.0
+            for bound in map(format_value, self.bounds):
+                count += values.get(bound, 0.0)
+                le = self.label_pairs(labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {format_value(count)}")
+            pairs = self.label_pairs(labels)
+            lines.append(f"{self.name}_sum{pairs} {format_value(values.get('sum', 0))}")
+            lines.append(f"{self.name}_count{pairs} {format_value(count)}")
+        return lines
+
+
+REGISTRY = MetricsRegistry(settings.metrics_dir, capacity=settings.metrics_max_series)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency in seconds by method and route template.",
+    ["method", "route"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served.",
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent in bcrypt in seconds, by operation (hash or verify).",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiter.",
+)
+AUTH_FAILURES = Counter(
+    "auth_failures_total",
+    "Failed authentications by reason.",
+    ["reason"],
+)
@@ -0,0 +1,222 @@
+"""
+Statistical sampling profiler for a single request.
+
+The request is a coroutine running on the event loop, interleaved with every other
+request. A background thread samples it at a fixed interval: while the coroutine is
+running, the sample is the event loop thread's stack from the coroutine's frame down,
+and while it is suspended, the chain of coroutines it is awaiting, ending in an
+`<await>` frame. Each sample is weighted by the time since the previous one, so the
+profile shows where the request's wall clock time went and other requests sharing
+the loop are left out. Work that a request hands off to a thread pool (e.g. sync
+route handlers) shows as awaiting the pool.
+
+The sampling thread needs the GIL, so while the event loop runs Python code samples
+are at least the interpreter's switch interval (5ms by default) apart. Weights use
+the actual time between samples, so totals stay correct.
+
+Profiles are exported as collapsed stacks (`root;caller;callee <microseconds>`, as
+read by `flamegraph.pl` and speedscope) or in speedscope's JSON format.
+"""
+
+import json
+import sys
+import threading
+import time
+from types import CodeType, CoroutineType, FrameType
+from typing import Any
+
+# A function in a profile: its qualified name, file and first line
+FrameKey = tuple[str, str, int]
+
+AWAIT_FRAME: FrameKey = ("<await>", "", 0)
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def frame_key(code: CodeType) -> FrameKey:
+    """Returns the profile key of the function running a code object.
+
+    Args:
+        code (CodeType): The code object of a frame.
+
+    Returns:
+        FrameKey: The function's qualified name, file and first line.
+    """
+    return (code.co_qualname, code.co_filename, code.co_firstlineno)
+
+
+def running_stack(leaf: FrameType, root: FrameType) -> list[FrameKey] | None:
+    """Returns the stack from `root` down to `leaf`.
+
+    Args:
+        leaf (FrameType): The innermost frame of a thread.
+        root (FrameType): The frame the stack starts from.
+
+    Returns:
+        list[FrameKey] | None: The stack from the outermost frame, or None when
+                               `root` is not on the stack.
+    """
+    stack = []
+    frame: FrameType | None = leaf
+    while frame is not None:
+        stack.append(frame_key(frame.f_code))
+        if frame is root:
+            stack.reverse()
+            return stack
+        frame = frame.f_back
+    return None
+
+
+def suspended_stack(coroutine: Any) -> list[FrameKey]:
+    """Returns the stack of a suspended coroutine, following what it awaits.
+
+    Args:
+        coroutine (Any): A coroutine object.
+
+    Returns:
+        list[FrameKey]: The stack from the coroutine down to the innermost awaited
+                        coroutine or generator, then `AWAIT_FRAME`.
+    """
+    stack = []
+    awaitable = coroutine
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(
+            awaitable, "gi_frame", None
+        )
+        if frame is None:
+            break
+        stack.append(frame_key(frame.f_code))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(
+            awaitable, "gi_yieldfrom", None
+        )
+    stack.append(AWAIT_FRAME)
+    return stack
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a coroutine from a background thread.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self, coroutine: CoroutineType[Any, Any, Any], interval: float = 0.001
+    ):
+        """
+        Initialise the profiler. `start` must be called from the thread running the
+        coroutine's event loop.
+
+        Args:
+            coroutine (CoroutineType): The coroutine to profile.
+            interval (float): The time between samples in seconds.
+        """
+        self.coroutine = coroutine
+        self.interval = interval
+        # Seconds spent in each distinct stack
+        self.samples: dict[tuple[FrameKey, ...], float] = {}
+        self.duration = 0.0
+        self._root = coroutine.cr_frame
+        self._thread_id = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Starts sampling the coroutine."""
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling and waits for the sampling thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        """Takes samples until stopped."""
+        start = last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            stack = self.sample()
+            if stack:
+                key = tuple(stack)
+                self.samples[key] = self.samples.get(key, 0.0) + now - last
+            last = now
+        self.duration = time.perf_counter() - start
+
+    def sample(self) -> list[FrameKey] | None:
+        """Returns the current stack of the coroutine.
+
+        Returns:
+            list[FrameKey] | None: The stack from the coroutine's frame, or None when
+                                   it has finished or moved between the reads.
+        """
+        if self.coroutine.cr_frame is None:
+            return None
+        if not self.coroutine.cr_running:
+            return suspended_stack(self.coroutine)
+        # pylint: disable=protected-access
+        leaf = sys._current_frames().get(self._thread_id)
+        if leaf is None:
+            return None
+        return running_stack(leaf, self._root)
+
+    def collapsed(self) -> str:
+        """Returns the profile as collapsed stacks.
+
+        Returns:
+            str: One `frame;frame;frame <microseconds>` line per distinct stack.
+        """
+        lines = []
+        for stack, seconds in self.samples.items():
+            names = ";".join(
+                f"{name} ({filename}:{line})" if filename else name
+                for name, filename, line in stack
+            )
+            lines.append(f"{names} {round(seconds * 1_000_000)}\n")
+        return "".join(lines)
+
+    def speedscope(self, name: str) -> str:
+        """Returns the profile in speedscope's sampled profile format.
+
+        Args:
+            name (str): The name of the profile.
+
+        Returns:
+            str: The profile as JSON.
+        """
+        indexes: dict[FrameKey, int] = {}
+        samples = []
+        weights = []
+        for stack, seconds in self.samples.items():
+            samples.append([indexes.setdefault(key, len(indexes)) for key in stack])
+            weights.append(seconds * 1000)
+        frames = [
+            (
+                {"name": function, "file": filename, "line": line}
+                if filename
+                else {"name": function}
+            )
+            for function, filename, line in indexes
+        ]
+        return json.dumps(
+            {
+                "$schema": SPEEDSCOPE_SCHEMA,
+                "name": name,
+                "exporter": "fastapi-boilerplate",
+                "shared": {"frames": frames},
+                "profiles": [
+                    {
+                        "type": "sampled",
+                        "name": name,
+                        "unit": "milliseconds",
+                        "startValue": 0,
+                        "endValue": sum(weights),
+                        "samples": samples,
+                        "weights": weights,
+                    }
+                ],
+            }
+        )
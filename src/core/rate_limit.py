@@ -0,0 +1,275 @@
+"""
+Rate limiting with the generic cell rate algorithm (GCRA).
+
+GCRA tracks a single float per key, the theoretical arrival time (TAT) of the next
+request, and enforces `amount` requests per `period` with bursts of up to `amount`
+requests. A request at time `now` is allowed when
+`max(TAT, now) + interval - now <= period`, where `interval = period / amount`, and
+then moves the TAT forward by one interval. The comparison allows `EPSILON` of float
+rounding, or the last request of a burst would be rejected when `period` does not
+divide evenly by `amount`. Keys whose TAT is in the past carry no
+state and can be dropped.
+
+Limits use the same syntax as the `limits` package used by slowapi, e.g.
+`"100/minute"`, `"100 per minute"` or `"10/5 seconds"`.
+"""
+
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+from src.core.logger import setup_logger
+from src.core.rate_limit_storage import EPSILON, RateLimitStorage, RateLimitStorageError
+from src.core.redis_rate_limit import RedisRateLimitStorage
+from src.core.settings import settings
+from src.exceptions.service_unavailable import ServiceUnavailableError
+
+logger = setup_logger(__name__)
+
+# Lengths of each granularity in seconds, as defined by the `limits` package
+GRANULARITIES = {
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 60 * 60 * 24,
+    "month": 60 * 60 * 24 * 30,
+    "year": 60 * 60 * 24 * 30 * 12,
+}
+
+RATE_LIMIT_PATTERN = re.compile(
+    r"^\s*(?P<amount>\d+)\s*(?:/|\s+per\s+)\s*(?P<multiples>\d+)?\s*"
+    r"(?P<granularity>second|minute|hour|day|month|year)s?\s*$",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A limit of `amount` requests every `multiples` `granularity` periods."""
+
+    amount: int
+    multiples: int
+    granularity: str
+
+    @property
+    def period(self) -> float:
+        """The length of the limit window in seconds."""
+        return float(self.multiples * GRANULARITIES[self.granularity])
+
+    def __str__(self) -> str:
+        """Returns the limit in the format used by slowapi, e.g. `100 per 1 minute`."""
+        return f"{self.amount} per {self.multiples} {self.granularity}"
+
+
+def parse_rate_limit(value: str) -> RateLimit:
+    """
+    Parses a rate limit string such as `"100/minute"` or `"10 per 5 seconds"`.
+
+    Args:
+        value (str): The rate limit string.
+
+    Returns:
+        RateLimit: The parsed limit.
+
+    Raises:
+        ValueError: If the string is not a single valid rate limit.
+    """
+    match = RATE_LIMIT_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    return RateLimit(
+        amount=int(match["amount"]),
+        multiples=int(match["multiples"] or 1),
+        granularity=match["granularity"].lower(),
+    )
+
+
+class RateLimitResult(NamedTuple):
+    """The outcome of a rate limit check.
+
+    Attributes:
+        allowed (bool): Whether the request is allowed.
+        limit (int): The number of requests allowed per period.
+        remaining (int): The number of requests left in the current burst.
+        reset_after (float): Seconds until the full quota is available again.
+        retry_after (float): Seconds until the next request would be allowed, 0 when
+                             the request is allowed.
+    """
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+
+class MemoryRateLimitStorage:
+    """Process-local GCRA storage holding one float per key in a dict.
+
+    Idle keys, whose TAT has passed, are swept at most every `sweep_interval`
+    seconds from within `update`, so memory is bounded by the keys active within
+    roughly one period plus one sweep interval.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0):
+        """
+        Initialise empty storage.
+
+        Args:
+            sweep_interval (float): Minimum seconds between sweeps of idle keys.
+        """
+        self.sweep_interval = sweep_interval
+        self._tats: dict[str, float] = {}
+        self._next_sweep = 0.0
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    async def update(
+        self, key: str, now: float, interval: float, period: float
+    ) -> tuple[bool, float]:
+        """Applies one request to a key, see `RateLimitStorage.update`."""
+        if now >= self._next_sweep:
+            self.sweep(now)
+        tats = self._tats
+        tat = max(tats.get(key, now), now)
+        new_tat = tat + interval
+        if new_tat - now > period + EPSILON:
+            return False, tat
+        tats[key] = new_tat
+        return True, new_tat
+
+    def sweep(self, now: float) -> int:
+        """Removes keys whose TAT has passed.
+
+        Args:
+            now (float): The current time in seconds.
+
+        Returns:
+            int: The number of keys removed.
+        """
+        self._next_sweep = now + self.sweep_interval
+        idle = [key for key, tat in self._tats.items() if tat <= now]
+        for key in idle:
+            del self._tats[key]
+        return len(idle)
+
+    async def close(self) -> None:
+        """Drops all keys."""
+        self._tats.clear()
+
+
+def create_rate_limit_storage() -> RateLimitStorage:
+    """
+    Creates the rate limit storage selected by `settings.rate_limit_storage`.
+
+    Returns:
+        RateLimitStorage: The configured storage.
+
+    Raises:
+        ValueError: If the shared storage is selected without a path.
+    """
+    if settings.rate_limit_storage == "shared":
+        if not settings.rate_limit_shared_path:
+            raise ValueError(
+                "RATE_LIMIT_SHARED_PATH must be set to use the shared rate limit "
+                "storage outside of `start`"
+            )
+        # Imported lazily as it relies on POSIX-only `fcntl`
+        # pylint: disable=import-outside-toplevel
+        from src.core.shared_rate_limit import SharedMemoryRateLimitStorage
+
+        return SharedMemoryRateLimitStorage(
+            settings.rate_limit_shared_path,
+            slots=settings.rate_limit_shared_slots,
+            lock_stripes=settings.rate_limit_shared_lock_stripes,
+        )
+    if settings.rate_limit_storage == "redis":
+        return RedisRateLimitStorage(
+            settings.rate_limit_redis_url,
+            pool_size=settings.rate_limit_redis_pool_size,
+            timeout=settings.rate_limit_redis_timeout_seconds,
+        )
+    return MemoryRateLimitStorage(
+        sweep_interval=settings.rate_limit_sweep_interval_seconds
+    )
+
+
+class RateLimiter:
+    """Applies a `RateLimit` per key using GCRA over a `RateLimitStorage`."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(
+        self,
+        limit: RateLimit,
+        storage: RateLimitStorage | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        fail_open: bool = True,
+    ):
+        """
+        Initialise the limiter.
+
+        Args:
+            limit (RateLimit): The limit to apply to every key.
+            storage (RateLimitStorage | None): Where the per-key state is kept.
+                                               Defaults to process memory.
+            clock (Callable[[], float]): The time source, in seconds.
+            fail_open (bool): Whether to allow requests when the storage is
+                              unreachable, rather than rejecting them.
+        """
+        self.limit = limit
+        self.storage = storage if storage is not None else MemoryRateLimitStorage()
+        self.clock = clock
+        self.fail_open = fail_open
+        self.period = limit.period
+        self.interval = self.period / limit.amount if limit.amount else math.inf
+        # Only changes are logged, not every request while the storage is down
+        self.storage_available = True
+
+    async def hit(self, key: str) -> RateLimitResult:
+        """Counts a request for a key and checks it against the limit.
+
+        Args:
+            key (str): The rate limit key, e.g. the client address.
+
+        Returns:
+            RateLimitResult: Whether the request is allowed and the quota state.
+
+        Raises:
+            ServiceUnavailableError: If the storage is unreachable and the limiter
+                                     fails closed.
+        """
+        amount = self.limit.amount
+        if not amount:
+            return RateLimitResult(False, 0, 0, self.period, self.period)
+
+        now = self.clock()
+        try:
+            allowed, tat = await self.storage.update(
+                key, now, self.interval, self.period
+            )
+        except RateLimitStorageError as exc:
+            if self.storage_available:
+                self.storage_available = False
+                logger.warning(
+                    "Rate limit storage unavailable, %s requests until it recovers: %s",
+                    "allowing" if self.fail_open else "rejecting",
+                    exc,
+                )
+            if not self.fail_open:
+                raise ServiceUnavailableError(
+                    "Rate limit storage is unavailable", retry_after=1
+                ) from exc
+            return RateLimitResult(True, amount, amount, 0.0, 0.0)
+        if not self.storage_available:
+            self.storage_available = True
+            logger.info("Rate limit storage recovered, applying limits again")
+        reset_after = max(tat - now, 0.0)
+        if allowed:
+            remaining = int((self.period - reset_after) / self.interval + EPSILON)
+            return RateLimitResult(True, amount, remaining, reset_after, 0.0)
+        retry_after = reset_after + self.interval - self.period
+        return RateLimitResult(False, amount, 0, reset_after, retry_after)
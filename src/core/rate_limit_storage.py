@@ -0,0 +1,43 @@
+"""
+The interface shared by the rate limiter and its storages.
+
+It has no dependencies on either, so the storages in their own modules and the
+limiter that creates them can all import it.
+"""
+
+from typing import Protocol
+
+# Absorbs float rounding in TATs, which grows with the clock's magnitude and the
+# number of intervals added to them: a microsecond covers bursts of thousands of
+# requests at the magnitudes `time.monotonic` returns
+EPSILON = 1e-6
+
+
+class RateLimitStorageError(Exception):
+    """Raised by a rate limit storage when its state cannot be reached."""
+
+
+class RateLimitStorage(Protocol):
+    """Interface for the per-key GCRA state."""
+
+    async def update(
+        self, key: str, now: float, interval: float, period: float
+    ) -> tuple[bool, float]:
+        """Atomically applies one request to a key.
+
+        Args:
+            key (str): The rate limit key.
+            now (float): The current time in seconds.
+            interval (float): Seconds each request adds to the key's TAT.
+            period (float): The maximum distance of the TAT from `now`.
+
+        Returns:
+            tuple[bool, float]: Whether the request is allowed and the key's TAT after
+                                the update.
+
+        Raises:
+            RateLimitStorageError: If the state cannot be reached.
+        """
+
+    async def close(self) -> None:
+        """Releases any resources held by the storage."""
@@ -0,0 +1,314 @@
+"""
+Rate limit storage in Redis, shared by every node of a deployment.
+
+Each check is a single `EVALSHA` of a Lua script that applies GCRA atomically on the
+server, using the server clock so nodes with skewed clocks agree. Keys expire once
+their quota has fully recovered, so Redis needs no sweeping.
+
+The client speaks the Redis protocol (RESP) directly over asyncio streams, so no
+Redis package is needed:
+- Checks issued in the same event loop iteration are micro-batched and written to
+  one pooled connection as a single pipeline, so a burst of N requests costs one
+  round trip instead of N.
+- Up to `pool_size` pipelines are in flight at once, each on its own connection.
+- After a connection failure or timeout the storage fails fast for
+  `reconnect_delay` seconds instead of waiting for the timeout on every request.
+  Failures are raised as `RateLimitStorageError` and the limiter then fails open or
+  closed as configured. Only the first failure and the recovery are logged.
+"""
+
+import asyncio
+import hashlib
+from typing import Any
+from urllib.parse import unquote, urlparse
+
+from src.core.logger import setup_logger
+from src.core.rate_limit_storage import RateLimitStorageError
+
+logger = setup_logger(__name__)
+
+# KEYS[1]: the rate limit key, ARGV[1]: the emission interval, ARGV[2]: the period.
+# Returns whether the request is allowed and the key's TAT relative to the server
+# clock. Floats are returned as strings as Lua numbers are truncated to integers.
+# TATs are whole microseconds since the epoch, which doubles hold exactly, so the
+# comparison has no rounding to reject the last request of a burst. The interval is
+# rounded down, to at most a microsecond less than the limit's.
+GCRA_SCRIPT = b"""
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000000 + tonumber(time[2])
+local interval = math.floor(tonumber(ARGV[1]) * 1000000)
+local period = math.floor(tonumber(ARGV[2]) * 1000000 + 0.5)
+local stored = redis.call('GET', KEYS[1])
+local tat = now
+if stored then
+    tat = math.max(tonumber(stored), now)
+end
+local new_tat = tat + interval
+if new_tat - now > period then
+    return {0, tostring((tat - now) / 1000000)}
+end
+redis.call('SET', KEYS[1], string.format('%.0f', new_tat), 'PX',
+    math.ceil((new_tat - now) / 1000))
+return {1, tostring((new_tat - now) / 1000000)}
+"""
+GCRA_SCRIPT_SHA = hashlib.sha1(GCRA_SCRIPT).hexdigest()
+
+
+class RedisError(Exception):
+    """An error reply from the Redis server."""
+
+
+def encode_command(*args: str | bytes | int | float) -> bytes:
+    """Encodes a command as a RESP array of bulk strings.
+
+    Args:
+        *args: The command name and its arguments.
+
+    Returns:
+        bytes: The encoded command.
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """Reads one RESP reply.
+
+    Error replies are returned, not raised, so one failed command in a pipeline
+    does not hide the replies that follow it.
+
+    Args:
+        reader (asyncio.StreamReader): The connection to read from.
+
+    Returns:
+        Any: The decoded reply, a `RedisError` for error replies.
+    """
+    # pylint: disable=too-many-return-statements
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        return RedisError(payload.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise ConnectionError(f"Invalid RESP reply: {line!r}")
+
+
+class RedisConnection:
+    """A single connection to a Redis server."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Initialise the connection from an open stream.
+
+        Args:
+            reader (asyncio.StreamReader): The stream to read replies from.
+            writer (asyncio.StreamWriter): The stream to write commands to.
+        """
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, url: str) -> "RedisConnection":
+        """Connects to a server, authenticating and selecting the database.
+
+        Args:
+            url (str): A `redis://[[user]:password@]host[:port][/db]` URL.
+
+        Returns:
+            RedisConnection: The open connection.
+
+        Raises:
+            RedisError: If authentication or database selection fails.
+        """
+        parsed = urlparse(url)
+        reader, writer = await asyncio.open_connection(
+            parsed.hostname or "localhost", parsed.port or 6379
+        )
+        connection = cls(reader, writer)
+        setup = []
+        if parsed.password:
+            auth = [unquote(parsed.password)]
+            if parsed.username:
+                auth.insert(0, unquote(parsed.username))
+            setup.append(encode_command("AUTH", *auth))
+        database = parsed.path.strip("/")
+        if database and database != "0":
+            setup.append(encode_command("SELECT", database))
+        for reply in await connection.execute(setup):
+            if isinstance(reply, RedisError):
+                connection.close()
+                raise reply
+        return connection
+
+    async def execute(self, commands: list[bytes]) -> list[Any]:
+        """Sends encoded commands as one pipeline and reads all their replies.
+
+        Args:
+            commands (list[bytes]): The encoded commands.
+
+        Returns:
+            list[Any]: One reply per command, in order.
+        """
+        if not commands:
+            return []
+        self.writer.write(b"".join(commands))
+        await self.writer.drain()
+        return [await read_reply(self.reader) for _ in commands]
+
+    def close(self) -> None:
+        """Closes the connection without waiting."""
+        self.writer.close()
+
+
+class RedisRateLimitStorage:
+    """GCRA storage in Redis with pooled, pipelined and micro-batched checks."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        url: str,
+        pool_size: int = 8,
+        timeout: float = 0.5,
+        max_batch: int = 128,
+        reconnect_delay: float = 1.0,
+        key_prefix: str = "rate-limit:",
+    ):
+        """
+        Initialise the storage. Connections are opened lazily.
+
+        Args:
+            url (str): The Redis server URL.
+            pool_size (int): The maximum number of connections.
+            timeout (float): Seconds allowed for a pipeline round trip, including
+                             connecting.
+            max_batch (int): The maximum number of checks in one pipeline.
+            reconnect_delay (float): Seconds to fail fast for after a failure.
+            key_prefix (str): Prefix added to every rate limit key.
+        """
+        self.url = url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self.reconnect_delay = reconnect_delay
+        self.key_prefix = key_prefix
+        self.batches = 0
+        self._idle: list[RedisConnection] = []
+        self._slots = asyncio.Semaphore(pool_size)
+        self._pending: list[tuple[bytes, asyncio.Future[Any]]] = []
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._down_until = 0.0
+        self._available = True
+
+    async def update(
+        self, key: str, now: float, interval: float, period: float
+    ) -> tuple[bool, float]:
+        """Applies one request to a key, see `RateLimitStorage.update`.
+
+        Raises:
+            RateLimitStorageError: If Redis cannot be reached.
+        """
+        redis_key = self.key_prefix + key
+        reply = await self._execute(
+            encode_command(
+                "EVALSHA", GCRA_SCRIPT_SHA, 1, redis_key, repr(interval), repr(period)
+            )
+        )
+        if isinstance(reply, RedisError) and str(reply).startswith("NOSCRIPT"):
+            # The script cache was flushed, EVAL loads it again
+            reply = await self._execute(
+                encode_command(
+                    "EVAL", GCRA_SCRIPT, 1, redis_key, repr(interval), repr(period)
+                )
+            )
+        if isinstance(reply, RedisError):
+            raise RateLimitStorageError(f"Redis rate limit script failed: {reply}")
+        try:
+            allowed, tat = reply
+            return bool(allowed), now + float(tat)
+        except (TypeError, ValueError) as exc:
+            raise RateLimitStorageError(
+                f"Invalid Redis rate limit script reply: {reply!r}"
+            ) from exc
+
+    async def _execute(self, command: bytes) -> Any:
+        """Queues a command for the next pipeline and waits for its reply."""
+        loop = asyncio.get_running_loop()
+        if loop.time() < self._down_until:
+            raise RateLimitStorageError("Redis is unavailable")
+        future: asyncio.Future[Any] = loop.create_future()
+        self._pending.append((command, future))
+        if len(self._pending) == 1:
+            # Let every check issued in this loop iteration join the batch
+            loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Sends the queued commands as pipelines of at most `max_batch` commands."""
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch):
+            task = asyncio.create_task(
+                self._send_batch(pending[start : start + self.max_batch])
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, batch: list[tuple[bytes, asyncio.Future[Any]]]) -> None:
+        """Runs one pipeline on a pooled connection and resolves its futures."""
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                async with asyncio.timeout(self.timeout):
+                    if connection is None:
+                        connection = await RedisConnection.open(self.url)
+                    replies = await connection.execute(
+                        [command for command, _ in batch]
+                    )
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                # Including malformed replies, the connection is then out of sync
+                # and every future of the batch must still be resolved
+                if connection is not None:
+                    connection.close()
+                self._down_until = asyncio.get_running_loop().time() + (
+                    self.reconnect_delay
+                )
+                if self._available:
+                    self._available = False
+                    logger.warning("Redis rate limit storage unavailable: %r", exc)
+                error = RateLimitStorageError(f"Redis is unavailable: {exc!r}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                return
+
+            self._idle.append(connection)
+            self.batches += 1
+            if not self._available:
+                self._available = True
+                logger.info("Redis rate limit storage recovered")
+            for (_, future), reply in zip(batch, replies):
+                if not future.done():
+                    future.set_result(reply)
+
+    async def close(self) -> None:
+        """Waits for in-flight pipelines and closes all connections."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        for connection in self._idle:
+            connection.close()
+        self._idle.clear()
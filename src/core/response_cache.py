@@ -0,0 +1,296 @@
+"""
+Conditional GET response cache for routes that opt in with `cache_response`.
+
+Responses are cached per process in an LRU keyed by the request path, query string
+and, unless the route opts out, the username of the authenticated user. A hit skips
+the whole route: request validation, the endpoint, the response envelope and
+serialization. Every cached response carries a strong `ETag` computed from its body,
+and a request whose `If-None-Match` header matches it is answered with a
+304 Not Modified and no body. Responses are marked `Cache-Control: private,
+no-cache`, so clients revalidate each time and shared caches do not store them.
+
+Only 200 responses to GET requests that do not set cookies are cached. Routes should
+only opt in when their response depends on nothing but the path, query string and
+user, and code changing what a cached route returns must call
+`invalidate_cached_responses`.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.settings import settings
+from src.utils.ttl_cache import TTLCache
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Request path, query string and username (None when not varying by user)
+CacheKey = tuple[str, bytes, str | None]
+
+ETAG_HEADER = b"etag"
+CACHE_CONTROL_HEADER = b"cache-control"
+CACHE_CONTROL = b"private, no-cache"
+# Headers replaced on cached responses
+REPLACED_HEADERS = frozenset([ETAG_HEADER, CACHE_CONTROL_HEADER])
+
+
+@dataclass(frozen=True)
+class ResponseCacheConfig:
+    """How a route's responses are cached.
+
+    Attributes:
+        ttl (float | None): The lifetime of a cached response in seconds, None for
+                            `settings.response_cache_ttl_seconds`.
+        vary_by_user (bool): Whether each user gets their own cached response.
+    """
+
+    ttl: float | None = None
+    vary_by_user: bool = True
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A rendered response, with its headers including the ETag."""
+
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    etag: bytes
+
+
+response_cache: TTLCache[CacheKey, CachedResponse] = TTLCache(
+    max_size=settings.response_cache_max_size,
+    ttl=settings.response_cache_ttl_seconds,
+)
+
+
+def cache_response(
+    ttl: float | None = None, vary_by_user: bool = True
+) -> Callable[[F], F]:
+    """Marks an endpoint so `StandardRoute` caches its GET responses.
+
+    The endpoint is returned unchanged, so the decorator must be applied below the
+    router's route decorator.
+
+    Args:
+        ttl (float | None): The lifetime of a cached response in seconds, None for
+                            `settings.response_cache_ttl_seconds`.
+        vary_by_user (bool): Whether each user gets their own cached response. Only
+                             disable for responses that are the same for every user.
+
+    Returns:
+        Callable[[F], F]: The decorator.
+    """
+
+    def decorator(endpoint: F) -> F:
+        setattr(
+            endpoint,
+            "response_cache",
+            ResponseCacheConfig(ttl=ttl, vary_by_user=vary_by_user),
+        )
+        return endpoint
+
+    return decorator
+
+
+def get_response_cache_config(
+    endpoint: Callable[..., Any],
+) -> ResponseCacheConfig | None:
+    """Returns the response cache configuration of an endpoint.
+
+    Args:
+        endpoint (Callable[..., Any]): The endpoint function.
+
+    Returns:
+        ResponseCacheConfig | None: The configuration set by `cache_response`, or None
+                                    when the endpoint's responses are not cached.
+    """
+    return getattr(endpoint, "response_cache", None)
+
+
+def invalidate_cached_responses(
+    path: str | None = None, username: str | None = None
+) -> int:
+    """Removes cached responses, e.g. after a change to the data they show.
+
+    Args:
+        path (str | None): Only remove responses to this request path.
+        username (str | None): Only remove responses cached for this user.
+
+    Returns:
+        int: The number of responses removed.
+    """
+    return response_cache.invalidate_matching(
+        lambda key: (path is None or key[0] == path)
+        and (username is None or key[2] == username)
+    )
+
+
+def make_etag(body: bytes) -> bytes:
+    """Returns a strong ETag for a response body.
+
+    Args:
+        body (bytes): The rendered response body.
+
+    Returns:
+        bytes: The quoted ETag.
+    """
+    return b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"'
+
+
+def etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    """Returns whether an `If-None-Match` header matches an ETag.
+
+    Uses the weak comparison required for `If-None-Match`, so `W/` prefixes are
+    ignored.
+
+    Args:
+        if_none_match (bytes): The header value, a list of ETags or `*`.
+        etag (bytes): The current ETag of the response.
+
+    Returns:
+        bool: True if the client's copy is current.
+    """
+    if if_none_match.strip() == b"*":
+        return True
+    return any(
+        candidate.strip().removeprefix(b"W/") == etag
+        for candidate in if_none_match.split(b",")
+    )
+
+
+def get_if_none_match(scope: Scope) -> bytes | None:
+    """Returns the `If-None-Match` header of a request.
+
+    Args:
+        scope (Scope): The ASGI connection scope.
+
+    Returns:
+        bytes | None: The header value, or None when absent.
+    """
+    for name, value in scope["headers"]:
+        if name == b"if-none-match":
+            return bytes(value)
+    return None
+
+
+class CachedEndpoint:
+    """
+    ASGI app serving a route from the response cache, wrapping the route's app.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: ResponseCacheConfig,
+        cache: TTLCache[CacheKey, CachedResponse] = response_cache,
+    ):
+        """
+        Initialise the endpoint.
+
+        Args:
+            app: The route's ASGI app.
+            config (ResponseCacheConfig): How the route's responses are cached.
+            cache (TTLCache): The cache to store responses in.
+        """
+        self.app = app
+        self.config = config
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serves the request from the cache, rendering and storing it on a miss.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        user = scope.get("state", {}).get("user") if self.config.vary_by_user else None
+        key = (scope["path"], scope["query_string"], getattr(user, "username", None))
+        response = self.cache.get(key)
+        if response is None:
+            response = await self.render(scope, receive, send, key)
+            if response is None:
+                return
+
+        if_none_match = get_if_none_match(scope)
+        if if_none_match is not None and etag_matches(if_none_match, response.etag):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [
+                        (ETAG_HEADER, response.etag),
+                        (CACHE_CONTROL_HEADER, CACHE_CONTROL),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": list(response.headers),
+            }
+        )
+        await send({"type": "http.response.body", "body": response.body})
+
+    async def render(
+        self, scope: Scope, receive: Receive, send: Send, key: CacheKey
+    ) -> CachedResponse | None:
+        """Runs the route and caches its response if it can be.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+            key (CacheKey): The cache key of the request.
+
+        Returns:
+            CachedResponse | None: The cached response, or None when the response
+                                   was not cacheable and has been sent as is.
+        """
+        starts: list[Message] = []
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                starts.append(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        if not starts:
+            return None
+        start = starts[0]
+
+        body = b"".join(chunks)
+        headers = start.get("headers", [])
+        if start["status"] != 200 or any(name == b"set-cookie" for name, _ in headers):
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return None
+
+        etag = make_etag(body)
+        response = CachedResponse(
+            headers=[
+                *(
+                    (name, value)
+                    for name, value in headers
+                    if name not in REPLACED_HEADERS
+                ),
+                (ETAG_HEADER, etag),
+                (CACHE_CONTROL_HEADER, CACHE_CONTROL),
+            ],
+            body=body,
+            etag=etag,
+        )
+        self.cache.set(key, response, ttl=self.config.ttl)
+        return response
@@ -0,0 +1,325 @@
+"""
+Denylist of revoked access tokens, by token ID (`jti` claim).
+
+Revoked token IDs are kept in a dict mapping each ID to its token's expiry, so the
+check on every request is a single lookup. Entries expire with their token, which
+is rejected by then anyway, and are dropped as later revocations are added.
+
+With a file, the denylist is persisted as an append-only log of fixed-size records,
+so it survives restarts and is shared by all workers on the host:
+
+    header (8 bytes): magic
+    records: [token ID (16 bytes), expiry (uint32, seconds since the epoch)] * n
+
+Token IDs are the 16 random bytes `new_token_id` encodes. Each revocation is appended
+under an exclusive `flock` on the file. A background thread started with `start` reads
+the records other workers appended once per sync interval, from the offset read up
+to, so checking a token never touches the file. When a worker loads a file in which
+most records have expired, it rewrites the file without them and replaces the old
+one. Other workers notice the new inode and reload.
+"""
+
+import base64
+import binascii
+import fcntl
+import heapq
+import math
+import os
+import secrets
+import struct
+import threading
+import time
+from typing import BinaryIO, Callable
+
+from src.core.logger import setup_logger
+from src.core.settings import settings
+
+logger = setup_logger(__name__)
+
+MAGIC = b"JTI00001"
+RECORD = struct.Struct("<16sI")
+TOKEN_ID_BYTES = 16
+# Files with at least this many records are compacted when most have expired
+COMPACT_MIN_RECORDS = 1024
+
+
+def new_token_id() -> str:
+    """Returns a new random token ID.
+
+    Returns:
+        str: 16 random bytes, base64url encoded without padding.
+    """
+    return secrets.token_urlsafe(TOKEN_ID_BYTES)
+
+
+def encode_token_id(token_id: str) -> bytes:
+    """Returns the raw bytes of a token ID.
+
+    Args:
+        token_id (str): A token ID made by `new_token_id`.
+
+    Returns:
+        bytes: The 16 bytes of the ID.
+
+    Raises:
+        ValueError: If the ID was not made by `new_token_id`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token_id + "==")
+    except (binascii.Error, ValueError) as error:
+        raise ValueError(f"Invalid token ID: {token_id!r}") from error
+    if len(raw) != TOKEN_ID_BYTES or decode_token_id(raw) != token_id:
+        raise ValueError(f"Invalid token ID: {token_id!r}")
+    return raw
+
+
+def decode_token_id(raw: bytes) -> str:
+    """Returns the token ID of its raw bytes.
+
+    Args:
+        raw (bytes): The 16 bytes of the ID.
+
+    Returns:
+        str: The base64url encoded ID.
+    """
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+class TokenDenylist:
+    """
+    Revoked token IDs, optionally persisted to a file shared between processes.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        path: str | None = None,
+        sync_interval: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialise the denylist. The file is read by `sync`, and by `start`.
+
+        Args:
+            path (str | None): The file the denylist is persisted to, None to keep it
+                               in memory.
+            sync_interval (float): The time between reads of revocations appended by
+                                   other processes by the sync thread, in seconds.
+            clock (Callable[[], float]): Returns the current time in seconds since
+                                         the epoch, as token expiries are.
+        """
+        self.path = path
+        self.sync_interval = sync_interval
+        self.clock = clock
+        # Expiry of each revoked token ID, and a heap of them to drop expired IDs
+        self.entries: dict[str, float] = {}
+        self.expiries: list[tuple[float, str]] = []
+        # The file's inode and the offset read up to, None until it is loaded
+        self.inode: int | None = None
+        self.offset = 0
+        # Serialises file access and updates between the sync thread and revocations
+        self.lock = threading.RLock()
+        self.stopping = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        """Returns the number of revoked token IDs, including expired ones."""
+        return len(self.entries)
+
+    def is_revoked(self, token_id: str) -> bool:
+        """Returns whether a token has been revoked, without reading the file.
+
+        Args:
+            token_id (str): The token's `jti` claim.
+
+        Returns:
+            bool: True if the token was revoked and has not expired.
+        """
+        expires_at = self.entries.get(token_id)
+        return expires_at is not None and expires_at > self.clock()
+
+    def revoke(self, token_id: str, expires_at: float) -> None:
+        """Revokes a token until it expires. Blocks on the file when persisted.
+
+        Args:
+            token_id (str): The token's `jti` claim, made by `new_token_id`.
+            expires_at (float): The token's `exp` claim, in seconds since the epoch.
+
+        Raises:
+            ValueError: If the token ID was not made by `new_token_id`.
+            OSError: If the revocation cannot be written to the file.
+        """
+        raw = encode_token_id(token_id)
+        with self.lock:
+            if (
+                expires_at <= self.clock()
+                or self.entries.get(token_id, 0) >= expires_at
+            ):
+                return
+            self.sync()
+            # Reading the file may have disabled persisting it
+            if self.path is not None:
+                self.append(RECORD.pack(raw, math.ceil(expires_at)))
+            self.add(token_id, expires_at)
+
+    def add(self, token_id: str, expires_at: float) -> None:
+        """Adds a token ID to the in-memory set, and drops the expired ones.
+
+        Args:
+            token_id (str): The token ID.
+            expires_at (float): The token's expiry, in seconds since the epoch.
+        """
+        now = self.clock()
+        while self.expiries and self.expiries[0][0] <= now:
+            expired_at, expired_id = heapq.heappop(self.expiries)
+            if self.entries.get(expired_id) == expired_at:
+                del self.entries[expired_id]
+        if expires_at > now and expires_at > self.entries.get(token_id, 0):
+            self.entries[token_id] = expires_at
+            heapq.heappush(self.expiries, (expires_at, token_id))
+
+    def start(self) -> None:
+        """Loads the file and starts reading it on a background thread, if persisted."""
+        if self.path is None or self.thread is not None:
+            return
+        self.sync()
+        self.stopping.clear()
+        self.thread = threading.Thread(
+            target=self.run, name="token-denylist-sync", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stops the background thread, if running."""
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+
+    def run(self) -> None:
+        """Reads the file once per sync interval until stopped."""
+        while not self.stopping.wait(self.sync_interval):
+            self.sync()
+
+    def sync(self) -> None:
+        """Reads the revocations appended to the file since it was last read."""
+        with self.lock:
+            if self.path is not None:
+                self.read_file(self.path)
+
+    def read_file(self, path: str) -> None:
+        """Loads the file, or reads the records appended to it since it was read.
+
+        Args:
+            path (str): The path of the file.
+        """
+        try:
+            with open(path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_ino != self.inode or stat.st_size < self.offset:
+                    self.load(file, stat.st_ino)
+                elif stat.st_size > self.offset:
+                    file.seek(self.offset)
+                    self.read_records(file)
+        except FileNotFoundError:
+            self.inode = None
+            self.offset = 0
+        except OSError as error:
+            logger.error("Failed to read revoked tokens from %s: %s", path, error)
+        except ValueError as error:
+            # Keep serving the revocations already loaded rather than failing requests
+            logger.error("Disabled persisting revoked tokens: %s", error)
+            self.path = None
+
+    def load(self, file: BinaryIO, inode: int) -> None:
+        """Replaces the in-memory set with the contents of the file.
+
+        Args:
+            file (BinaryIO): The file, open for reading.
+            inode (int): The file's inode.
+
+        Raises:
+            ValueError: If the file is not a denylist file.
+        """
+        magic = file.read(len(MAGIC))
+        if magic not in (MAGIC, b""):
+            raise ValueError(f"{self.path} is not a token denylist file")
+        # Loaded on the side and swapped in, so checks never see part of the file
+        loaded = TokenDenylist(clock=self.clock)
+        records = loaded.read_records(file)
+        self.entries, self.expiries = loaded.entries, loaded.expiries
+        # An empty file is loaded again once it has a header
+        self.inode = inode if magic else None
+        self.offset = len(magic) + loaded.offset
+        if records >= COMPACT_MIN_RECORDS and len(self.entries) * 2 < records:
+            self.compact()
+        logger.info("Loaded %d revoked token IDs from %s", len(self), self.path)
+
+    def read_records(self, file: BinaryIO) -> int:
+        """Adds the records from the current offset, up to the last whole record.
+
+        Args:
+            file (BinaryIO): The file, positioned at the offset.
+
+        Returns:
+            int: The number of records read.
+        """
+        data = file.read()
+        records = len(data) // RECORD.size
+        for raw, expires_at in RECORD.iter_unpack(data[: records * RECORD.size]):
+            self.add(decode_token_id(raw), expires_at)
+        self.offset += records * RECORD.size
+        return records
+
+    def append(self, record: bytes) -> None:
+        """Appends a record to the file, creating it if needed.
+
+        Args:
+            record (bytes): The packed record.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        assert self.path is not None
+        while True:
+            with open(self.path, "ab") as file:
+                fcntl.flock(file, fcntl.LOCK_EX)
+                # Retry if the file was replaced by a compaction while waiting
+                stat = os.fstat(file.fileno())
+                try:
+                    if os.stat(self.path).st_ino != stat.st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue
+                file.write(record if stat.st_size else MAGIC + record)
+                file.flush()
+                return
+
+    def compact(self) -> None:
+        """Rewrites the file with only the unexpired revocations."""
+        assert self.path is not None
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(self.path, "rb") as file:
+                fcntl.flock(file, fcntl.LOCK_EX)
+                # Revocations appended before the lock was taken
+                file.seek(self.offset)
+                self.read_records(file)
+                records = b"".join(
+                    RECORD.pack(encode_token_id(token_id), math.ceil(expires_at))
+                    for token_id, expires_at in self.entries.items()
+                )
+                with open(temporary, "wb") as new_file:
+                    new_file.write(MAGIC + records)
+                os.replace(temporary, self.path)
+                self.inode = os.stat(self.path).st_ino
+                self.offset = len(MAGIC) + len(records)
+        except OSError as error:
+            logger.error("Failed to compact %s: %s", self.path, error)
+
+
+# The denylist checked by the auth middleware
+token_denylist = TokenDenylist(
+    settings.revocation_file or None, sync_interval=settings.revocation_sync_seconds
+)
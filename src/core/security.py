@@ -1,18 +1,120 @@
 """
 Provides utility functions for password hashing and JWT token generation
 using PyJWT and bcrypt.
+
+Request handlers should use the async hashing functions, which run bcrypt on a
+dedicated bounded thread pool.
+
+Tokens are signed and verified with the keys of the key ring, see
+`src.core.key_ring`. Without `settings.signing_keys_file`, the ring holds a single
+key built from `settings.secret_key` and `settings.algorithm`.
 """
 
+import hashlib
+import time
+
 import bcrypt
 import jwt
 
+from src.core.context import timing_span
+from src.core.executor import BoundedExecutor
+from src.core.key_ring import KeyRing, KeyRingFile
+from src.core.logger import setup_logger
+from src.core.metrics import PASSWORD_HASH_DURATION
+from src.core.revocation import new_token_id, token_denylist
 from src.core.settings import settings
 from src.models import TokenData
+from src.utils.ttl_cache import TTLCache
+
+logger = setup_logger(__name__)
 
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
+# Dedicated pool for bcrypt, which releases the GIL while hashing
+hash_executor = BoundedExecutor(
+    name="password-hash",
+    max_workers=settings.hash_workers,
+    max_queue=settings.hash_queue_size,
+    retry_after=settings.hash_retry_after_seconds,
+)
+
+# Verified token payloads keyed by the SHA-256 digest of the token. Uses wall clock
+# time so entries can expire together with the token's `exp` claim.
+token_cache: TTLCache[bytes, TokenData] = TTLCache(
+    max_size=settings.token_cache_max_size,
+    ttl=settings.token_cache_ttl_seconds,
+    clock=time.time,
+)
+
+HASH_DURATION = PASSWORD_HASH_DURATION.labels("hash")
+VERIFY_DURATION = PASSWORD_HASH_DURATION.labels("verify")
+
+KEY_RING_FILE = (
+    KeyRingFile(settings.signing_keys_file, settings.signing_keys_reload_seconds)
+    if settings.signing_keys_file
+    else None
+)
+_key_ring: KeyRing | None = None
+
+
+def get_key_ring() -> KeyRing:
+    """
+    Returns the key ring, loading it on first use. Changes to the key file are picked
+    up on a background thread, see `start_key_ring_reload`.
+
+    Returns:
+        KeyRing: The keys tokens are signed and verified with.
+
+    Raises:
+        OSError: If the key file cannot be read on first use.
+        ValueError: If the key file is invalid on first use.
+    """
+    global _key_ring  # pylint: disable=global-statement
+    if _key_ring is None:
+        if KEY_RING_FILE is not None:
+            _key_ring = KEY_RING_FILE.load()
+        else:
+            _key_ring = KeyRing.from_secret(SECRET_KEY, ALGORITHM)
+    return _key_ring
+
+
+def set_key_ring(ring: KeyRing | None) -> None:
+    """
+    Replaces the key ring, e.g. after a key rotation or to use other keys in tests.
+    Cached token payloads are dropped when keys are removed, so tokens signed with
+    them are rejected.
+
+    Args:
+        ring (KeyRing | None): The ring to use. None resets it so the configured one
+                               is loaded on next use.
+    """
+    global _key_ring  # pylint: disable=global-statement
+    previous, _key_ring = _key_ring, ring
+    if previous is not None and (ring is None or previous.keys.keys() - ring.keys):
+        token_cache.clear()
+
+
+def start_key_ring_reload() -> None:
+    """
+    Loads the key ring and starts reloading the key file on a background thread when
+    it changes, so requests never read the file. Blocks while loading the ring.
+
+    Raises:
+        OSError: If the key file cannot be read.
+        ValueError: If the key file is invalid.
+    """
+    get_key_ring()
+    if KEY_RING_FILE is not None:
+        KEY_RING_FILE.start(set_key_ring)
+
+
+def stop_key_ring_reload() -> None:
+    """Stops reloading the key file."""
+    if KEY_RING_FILE is not None:
+        KEY_RING_FILE.stop()
+
 
 def get_password_hash(password: str) -> bytes:
     """
@@ -25,8 +127,10 @@ def get_password_hash(password: str) -> bytes:
         str: The hashed password.
     """
     pwd_bytes = password.encode("utf-8")
+    start = time.perf_counter()
     salt = bcrypt.gensalt()
     hashed_password = bcrypt.hashpw(password=pwd_bytes, salt=salt)
+    HASH_DURATION.observe(time.perf_counter() - start)
     return hashed_password  # type: ignore
 
 
@@ -43,14 +147,55 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     password_byte_enc = plain_password.encode("utf-8")
     hashed_password_byte_enc = hashed_password.encode("utf-8")
-    return bcrypt.checkpw(  # type: ignore
+    start = time.perf_counter()
+    matches = bcrypt.checkpw(
         password=password_byte_enc, hashed_password=hashed_password_byte_enc
     )
+    VERIFY_DURATION.observe(time.perf_counter() - start)
+    return matches
+
+
+async def get_password_hash_async(password: str) -> bytes:
+    """
+    Hashes a plain-text password on the password hashing pool.
+
+    Args:
+        password (str): The plain-text password.
+
+    Returns:
+        bytes: The hashed password.
+
+    Raises:
+        ServiceUnavailableError: If the hashing pool is saturated.
+    """
+    with timing_span("password_hash"):
+        return await hash_executor.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a plain-text password against a hashed password on the password
+    hashing pool.
+
+    Args:
+        plain_password (str): The plain password provided by the user.
+        hashed_password (str): The stored hashed password.
+
+    Returns:
+        bool: True if the password matches, False otherwise.
+
+    Raises:
+        ServiceUnavailableError: If the hashing pool is saturated.
+    """
+    with timing_span("password_hash"):
+        return await hash_executor.run(verify_password, plain_password, hashed_password)
 
 
 def create_access_token(data: TokenData) -> str:
     """
-    Creates a signed JWT access token with an expiration time.
+    Creates a JWT access token with an expiration time, signed with the active key
+    of the key ring and naming it in the `kid` header. Tokens get a new random token
+    ID (`jti`) unless the payload has one, so they can be revoked.
 
     Args:
         data (TokenData): The payload to encode into the token.
@@ -60,13 +205,50 @@ def create_access_token(data: TokenData) -> str:
              configured access token expiration (in minutes).
     """
     to_encode = data.model_dump()
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)  # type: ignore
+    to_encode["jti"] = data.jti or new_token_id()
+    ring = get_key_ring()
+    return jwt.encode(
+        to_encode,
+        ring.signing_key,
+        algorithm=ring.active.algorithm,
+        headers={"kid": ring.active.kid},
+    )
 
 
 def decode_token(token: str) -> TokenData:
     """
     Decodes and validates a JWT token, returning a TokenData instance.
 
+    When `settings.token_cache_enabled` is set, verified payloads are cached so
+    repeated tokens skip both signature verification and model validation. Cached
+    entries never outlive the token's `exp` claim.
+
+    Args:
+        token (str): The JWT token string.
+
+    Returns:
+        TokenData: The decoded token payload.
+
+    Raises:
+        jwt.PyJWTError: If the token is invalid or expired.
+    """
+    if not settings.token_cache_enabled:
+        return verify_token(token)
+
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = verify_token(token)
+        token_cache.set(key, payload, expires_at=payload.exp.timestamp())
+    return payload
+
+
+def verify_token(token: str) -> TokenData:
+    """
+    Verifies the signature and claims of a JWT token without using the cache, with
+    the key of the key ring named in the token's `kid` header. Only the algorithm of
+    that key is accepted.
+
     Args:
         token (str): The JWT token string.
 
@@ -76,5 +258,43 @@ def decode_token(token: str) -> TokenData:
     Raises:
         jwt.PyJWTError: If the token is invalid or expired.
     """
-    decoded_data = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    key = get_key_ring().get_for_token(token)
+    decoded_data = jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
     return TokenData(**decoded_data)
+
+
+def revoke_token(payload: TokenData) -> bool:
+    """
+    Revokes a verified token until it expires, so the auth middleware rejects it.
+    Blocks while the revocation is persisted, call it from a worker thread.
+
+    Args:
+        payload (TokenData): The decoded token payload.
+
+    Returns:
+        bool: True if the token was revoked, False if it has no token ID.
+
+    Raises:
+        OSError: If the revocation cannot be persisted.
+    """
+    if payload.jti is None:
+        return False
+    try:
+        token_denylist.revoke(payload.jti, payload.exp.timestamp())
+    except ValueError:
+        # Not an ID of ours, so the token was not issued by this service
+        return False
+    return True
+
+
+def is_token_revoked(payload: TokenData) -> bool:
+    """
+    Returns whether a verified token has been revoked.
+
+    Args:
+        payload (TokenData): The decoded token payload.
+
+    Returns:
+        bool: True if the token is on the denylist.
+    """
+    return payload.jti is not None and token_denylist.is_revoked(payload.jti)
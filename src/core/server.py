@@ -0,0 +1,455 @@
+"""
+Production server: a supervisor running the app in several Uvicorn worker processes.
+
+The supervisor starts `settings.server_workers` workers and keeps that many running:
+- A worker that starts shutting down, e.g. after serving
+  `settings.server_max_requests` requests to bound memory growth, or exits is
+  replaced. The replacement starts while the worker finishes its requests.
+- SIGHUP replaces the workers one at a time. Each replacement is started and serving
+  before the worker it replaces is asked to stop, so the restart drops no requests.
+- SIGINT and SIGTERM stop every worker gracefully, killing those still running after
+  `settings.server_graceful_timeout_seconds`.
+
+The supervisor never blocks on a worker: it polls them, so signals and exited workers
+are handled within a fraction of a second, also during a rolling restart.
+
+With `settings.server_reuse_port` each worker listens on its own socket with
+SO_REUSEPORT and the kernel spreads new connections evenly over the workers.
+Otherwise all workers share one socket. Either way the supervisor binds the sockets
+and keeps them open, and a replacement worker listens on the socket of the worker it
+replaces: closing a SO_REUSEPORT socket would reset the connections waiting in its
+accept queue, while an open socket keeps them until a worker accepts them.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing.synchronize import Event
+from typing import Any
+
+import uvicorn
+
+from src.core.logger import setup_logger
+from src.core.metrics import reset_metrics_directory
+from src.core.settings import PACKAGE_NAME, get_shared_memory_dir, settings
+
+logger = setup_logger(__name__)
+
+APP = "src.main:create_app"
+# Seconds a new worker has to start serving during a rolling restart
+READY_TIMEOUT = 60.0
+# Seconds a stopping worker waits for the requests of connections it just accepted
+SHUTDOWN_GRACE = 0.1
+
+# Workers are started with spawn, like Uvicorn's, so they share no state with the
+# supervisor
+spawn = multiprocessing.get_context("spawn")
+
+
+def get_server_config(app: str = APP) -> dict[str, Any]:
+    """
+    Builds the Uvicorn configuration of a worker from the settings.
+
+    Args:
+        app (str): The import string of the application factory.
+
+    Returns:
+        dict[str, Any]: Keyword arguments for `uvicorn.Config`.
+    """
+    return {
+        "app": app,
+        "factory": True,
+        "host": settings.server_host,
+        "port": settings.server_port,
+        "loop": settings.server_loop,
+        "http": settings.server_http,
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keep_alive_seconds,
+        "limit_concurrency": settings.server_limit_concurrency,
+        "timeout_graceful_shutdown": settings.server_graceful_timeout_seconds,
+    }
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False) -> socket.socket:
+    """
+    Binds a TCP socket. Uvicorn starts listening on it with the configured backlog.
+
+    Args:
+        host (str): The address to bind to.
+        port (int): The port to bind to.
+        reuse_port (bool): Whether to set SO_REUSEPORT, letting sockets in several
+                           processes bind the same address.
+
+    Returns:
+        socket.socket: The bound socket.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    try:
+        sock.bind((host, port))
+    except OSError:
+        sock.close()
+        raise
+    sock.set_inheritable(True)
+    return sock
+
+
+class WorkerServer(uvicorn.Server):
+    """Uvicorn server that reports when it has started serving and when it starts
+    shutting down."""
+
+    def __init__(self, config: uvicorn.Config, ready: Event, stopping: Event):
+        """
+        Initialise the server.
+
+        Args:
+            config (uvicorn.Config): The server configuration.
+            ready (Event): Set once the server is accepting connections.
+            stopping (Event): Set once the server stops accepting connections.
+        """
+        super().__init__(config)
+        self.ready = ready
+        self.stopping = stopping
+
+    async def startup(self, sockets: list[socket.socket] | None = None) -> None:
+        """Runs the lifespan startup and starts listening, then sets `ready`."""
+        await super().startup(sockets)
+        if self.started:
+            self.ready.set()
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        """Sets `stopping`, then stops listening and finishes the requests."""
+        self.stopping.set()
+        # Uvicorn closes connections that have not sent a request yet, which drops
+        # those accepted just before, so give them time to send it first
+        for server in self.servers:
+            server.close()
+        await asyncio.sleep(SHUTDOWN_GRACE)
+        await super().shutdown(sockets)
+
+
+def run_worker(
+    config: dict[str, Any], ready: Event, stopping: Event, sock: socket.socket
+) -> None:
+    """
+    Entry point of a worker process.
+
+    Args:
+        config (dict[str, Any]): Keyword arguments for `uvicorn.Config`.
+        ready (Event): Set once the worker is accepting connections.
+        stopping (Event): Set once the worker stops accepting connections.
+        sock (socket.socket): The socket to listen on, bound by the supervisor.
+    """
+    WorkerServer(uvicorn.Config(**config), ready, stopping).run(sockets=[sock])
+
+
+class Worker:
+    """A worker process and its readiness and shutdown flags."""
+
+    def __init__(self, config: dict[str, Any], sock: socket.socket):
+        """
+        Start a worker process.
+
+        Args:
+            config (dict[str, Any]): Keyword arguments for `uvicorn.Config`.
+            sock (socket.socket): The socket to listen on, bound by the supervisor.
+        """
+        self.ready = spawn.Event()
+        self.stopping = spawn.Event()
+        self.process = spawn.Process(
+            target=run_worker, args=(config, self.ready, self.stopping, sock)
+        )
+        self.process.start()
+        # Monotonic time after which a retired worker is killed
+        self.deadline: float | None = None
+
+    @property
+    def pid(self) -> int | None:
+        """The worker's process ID."""
+        return self.process.pid
+
+    def is_alive(self) -> bool:
+        """Returns whether the worker process is running."""
+        return self.process.is_alive()
+
+    def retire(self, timeout: float) -> None:
+        """
+        Asks the worker to finish its requests and exit, without waiting for it. It is
+        killed by `reap` once still running after `timeout`.
+
+        Args:
+            timeout (float): Seconds the worker has to exit.
+        """
+        if self.deadline is not None:
+            return
+        self.deadline = time.monotonic() + timeout
+        # A worker already shutting down is not signalled again
+        if self.process.exitcode is None and not self.stopping.is_set():
+            self.process.terminate()
+
+    def reap(self) -> bool:
+        """
+        Returns whether the retired worker has exited, killing it past its deadline.
+
+        Returns:
+            bool: True once the process has exited.
+        """
+        if self.process.exitcode is not None:
+            self.process.join()
+            return True
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            logger.warning("Killing worker [%s] after its graceful timeout", self.pid)
+            self.process.kill()
+            self.process.join()
+            return True
+        return False
+
+
+class Supervisor:
+    """Starts and supervises the worker processes."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, config: dict[str, Any] | None = None):
+        """
+        Initialise the supervisor from the settings.
+
+        Args:
+            config (dict[str, Any] | None): Keyword arguments for `uvicorn.Config`.
+                                            Defaults to `get_server_config()`.
+        """
+        self.config = config if config is not None else get_server_config()
+        self.workers_count = settings.server_workers
+        self.max_requests = settings.server_max_requests
+        self.max_requests_jitter = settings.server_max_requests_jitter
+        self.timeout = float(settings.server_graceful_timeout_seconds + 5)
+        self.reuse_port = settings.server_reuse_port and hasattr(socket, "SO_REUSEPORT")
+        # The socket of each worker with reuse port, else the socket they share
+        self.sockets: list[socket.socket] = []
+        # The private directory of the files the workers of this run share, created
+        # when needed and removed when it stops
+        self.run_dir: str | None = None
+        # The serving worker of each position
+        self.workers: list[Worker] = []
+        # Workers shutting down, reaped once they exit
+        self.retiring: list[Worker] = []
+        # Positions left to restart, and the worker starting for the current one
+        # with its position and the time it has to start serving
+        self.restart_queue: list[int] = []
+        self.replacement: tuple[int, Worker, float] | None = None
+        self.should_exit = threading.Event()
+        self.signals: list[int] = []
+
+    def spawn_worker(self, index: int) -> Worker:
+        """
+        Starts a worker, spreading the request limits of the workers with the jitter.
+
+        Args:
+            index (int): The worker's position, which selects its socket.
+
+        Returns:
+            Worker: The new worker.
+        """
+        config = self.config
+        if self.max_requests:
+            config = {
+                **config,
+                "limit_max_requests": self.max_requests
+                + random.randint(0, self.max_requests_jitter),
+            }
+        worker = Worker(config, self.sockets[index % len(self.sockets)])
+        logger.info("Started worker [%s]", worker.pid)
+        return worker
+
+    def retire_worker(self, worker: Worker) -> None:
+        """
+        Asks a worker to stop without waiting for it, see `Worker.retire`.
+
+        Args:
+            worker (Worker): The worker to stop.
+        """
+        worker.retire(self.timeout)
+        self.retiring.append(worker)
+
+    def get_run_dir(self) -> str:
+        """
+        Returns the directory of the files shared by the workers of this run, creating
+        it. It is private to the run, so no other user or deployment shares the files.
+
+        Returns:
+            str: A new directory only the current user can access.
+        """
+        if self.run_dir is None:
+            self.run_dir = tempfile.mkdtemp(
+                prefix=f"{PACKAGE_NAME}-", dir=get_shared_memory_dir()
+            )
+        return self.run_dir
+
+    def warn_about_per_worker_state(self) -> None:
+        """Warns about state each worker keeps to itself with the settings."""
+        if self.workers_count > 1 and not settings.revocation_file:
+            logger.warning(
+                "REVOCATION_FILE is not set, so a revoked token is only rejected by "
+                "the worker that revoked it, out of %s workers",
+                self.workers_count,
+            )
+
+    def run(self) -> None:
+        """Runs the workers until SIGINT or SIGTERM."""
+        for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(sig, lambda sig, _: self.signals.append(sig))
+
+        if settings.metrics_enabled:
+            # Workers read the directory from the environment, a fresh one per run
+            if settings.metrics_dir:
+                metrics_dir = settings.metrics_dir
+                reset_metrics_directory(metrics_dir)
+            else:
+                metrics_dir = os.path.join(self.get_run_dir(), "metrics")
+            os.environ["METRICS_DIR"] = metrics_dir
+        if settings.rate_limit_storage == "shared" and not (
+            settings.rate_limit_shared_path
+        ):
+            os.environ["RATE_LIMIT_SHARED_PATH"] = os.path.join(
+                self.get_run_dir(), "rate-limit"
+            )
+
+        self.sockets = [
+            bind_socket(self.config["host"], self.config["port"], self.reuse_port)
+            for _ in range(self.workers_count if self.reuse_port else 1)
+        ]
+        logger.info(
+            "Supervisor [%s] starting %s workers on %s:%s",
+            os.getpid(),
+            self.workers_count,
+            self.config["host"],
+            self.config["port"],
+        )
+        self.warn_about_per_worker_state()
+        self.workers = [self.spawn_worker(index) for index in range(self.workers_count)]
+
+        # Nothing below waits on a worker, so signals and exited workers are handled
+        # within a poll interval, also during a rolling restart
+        try:
+            while not self.should_exit.wait(0.2):
+                self.handle_signals()
+                if self.should_exit.is_set():
+                    break
+                self.replace_stopping_workers()
+                self.continue_restart()
+                self.retiring = [
+                    worker for worker in self.retiring if not worker.reap()
+                ]
+        finally:
+            self.stop()
+
+    def handle_signals(self) -> None:
+        """Handles the signals received since the last check."""
+        while self.signals:
+            sig = self.signals.pop(0)
+            if sig == signal.SIGHUP:
+                logger.info("Received SIGHUP, restarting workers")
+                self.restart_queue = list(range(self.workers_count))
+            else:
+                logger.info("Received %s, stopping", signal.Signals(sig).name)
+                self.should_exit.set()
+                return
+
+    def replace_stopping_workers(self) -> None:
+        """
+        Replaces the workers that have exited or started shutting down, e.g. after
+        serving their maximum requests. The replacement starts while the worker
+        finishes its requests, so it soon accepts the connections queued on the
+        socket they share.
+        """
+        for index, worker in enumerate(self.workers):
+            if not worker.stopping.is_set() and worker.is_alive():
+                continue
+            if worker.is_alive():
+                logger.info("Worker [%s] is shutting down, replacing it", worker.pid)
+            else:
+                logger.info(
+                    "Worker [%s] exited with code %s, replacing it",
+                    worker.pid,
+                    worker.process.exitcode,
+                )
+            self.retire_worker(worker)
+            if self.replacement is not None and self.replacement[0] == index:
+                # The worker starting for the rolling restart takes over right away
+                self.workers[index] = self.replacement[1]
+                self.replacement = None
+            else:
+                self.workers[index] = self.spawn_worker(index)
+
+    def continue_restart(self) -> None:
+        """
+        Advances the rolling restart. Each worker is replaced once its replacement is
+        serving on the same socket, so no connection waiting to be accepted is
+        dropped, and the next worker is then restarted.
+        """
+        while self.replacement is not None or self.restart_queue:
+            if self.replacement is None:
+                index = self.restart_queue.pop(0)
+                self.replacement = (
+                    index,
+                    self.spawn_worker(index),
+                    time.monotonic() + READY_TIMEOUT,
+                )
+                return
+            index, replacement, deadline = self.replacement
+            if replacement.ready.is_set():
+                self.retire_worker(self.workers[index])
+                self.workers[index] = replacement
+            elif not replacement.is_alive() or time.monotonic() > deadline:
+                logger.error(
+                    "Worker [%s] failed to start, keeping worker [%s]",
+                    replacement.pid,
+                    self.workers[index].pid,
+                )
+                self.retire_worker(replacement)
+            else:
+                return
+            self.replacement = None
+
+    def stop(self) -> None:
+        """Stops every worker gracefully, closes the sockets and removes the directory
+        created for the run."""
+        workers = [*self.workers, *self.retiring]
+        if self.replacement is not None:
+            workers.append(self.replacement[1])
+        for worker in workers:
+            worker.retire(self.timeout)
+        while workers:
+            time.sleep(0.1)
+            workers = [worker for worker in workers if not worker.reap()]
+        self.workers.clear()
+        self.retiring.clear()
+        self.restart_queue.clear()
+        self.replacement = None
+        for sock in self.sockets:
+            sock.close()
+        self.sockets.clear()
+        if self.run_dir is not None:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            self.run_dir = None
+        logger.info("Supervisor [%s] stopped", os.getpid())
+
+
+def run(app: str = APP) -> None:
+    """
+    Serves the application with the supervised workers configured in the settings.
+
+    Args:
+        app (str): The import string of the application factory.
+    """
+    Supervisor(get_server_config(app)).run()
@@ -4,20 +4,57 @@ Application configuration module.
 This module defines the application's runtime settings using Pydantic's BaseSettings.
 """
 
-import tomllib
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from typing import Literal
 
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+PACKAGE_NAME = "fastapi-boilerplate"
+
 
 def get_version() -> str:
-    """Retrieve the application version from the pyproject.toml file.
+    """Retrieve the application version from the installed package metadata.
+
+    Unlike reading `pyproject.toml`, this does not depend on the current working
+    directory.
+
+    Returns:
+        str: The installed package version, or "0.0.0" when the package is not
+             installed (e.g. when running from a plain source checkout).
+    """
+    try:
+        return version(PACKAGE_NAME)
+    except PackageNotFoundError:
+        return "0.0.0"
+
+
+def get_shared_memory_dir() -> str:
+    """Returns where the private directories of files shared by workers are created.
 
     Returns:
-        str: The version string defined under [tool.poetry.version].
+        str: `/dev/shm` when available, so the files are memory backed, otherwise the
+             system temporary directory.
     """
-    with open("pyproject.toml", "rb") as f:
-        data = tomllib.load(f)
-        return str(data["tool"]["poetry"]["version"])
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+class LogFilterConfig(BaseModel):
+    """Volume limits for the records logged by one logger.
+
+    Attributes:
+        sample_rate (float): The fraction of records to keep, between 0 and 1.
+        rate_limit (float | None): Records per second allowed for each message
+                                   template, None for no limit.
+        burst (int): Records per message template allowed in a burst before
+                     `rate_limit` applies.
+    """
+
+    sample_rate: float = Field(default=1.0, ge=0, le=1)
+    rate_limit: float | None = Field(default=None, gt=0)
+    burst: int = Field(default=10, ge=1)
 
 
 # pylint: disable=too-few-public-methods
@@ -31,11 +68,91 @@ class Settings(BaseSettings):
 
     # App config
     app_name: str = "FastAPI Boilerplate"
-    app_version: str = get_version()
+    app_version: str = Field(default_factory=get_version)
     api_v1_prefix: str = "/api/v1"
     debug: bool = False
     rate_limit: str = "100/minute"
 
+    # Server, used by the `start` script. Workers are supervised processes, the loop
+    # and HTTP parser default to uvloop and httptools when installed. With reuse port
+    # each worker listens on its own socket and the kernel balances connections
+    # between them. A worker is replaced after max requests, plus a random jitter so
+    # workers are not all replaced at once
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    server_workers: int = Field(default_factory=lambda: os.cpu_count() or 1, ge=1)
+    server_loop: Literal["auto", "asyncio", "uvloop"] = "auto"
+    server_http: Literal["auto", "h11", "httptools"] = "auto"
+    server_backlog: int = 2048
+    server_keep_alive_seconds: int = 5
+    server_limit_concurrency: int | None = None
+    server_reuse_port: bool = True
+    server_max_requests: int | None = None
+    server_max_requests_jitter: int = 0
+    server_graceful_timeout_seconds: int = 30
+
+    # Rate limit storage, "memory" is per process, "shared" is a memory-mapped table
+    # shared by all workers on the host and "redis" is shared by every host. When the
+    # storage is unreachable requests are let through if fail open, or answered with a
+    # 503 otherwise. The shared table's file must be in a directory only the app's user
+    # can access, `start` creates one per run when no path is set
+    rate_limit_storage: Literal["memory", "shared", "redis"] = "memory"
+    rate_limit_fail_open: bool = True
+    rate_limit_sweep_interval_seconds: int = 60
+    rate_limit_shared_path: str = ""
+    rate_limit_shared_slots: int = 65_536
+    rate_limit_shared_lock_stripes: int = 64
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    rate_limit_redis_pool_size: int = 8
+    rate_limit_redis_timeout_seconds: float = 0.5
+
+    # Logging, "json" writes one JSON object per line. The queue moves formatting and
+    # writing off the calling thread, a full queue either drops new records or blocks
+    # the logging call until there is space
+    log_format: Literal["colour", "json"] = "colour"
+    log_queue_enabled: bool = True
+    log_queue_size: int = 10_000
+    log_queue_policy: Literal["drop", "block"] = "block"
+
+    # Per logger sampling and rate limits, keyed by logger name. A logger uses the
+    # entry for its own name or its closest parent, e.g. set as JSON in the
+    # environment: LOG_FILTERS='{"src.exceptions": {"rate_limit": 5, "burst": 20}}'
+    log_filters: dict[str, LogFilterConfig] = {}
+
+    # Adds a Server-Timing header breaking each request down into stages (middlewares,
+    # validation, handler, rendering) and logs it at debug level. Exposes internal
+    # timings to clients, so only enable it where that is acceptable
+    server_timing_enabled: bool = False
+
+    # On-demand request profiling. Requests from these users (comma separated
+    # usernames) with an `X-Profile: collapsed` or `X-Profile: speedscope` header are
+    # sampled and the profile is stored in the directory, named after the trace ID.
+    # The directory is required with users, and must only be accessible to the app's
+    # user. The middleware is not installed when no users are listed
+    profiling_users: str = ""
+    profiling_dir: str = ""
+    profiling_interval_seconds: float = Field(default=0.001, gt=0)
+
+    # Metrics served on /metrics. Without a directory each process only reports its
+    # own requests, `start` creates a private one per run so the workers' metrics are
+    # summed. A configured directory must only be accessible to the app's user
+    metrics_enabled: bool = True
+    metrics_dir: str | None = None
+    metrics_max_series: int = 4096
+
+    # Response compression with the best of zstd, brotli and gzip the client accepts.
+    # Bodies of at least the minimum size with one of the content types (comma
+    # separated) are compressed, from the thread threshold up on the thread pool.
+    # Compressed bodies of repeated responses are cached
+    compression_enabled: bool = True
+    compression_minimum_size: int = 500
+    compression_thread_threshold: int = 64 * 1024
+    compression_content_types: str = (
+        "application/json,application/problem+json,text/html,text/plain,text/css,"
+        "text/javascript,application/javascript"
+    )
+    compression_cache_max_size: int = 256
+
     # CORS
     allowed_origins: str = "http://localhost:3000"
 
@@ -44,6 +161,45 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
 
+    # JWT signing keys. Without a key file, tokens are signed with the secret key and
+    # algorithm above. The JSON key file lists the keys by key ID and names the active
+    # one (see `src.core.key_ring`), and is checked for changes at the reload interval
+    # (0 never reloads). The JWKS of the public keys is served for this many seconds
+    signing_keys_file: str = ""
+    signing_keys_reload_seconds: float = 30
+    jwks_max_age_seconds: int = 300
+
+    # Denylist of revoked tokens, kept in memory per process by default. With a file,
+    # in a directory only the app's user can write to, it is persisted and shared by
+    # the workers on the host, which read each other's revocations at the sync
+    # interval
+    revocation_file: str = ""
+    revocation_sync_seconds: float = 1
+
+    # Password hashing pool, requests beyond workers + queue size are rejected (503)
+    hash_workers: int = 4
+    hash_queue_size: int = 32
+    hash_retry_after_seconds: int = 1
+
+    # User storage, "memory" keeps users in a process-local dict
+    user_store: Literal["memory", "sqlite"] = "memory"
+    sqlite_path: str = "users.db"
+    sqlite_pool_size: int = 4
+
+    # Per-process cache of user profiles looked up by the auth middleware
+    user_cache_max_size: int = 10_000
+    user_cache_ttl_seconds: int = 60
+
+    # Per-process cache of GET responses of routes decorated with `cache_response`,
+    # entries expire after the route's TTL or this default
+    response_cache_max_size: int = 1024
+    response_cache_ttl_seconds: int = 60
+
+    # Verified token cache, skips signature checks for repeated tokens when enabled
+    token_cache_enabled: bool = False
+    token_cache_max_size: int = 10_000
+    token_cache_ttl_seconds: int = 300
+
     # Location of the .env file, can override default settings
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -0,0 +1,207 @@
+"""
+Rate limit storage shared by all worker processes on a host.
+
+The GCRA state lives in a fixed-size hash table in a memory-mapped file, so every
+worker enforces the same global limit without a network round trip. The table is
+split into buckets of `SLOTS_PER_BUCKET` slots, each holding a 64-bit key hash and
+the key's theoretical arrival time (TAT):
+
+    header (64 bytes): magic, bucket count, slots per bucket
+    buckets: [(hash: uint64, tat: float64) * SLOTS_PER_BUCKET] * bucket count
+
+A key is stored in the bucket selected by its hash. Slots whose TAT has passed hold
+no state and are reused, and when every slot in a bucket is active the one closest
+to expiry is evicted, which at worst gives that key a fresh quota.
+
+Updates take one of `lock_stripes` locks, chosen by bucket. Each stripe is a byte
+range lock (`fcntl.lockf`) on the table file, which excludes other processes, plus a
+`threading.Lock`, which excludes other threads in the same process. Both are taken
+without blocking, and a busy stripe is retried on the next pass of the event loop,
+so a worker never blocks its loop waiting for another one.
+
+Any process that can write the table can change every key's state, so it must be in
+a directory only the app's user can access. Symbolic links and files of other users
+are refused.
+
+All processes must read time from the same clock. `time.monotonic`, the limiter's
+default, is system-wide on Linux.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+from src.core.rate_limit_storage import EPSILON
+from src.utils.private_files import ensure_private_directory, open_private_file
+
+MAGIC = b"GCRA0001"
+HEADER = struct.Struct("<8sQQ")
+HEADER_SIZE = 64
+SLOTS_PER_BUCKET = 8
+# Each slot is two 8 byte words, the key hash and the TAT
+SLOT_WORDS = 2
+SLOT_SIZE = SLOT_WORDS * 8
+# Byte range lock offsets, stripes are locked at 1 + stripe index
+INIT_LOCK = 0
+
+
+def hash_key(key: str) -> int:
+    """Returns a stable, non-zero 64-bit hash of a key. Zero marks an empty slot.
+
+    Args:
+        key (str): The rate limit key.
+
+    Returns:
+        int: The key hash.
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class SharedMemoryRateLimitStorage:
+    """GCRA storage in a memory-mapped hash table shared between processes."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, path: str, slots: int = 65_536, lock_stripes: int = 64):
+        """
+        Open the table file, creating and sizing it if needed.
+
+        Every process sharing a table must use the same `slots`.
+
+        Args:
+            path (str): The table file, ideally on a memory-backed file system such as
+                        `/dev/shm`, in a directory only the current user can
+                        access.
+            slots (int): The number of keys the table can hold, rounded up to a
+                         whole number of buckets.
+            lock_stripes (int): The number of locks guarding the buckets.
+
+        Raises:
+            PermissionError: If the directory or the file is accessible to other
+                             users, or the file is a symbolic link.
+            ValueError: If the file holds a table with a different layout.
+        """
+        self.path = path
+        self.buckets = max(-(-slots // SLOTS_PER_BUCKET), 1)
+        self.lock_stripes = lock_stripes
+        self.size = HEADER_SIZE + self.buckets * SLOTS_PER_BUCKET * SLOT_SIZE
+
+        ensure_private_directory(os.path.dirname(os.path.abspath(path)))
+        self._fd = open_private_file(path, os.O_RDWR | os.O_CREAT)
+        try:
+            self._initialise()
+            self._mmap = mmap.mmap(self._fd, self.size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        # Views over the slots as 64-bit words, slot i is at words 2i (hash) and
+        # 2i + 1 (TAT) so no struct packing is needed per check
+        self._data = memoryview(self._mmap)[HEADER_SIZE:]
+        self._hashes = self._data.cast("Q")
+        self._tats = self._data.cast("d")
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
+
+    def _initialise(self) -> None:
+        """Writes the header of a new table or checks the layout of an existing one."""
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, INIT_LOCK)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, self.size)
+                os.pwrite(
+                    self._fd, HEADER.pack(MAGIC, self.buckets, SLOTS_PER_BUCKET), 0
+                )
+                return
+            magic, buckets, slots_per_bucket = HEADER.unpack(
+                os.pread(self._fd, HEADER.size, 0)
+            )
+            if (magic, buckets, slots_per_bucket) != (
+                MAGIC,
+                self.buckets,
+                SLOTS_PER_BUCKET,
+            ):
+                raise ValueError(
+                    f"{self.path} holds a rate limit table with a different layout, "
+                    "remove it or configure the same number of slots"
+                )
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, INIT_LOCK)
+
+    async def update(
+        self, key: str, now: float, interval: float, period: float
+    ) -> tuple[bool, float]:
+        """Applies one request to a key, see `RateLimitStorage.update`."""
+        key_hash = hash_key(key)
+        bucket = key_hash % self.buckets
+        stripe = bucket % self.lock_stripes
+        first = bucket * SLOTS_PER_BUCKET
+
+        while not self._try_lock(stripe):
+            await asyncio.sleep(0)
+        try:
+            slot = self._find_slot(first, key_hash, now)
+            word = slot * SLOT_WORDS
+            tat = self._tats[word + 1] if self._hashes[word] == key_hash else now
+            tat = max(tat, now)
+            new_tat = tat + interval
+            if new_tat - now > period + EPSILON:
+                return False, tat
+            self._hashes[word] = key_hash
+            self._tats[word + 1] = new_tat
+            return True, new_tat
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 1 + stripe)
+            self._locks[stripe].release()
+
+    def _try_lock(self, stripe: int) -> bool:
+        """Takes a stripe's thread and file locks if neither is held elsewhere.
+
+        Args:
+            stripe (int): The stripe index.
+
+        Returns:
+            bool: True if both locks were taken, False if none is held.
+        """
+        lock = self._locks[stripe]
+        if not lock.acquire(blocking=False):
+            return False
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, 1 + stripe)
+        except OSError:
+            lock.release()
+            return False
+        return True
+
+    def _find_slot(self, first: int, key_hash: int, now: float) -> int:
+        """Returns the key's slot in a bucket, or the slot to store it in.
+
+        Prefers the key's own slot, then an empty or expired slot, then the slot
+        closest to expiry.
+        """
+        hashes, tats = self._hashes, self._tats
+        free = None
+        oldest, oldest_tat = first, float("inf")
+        for slot in range(first, first + SLOTS_PER_BUCKET):
+            word = slot * SLOT_WORDS
+            slot_hash = hashes[word]
+            if slot_hash == key_hash:
+                return slot
+            if free is None:
+                slot_tat = tats[word + 1]
+                if slot_hash == 0 or slot_tat <= now:
+                    free = slot
+                elif slot_tat < oldest_tat:
+                    oldest, oldest_tat = slot, slot_tat
+        return oldest if free is None else free
+
+    async def close(self) -> None:
+        """Unmaps the table and closes the file. The file is left for other workers."""
+        self._hashes.release()
+        self._tats.release()
+        self._data.release()
+        self._mmap.close()
+        os.close(self._fd)
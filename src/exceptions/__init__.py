@@ -4,5 +4,5 @@ Package initializer for exception handlers.
 
 from .http_exception import http_exception_handler
 from .internal_server_error import internal_server_error_handler
-from .rate_limit import rate_limit_handler
+from .service_unavailable import ServiceUnavailableError, service_unavailable_handler
 from .validation_exception import validation_exception_handler
@@ -0,0 +1,63 @@
+"""
+Custom exception and handler for temporarily overloaded services.
+"""
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+from src.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ServiceUnavailableError(Exception):
+    """Raised when a request is shed because a backing resource is saturated."""
+
+    def __init__(self, detail: str, retry_after: int):
+        """
+        Initialise the error.
+
+        Args:
+            detail (str): A message describing which resource is unavailable.
+            retry_after (int): Seconds the client should wait before retrying.
+        """
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def service_unavailable_content(detail: str) -> dict[str, str]:
+    """Builds the body of a 503 response.
+
+    Args:
+        detail (str): A message describing which resource is unavailable.
+
+    Returns:
+        dict[str, str]: The error response content.
+    """
+    return {
+        "status": "error",
+        "error": "service_unavailable",
+        "detail": detail,
+    }
+
+
+def service_unavailable_handler(
+    _: Request, exc: ServiceUnavailableError
+) -> JSONResponse:
+    """Handles shed requests and returns a structured 503 response.
+
+    Args:
+        _ (Request): The incoming request that triggered the exception.
+        exc (ServiceUnavailableError): The exception indicating the overload.
+
+    Returns:
+        JSONResponse: A JSON response with a 503 status code, an error message and a
+                      `Retry-After` header.
+    """
+    logger.error("Service unavailable error: %s", exc)
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=service_unavailable_content(exc.detail),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
@@ -1,26 +1,95 @@
 """
 Application entrypoint.
+
+Importing this module has no side effects: the application is built by
+`create_app()`, or lazily on first access to the module level `api` attribute,
+and startup/shutdown work runs in the application lifespan.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from src.core.logger import setup_logger
+from src.core.logger import setup_logger, start_log_listener, stop_log_listener
+from src.core.rate_limit import (
+    RateLimiter,
+    create_rate_limit_storage,
+    parse_rate_limit,
+)
+from src.core.revocation import token_denylist
+from src.core.security import (
+    hash_executor,
+    start_key_ring_reload,
+    stop_key_ring_reload,
+)
 from src.core.settings import settings
 from src.exceptions import (
+    ServiceUnavailableError,
     http_exception_handler,
     internal_server_error_handler,
-    rate_limit_handler,
+    service_unavailable_handler,
     validation_exception_handler,
 )
-from src.middlewares import AuthMiddleware, TraceIdMiddleware
-from src.routes import router
+from src.middlewares import (
+    AuthMiddleware,
+    CompressionMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    RateLimitMiddleware,
+    ServerTimingMiddleware,
+    StageMarkMiddleware,
+    TraceIdMiddleware,
+)
+from src.routes import jwks, metrics, router
+from src.services.users import close_user_repository
+
+logger = setup_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Runs application startup and shutdown work.
+
+    Args:
+        app (FastAPI): The application instance.
+
+    Yields:
+        None: Control back to the server while the application is running.
+    """
+    start_log_listener()
+    await asyncio.to_thread(token_denylist.start)
+    await asyncio.to_thread(start_key_ring_reload)
+    logger.info("FastAPI application started")
+    yield
+    await asyncio.to_thread(stop_key_ring_reload)
+    await asyncio.to_thread(token_denylist.stop)
+    await close_user_repository()
+    await app.state.rate_limiter.storage.close()
+    # Waiting for running hashes would otherwise block the event loop
+    await asyncio.to_thread(hash_executor.shutdown)
+    logger.info("FastAPI application stopped")
+    stop_log_listener()
+
+
+def add_middleware(
+    app: FastAPI, stage: str, middleware_class: Any, **options: Any
+) -> None:
+    """Adds a middleware, and marks the end of its stage when requests are timed.
+
+    Args:
+        app (FastAPI): The application instance.
+        stage (str): The name of the middleware's stage in the `Server-Timing` header.
+        middleware_class (Any): The middleware class.
+        **options: The middleware options.
+    """
+    if settings.server_timing_enabled:
+        app.add_middleware(StageMarkMiddleware, name=stage)
+    app.add_middleware(middleware_class, **options)
 
 
 def create_app() -> FastAPI:
@@ -33,24 +102,44 @@ def create_app() -> FastAPI:
 
     Returns:
         FastAPI: Configured FastAPI application instance.
-    """
 
-    # Set up logging
-    logger = setup_logger(__name__)
-    logger.info("FastAPI application started")
+    Raises:
+        ValueError: If profiling users are configured without a profile directory.
+    """
 
     # Initialize the FastAPI application with settings from the configuration
     app = FastAPI(
-        title=settings.app_name, version=settings.app_version, debug=settings.debug
+        title=settings.app_name,
+        version=settings.app_version,
+        debug=settings.debug,
+        lifespan=lifespan,
     )
 
     # Rate limiter, use IP address as key
-    limiter = Limiter(key_func=get_remote_address, default_limits=[settings.rate_limit])
-    app.state.limiter = limiter
+    app.state.rate_limiter = RateLimiter(
+        parse_rate_limit(settings.rate_limit),
+        create_rate_limit_storage(),
+        fail_open=settings.rate_limit_fail_open,
+    )
 
-    # Add middlewares
-    app.add_middleware(SlowAPIMiddleware)
-    app.add_middleware(
+    # Add middlewares, the last one added runs first. Compression is innermost, so
+    # it sees the ETags of cached responses
+    if settings.compression_enabled:
+        add_middleware(
+            app,
+            "compression",
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            thread_threshold=settings.compression_thread_threshold,
+            content_types=settings.compression_content_types.split(","),
+            cache_size=settings.compression_cache_max_size,
+        )
+    add_middleware(
+        app, "rate_limit", RateLimitMiddleware, limiter=app.state.rate_limiter
+    )
+    add_middleware(
+        app,
+        "cors",
         CORSMiddleware,
         allow_origins=settings.allowed_origins.split(","),
         allow_credentials=True,
@@ -71,22 +160,66 @@ def create_app() -> FastAPI:
             "Cookie",
         ],
     )
-    app.add_middleware(TraceIdMiddleware)
-    app.add_middleware(
-        AuthMiddleware, exclude_paths=[settings.api_v1_prefix + "/token"]
+    # Profiles requests from listed users, so runs after auth and trace ID
+    if settings.profiling_users:
+        if not settings.profiling_dir:
+            raise ValueError("PROFILING_DIR must be set when PROFILING_USERS is set")
+        add_middleware(
+            app,
+            "profiling",
+            ProfilingMiddleware,
+            users=settings.profiling_users.split(","),
+            directory=settings.profiling_dir,
+            interval=settings.profiling_interval_seconds,
+        )
+    add_middleware(app, "trace_id", TraceIdMiddleware)
+    add_middleware(
+        app,
+        "auth",
+        AuthMiddleware,
+        exclude_paths=[
+            settings.api_v1_prefix + "/token",
+            "/metrics",
+            "/.well-known/jwks.json",
+        ],
     )
+    if settings.metrics_enabled:
+        add_middleware(app, "metrics", MetricsMiddleware)
+    if settings.server_timing_enabled:
+        app.add_middleware(ServerTimingMiddleware)
 
     # Register routers
     app.include_router(router, prefix=settings.api_v1_prefix)
+    app.include_router(jwks)
+    if settings.metrics_enabled:
+        app.include_router(metrics)
 
     # Register exception handlers
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(StarletteHTTPException, http_exception_handler)
-    app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
+    app.add_exception_handler(ServiceUnavailableError, service_unavailable_handler)
     app.add_exception_handler(Exception, internal_server_error_handler)
 
     return app
 
 
-# Create the FastAPI application instance
-api = create_app()
+def __getattr__(name: str) -> FastAPI:
+    """Builds the FastAPI application instance on first access to `api`.
+
+    This keeps `uvicorn src.main:api` and `from src.main import api` working without
+    constructing the application at import time.
+
+    Args:
+        name (str): The requested module attribute.
+
+    Returns:
+        FastAPI: The application instance.
+
+    Raises:
+        AttributeError: If the attribute is not `api`.
+    """
+    if name != "api":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    app = create_app()
+    globals()["api"] = app
+    return app
@@ -6,4 +6,9 @@ application's middlewares.
 """
 
 from .auth import AuthMiddleware
+from .compression import CompressionMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .rate_limit import RateLimitMiddleware
+from .server_timing import ServerTimingMiddleware, StageMarkMiddleware
 from .trace_id import TraceIdMiddleware
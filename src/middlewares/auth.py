@@ -3,91 +3,179 @@ Middleware to authenticate and attach user details to each incoming request.
 
 The user data is stored in the request state, allowing it to be accessed throughout the
 request lifecycle.
+
+The middleware is implemented as a pure ASGI application. The bearer token is read
+directly from the raw scope headers and authentication failures are answered with
+pre-rendered response bodies, so no `Request` or `Response` objects are built.
 """
 
-from typing import Awaitable, Callable
+import json
 
-from fastapi import FastAPI, Request, Response, status
-from fastapi.responses import JSONResponse
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import status
 from jwt import PyJWTError
-from starlette.middleware.base import BaseHTTPMiddleware
+from pydantic import ValidationError
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from src.core.context import timing_span
 from src.core.logger import setup_logger
-from src.core.security import decode_token
+from src.core.metrics import AUTH_FAILURES
+from src.core.security import decode_token, is_token_revoked
 from src.services.users import get_user_base
+from src.utils.path_matcher import PathMatcher
 
 logger = setup_logger(__name__)
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/token")
 
+RawHeaders = list[tuple[bytes, bytes]]
+
+
+def prerender_unauthorized(
+    detail: str, authenticate: bool = False
+) -> tuple[RawHeaders, bytes]:
+    """Renders the headers and body of a 401 response once, at import time.
+
+    Args:
+        detail (str): The error message to include in the response body.
+        authenticate (bool): Whether to include the `WWW-Authenticate` header.
+
+    Returns:
+        tuple[RawHeaders, bytes]: The raw response headers and the JSON body.
+    """
+    body = json.dumps({"detail": detail}, separators=(",", ":")).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ]
+    if authenticate:
+        headers.append((b"www-authenticate", b"Bearer"))
+    return headers, body
+
+
+NOT_AUTHENTICATED = prerender_unauthorized("Not authenticated", authenticate=True)
+INVALID_TOKEN = prerender_unauthorized("Invalid token")
+INVALID_CREDENTIALS = prerender_unauthorized("Invalid credentials", authenticate=True)
 
-class AuthMiddleware(BaseHTTPMiddleware):
+MISSING_TOKEN_FAILURES = AUTH_FAILURES.labels("missing_token")
+INVALID_TOKEN_FAILURES = AUTH_FAILURES.labels("invalid_token")
+MISSING_SUBJECT_FAILURES = AUTH_FAILURES.labels("missing_subject")
+UNKNOWN_USER_FAILURES = AUTH_FAILURES.labels("unknown_user")
+REVOKED_TOKEN_FAILURES = AUTH_FAILURES.labels("revoked_token")
+
+
+def get_bearer_token(scope: Scope) -> str | None:
+    """Extracts the bearer token from the raw `Authorization` header.
+
+    Args:
+        scope (Scope): The ASGI connection scope.
+
+    Returns:
+        str | None: The token if a bearer `Authorization` header is present,
+                    otherwise None.
+    """
+    headers: RawHeaders = scope["headers"]
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+            return None
+    return None
+
+
+async def send_unauthorized(send: Send, response: tuple[RawHeaders, bytes]) -> None:
+    """Sends a pre-rendered 401 response.
+
+    Args:
+        send (Send): The ASGI send channel.
+        response (tuple[RawHeaders, bytes]): The pre-rendered headers and body.
+    """
+    headers, body = response
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status.HTTP_401_UNAUTHORIZED,
+            # Copy so downstream send wrappers can't mutate the shared headers
+            "headers": list(headers),
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class AuthMiddleware:
     """
     Middleware that authenticates the user from a JWT token and attaches the user data
     to each request.
 
-    The user data is stored in:
+    The user data and the token payload are stored in:
     - request.state.user
+    - request.state.token
     """
 
     # pylint: disable=too-few-public-methods
 
-    def __init__(self, app: FastAPI, exclude_paths: list[str]):
+    def __init__(self, app: ASGIApp, exclude_paths: list[str]):
         """
         Initialise the middleware with the paths to exclude from authentication.
 
         Args:
             app: The ASGI application instance.
-            exclude_paths (list[str]): List of URL paths to skip authentication for.
+            exclude_paths (list[str]): List of URL path rules to skip authentication
+                                       for. Supports exact paths, prefixes ending in
+                                       `*` and glob patterns.
         """
-        super().__init__(app)
-        self.exclude_paths = exclude_paths
+        self.app = app
+        self.exclude_paths = PathMatcher(exclude_paths)
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Authenticates user.
 
         Args:
-            request (Request): The incoming FastAPI request.
-            call_next (Callable): The next middleware or route handler.
-
-        Returns:
-            Response: The HTTP response.
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
         """
         # Skip routes that don't require auth
-        if request.url.path in self.exclude_paths:
-            return await call_next(request)
+        if scope["type"] != "http" or self.exclude_paths.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        token = get_bearer_token(scope)
+        if token is None:
+            MISSING_TOKEN_FAILURES.inc()
+            await send_unauthorized(send, NOT_AUTHENTICATED)
+            return
 
         # Perform auth
         try:
-            token = await oauth2_scheme(request)
-            payload = decode_token(token)
-            username = payload.sub
-
-            if username is None:
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Invalid token"},
-                )
-            # Get user data
-            user = get_user_base(username)
-            if user is None:
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Invalid token"},
-                )
-
-            logger.info("Username of logged in user: %s", username)
-
-            # Attach user to request
-            request.state.user = user
-
-        except PyJWTError:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Invalid credentials"},
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        return await call_next(request)
+            with timing_span("auth_decode"):
+                payload = decode_token(token)
+        except (PyJWTError, ValidationError):
+            INVALID_TOKEN_FAILURES.inc()
+            await send_unauthorized(send, INVALID_CREDENTIALS)
+            return
+        if is_token_revoked(payload):
+            REVOKED_TOKEN_FAILURES.inc()
+            await send_unauthorized(send, INVALID_CREDENTIALS)
+            return
+
+        username = payload.sub
+        if username is None:
+            MISSING_SUBJECT_FAILURES.inc()
+            await send_unauthorized(send, INVALID_TOKEN)
+            return
+
+        # Get user data
+        with timing_span("auth_user"):
+            user = await get_user_base(username)
+        if user is None:
+            UNKNOWN_USER_FAILURES.inc()
+            await send_unauthorized(send, INVALID_TOKEN)
+            return
+
+        logger.info("Username of logged in user: %s", username)
+
+        # Attach user and token to request
+        state = scope.setdefault("state", {})
+        state["user"] = user
+        state["token"] = payload
+
+        await self.app(scope, receive, send)
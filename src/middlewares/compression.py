@@ -0,0 +1,181 @@
+"""
+Middleware that compresses response bodies with the best encoding the client
+accepts, see `src.utils.compression` for the encodings.
+
+Only complete (non-streaming) bodies of at least the minimum size whose content type
+is in the allowlist, and that are not already encoded, are compressed. Bodies from
+the threshold size up are compressed on the thread pool so the event loop is not
+blocked. Compressed responses get `Vary: Accept-Encoding`, and their ETag is made
+weak, since the encoded bytes differ from the representation it was computed from
+while `If-None-Match` still matches it.
+
+Compressed bodies are kept in an LRU keyed by the request path and response ETag, or
+a digest of the body when it has none, and the encoding, so repeated responses such
+as the OpenAPI schema or cached routes are only compressed once.
+"""
+
+import hashlib
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.compression import Encoder, choose_encoding, get_encoders
+from src.utils.ttl_cache import TTLCache
+
+DEFAULT_CONTENT_TYPES = ("application/json", "text/html", "text/plain")
+
+
+def get_accept_encoding(scope: Scope) -> bytes | None:
+    """Returns the `Accept-Encoding` header of a request.
+
+    Args:
+        scope (Scope): The ASGI connection scope.
+
+    Returns:
+        bytes | None: The header value, or None when absent.
+    """
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            return bytes(value)
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Middleware that negotiates and applies response compression.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        thread_threshold: int = 64 * 1024,
+        content_types: tuple[str, ...] | list[str] = DEFAULT_CONTENT_TYPES,
+        cache_size: int = 256,
+        encoders: dict[str, Encoder] | None = None,
+    ):
+        """
+        Initialise the middleware.
+
+        Args:
+            app: The ASGI application instance.
+            minimum_size (int): The smallest body in bytes that is compressed.
+            thread_threshold (int): The smallest body in bytes that is compressed on
+                                    the thread pool rather than the event loop.
+            content_types (tuple[str, ...] | list[str]): The media types compressed.
+            cache_size (int): The number of compressed bodies kept.
+            encoders (dict[str, Encoder] | None): The encoder of each content coding,
+                                                  most preferred first. Defaults to
+                                                  every available encoder.
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_threshold = thread_threshold
+        self.content_types = frozenset(content_types)
+        self.encoders = get_encoders() if encoders is None else encoders
+        # Compressed bodies keyed by path and ETag or body digest, and encoding
+        self.cache: TTLCache[tuple[bytes, str], bytes] = TTLCache(max_size=cache_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Compresses the response if the client accepts it.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        encoding = (
+            choose_encoding(get_accept_encoding(scope), self.encoders)
+            if scope["type"] == "http"
+            else None
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: list[Message] = []
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal passthrough
+            if passthrough or message["type"] not in (
+                "http.response.start",
+                "http.response.body",
+            ):
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held until the first body message shows whether to compress
+                start.append(message)
+                return
+
+            passthrough = True
+            headers = MutableHeaders(raw=list(start[0].get("headers", ())))
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self.should_compress(
+                headers, body
+            ):
+                await send(start[0])
+                await send(message)
+                return
+
+            etag = headers.get("etag")
+            compressed = await self.compress(body, encoding, scope["path"], etag)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            if etag is not None and not etag.startswith("W/"):
+                headers["etag"] = "W/" + etag
+            await send({**start[0], "headers": headers.raw})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def should_compress(self, headers: MutableHeaders, body: bytes) -> bool:
+        """Returns whether a complete response body should be compressed.
+
+        Args:
+            headers (MutableHeaders): The response headers.
+            body (bytes): The response body.
+
+        Returns:
+            bool: True if the body is large enough, of an allowed content type and
+                  not already encoded.
+        """
+        if len(body) < self.minimum_size or "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").partition(";")[0].strip()
+        return media_type.lower() in self.content_types
+
+    async def compress(
+        self, body: bytes, encoding: str, path: str, etag: str | None
+    ) -> bytes:
+        """Compresses a body, reusing the result for repeated responses.
+
+        Args:
+            body (bytes): The response body.
+            encoding (str): The content coding to apply.
+            path (str): The request path, ETags only identify bodies of one resource.
+            etag (str | None): The response's ETag, if any.
+
+        Returns:
+            bytes: The encoded body.
+        """
+        identity = (
+            f"{path} {etag}".encode("latin-1")
+            if etag is not None
+            else hashlib.blake2b(body, digest_size=16).digest()
+        )
+        key = (identity, encoding)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            encoder = self.encoders[encoding]
+            if len(body) >= self.thread_threshold:
+                compressed = await run_in_threadpool(encoder, body)
+            else:
+                compressed = encoder(body)
+            self.cache.set(key, compressed)
+        return compressed
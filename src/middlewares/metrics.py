@@ -0,0 +1,132 @@
+"""
+Middleware that records request metrics: latency, status codes and requests in
+progress.
+
+The middleware is implemented as a pure ASGI application and should be the
+outermost middleware, so its latency covers the other middlewares and it also counts
+requests they answer themselves, such as 401 and 429 responses. Requests are labelled
+with the template of the route they match (e.g. `/users/{user_id}`) rather than the
+raw path, which keeps the number of series bounded.
+"""
+
+import time
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_PROGRESS,
+    CounterChild,
+    HistogramChild,
+)
+
+METHODS = frozenset(
+    ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"]
+)
+# Label of requests matching no route, and of methods outside `METHODS`
+UNMATCHED = "unmatched"
+OTHER = "other"
+
+
+def find_route_template(scope: Scope) -> str:
+    """Returns the path template of the application route matching a request.
+
+    Args:
+        scope (Scope): The ASGI connection scope.
+
+    Returns:
+        str: The route template, or "unmatched" when no route matches the path.
+    """
+    for route in getattr(scope.get("app"), "routes", ()):
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return str(getattr(route, "path_format", UNMATCHED))
+    return UNMATCHED
+
+
+class MetricsMiddleware:
+    """
+    Middleware that records the latency, status code and concurrency of requests.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, app: ASGIApp, max_paths: int = 1024):
+        """
+        Initialise the middleware.
+
+        Args:
+            app: The ASGI application instance.
+            max_paths (int): The number of request paths whose series are cached.
+                             The cache is cleared when it is full.
+        """
+        self.app = app
+        self.in_progress = HTTP_REQUESTS_IN_PROGRESS.labels()
+        self.max_paths = max_paths
+        # Latency and per status code counter series by method and request path
+        self.series: dict[
+            tuple[str, str], tuple[HistogramChild, str, str, dict[int, CounterChild]]
+        ] = {}
+
+    def get_series(
+        self, scope: Scope
+    ) -> tuple[HistogramChild, str, str, dict[int, CounterChild]]:
+        """Returns the series of a request, resolving its route template once per
+        method and path.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+
+        Returns:
+            tuple[HistogramChild, str, str, dict[int, CounterChild]]: The latency
+                series, the method and route labels and the counter series by status
+                code seen so far.
+        """
+        key = (scope["method"], scope["path"])
+        series = self.series.get(key)
+        if series is None:
+            if len(self.series) >= self.max_paths:
+                self.series.clear()
+            method = key[0] if key[0] in METHODS else OTHER
+            route = find_route_template(scope)
+            series = (HTTP_REQUEST_DURATION.labels(method, route), method, route, {})
+            self.series[key] = series
+        return series
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Times the request and records its outcome.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Requests failing before a response is started are answered with a 500
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            self.in_progress.dec()
+            latency, method, route, counters = self.get_series(scope)
+            latency.observe(duration)
+            counter = counters.get(status_code)
+            if counter is None:
+                counter = HTTP_REQUESTS.labels(method, route, str(status_code))
+                counters[status_code] = counter
+            counter.inc()
@@ -0,0 +1,153 @@
+"""
+Middleware that profiles single requests on demand.
+
+A request carrying an `X-Profile: collapsed` or `X-Profile: speedscope` header from
+one of the allowed users is run under a `SamplingProfiler`. Once the response has
+been sent, the profile is rendered and stored on a worker thread, in the profile
+directory as
+`<trace ID>.collapsed.txt` or `<trace ID>.speedscope.json`, and the response names
+the file in its `X-Profile` header. Profiles show the app's internals, so the
+directory must only be accessible to the app's user.
+
+The middleware sits inside `AuthMiddleware` and `TraceIdMiddleware`, which provide
+the user and trace ID of the request, and is only installed when profiling users are
+configured. Requests without the header are passed on after a scan of the headers.
+Only one request per process is profiled at a time, others are served normally.
+"""
+
+import os
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.logger import setup_logger
+from src.core.profiler import SamplingProfiler
+from src.utils.private_files import ensure_private_directory, open_private_file
+
+logger = setup_logger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+# File name suffix of each profile format
+PROFILE_FORMATS = {b"collapsed": ".collapsed.txt", b"speedscope": ".speedscope.json"}
+
+
+def get_profile_format(scope: Scope) -> bytes | None:
+    """Returns the profile format requested by a request's `X-Profile` header.
+
+    Args:
+        scope (Scope): The ASGI connection scope.
+
+    Returns:
+        bytes | None: The requested format, or None when the header is absent.
+    """
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return bytes(value).lower()
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Middleware that profiles requests asking for it with the `X-Profile` header.
+    """
+
+    def __init__(
+        self, app: ASGIApp, users: list[str], directory: str, interval: float = 0.001
+    ):
+        """
+        Initialise the middleware.
+
+        Args:
+            app: The ASGI application instance.
+            users (list[str]): The usernames allowed to profile requests.
+            directory (str): The directory profiles are stored in, created if needed.
+                             It must only be accessible to the current user.
+            interval (float): The time between samples in seconds.
+        """
+        self.app = app
+        self.users = frozenset(users)
+        self.directory = directory
+        self.interval = interval
+        self.active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Profiles the request if it asks for it.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if (
+            scope["type"] != "http"
+            or (profile_format := get_profile_format(scope)) is None
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.get("state", {})
+        user = state.get("user")
+        if user is None or user.username not in self.users:
+            logger.warning("Profile requested by a user not allowed to profile")
+            await self.app(scope, receive, send)
+            return
+        if profile_format not in PROFILE_FORMATS:
+            logger.warning("Unknown profile format: %r", profile_format)
+            await self.app(scope, receive, send)
+            return
+        if self.active:
+            logger.warning("Profile not taken, another request is being profiled")
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = state.get("trace_id", "request")
+        filename = trace_id + PROFILE_FORMATS[profile_format]
+        profile_header = (PROFILE_HEADER, filename.encode("latin-1"))
+
+        async def send_with_profile(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), profile_header]
+            await send(message)
+
+        coroutine = self.app(scope, receive, send_with_profile)
+        profiler = SamplingProfiler(coroutine, self.interval)  # type: ignore[arg-type]
+        self.active = True
+        profiler.start()
+        try:
+            await coroutine
+        finally:
+            profiler.stop()
+            self.active = False
+            await run_in_threadpool(
+                self.store, profiler, profile_format, trace_id, filename
+            )
+
+    def store(
+        self,
+        profiler: SamplingProfiler,
+        profile_format: bytes,
+        trace_id: str,
+        filename: str,
+    ) -> None:
+        """Writes a profile to the profile directory. Runs on a worker thread.
+
+        Args:
+            profiler (SamplingProfiler): The profiler of the request.
+            profile_format (bytes): The requested profile format.
+            trace_id (str): The trace ID of the request.
+            filename (str): The file name of the profile.
+        """
+        if profile_format == b"speedscope":
+            content = profiler.speedscope(trace_id)
+        else:
+            content = profiler.collapsed()
+        path = os.path.join(self.directory, filename)
+        try:
+            ensure_private_directory(self.directory)
+            fd = open_private_file(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(content)
+        except OSError as error:
+            logger.error("Failed to store profile at %s: %s", path, error)
+            return
+        logger.info("Stored profile of %.1fms at %s", profiler.duration * 1000, path)
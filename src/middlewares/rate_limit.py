@@ -0,0 +1,175 @@
+"""
+Middleware that rate limits requests per client using a `RateLimiter`.
+
+The middleware is implemented as a pure ASGI application. Allowed responses get
+`RateLimit-*` headers describing the client's quota. Requests over the limit are
+answered with a pre-rendered 429 response carrying the error payload slowapi's
+handler used to return, plus the `RateLimit-*` and `Retry-After` headers. When the
+limiter fails closed because its storage is unreachable, requests are answered with
+the same 503 response as `service_unavailable_handler`.
+"""
+
+import json
+import math
+from typing import Callable
+
+from fastapi import status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.logger import setup_logger
+from src.core.metrics import RATE_LIMIT_REJECTIONS
+from src.core.rate_limit import RateLimiter, RateLimitResult
+from src.exceptions.service_unavailable import (
+    ServiceUnavailableError,
+    service_unavailable_content,
+)
+
+logger = setup_logger(__name__)
+
+RawHeaders = list[tuple[bytes, bytes]]
+
+
+def rate_limit_content(detail: str) -> dict[str, str]:
+    """Builds the body of a 429 response.
+
+    Args:
+        detail (str): The limit that was exceeded, e.g. `100 per 1 minute`.
+
+    Returns:
+        dict[str, str]: The error response content.
+    """
+    return {
+        "status": "error",
+        "error": "rate_limit_exceeded",
+        "detail": "Rate limit exceeded: " + detail,
+    }
+
+
+def get_client_address(scope: Scope) -> str:
+    """Returns the client IP address, like slowapi's `get_remote_address`.
+
+    Args:
+        scope (Scope): The ASGI connection scope.
+
+    Returns:
+        str: The client host, or "127.0.0.1" if the server did not provide one.
+    """
+    client = scope.get("client")
+    return client[0] if client else "127.0.0.1"
+
+
+class RateLimitMiddleware:
+    """
+    Middleware that applies a rate limit to every HTTP request, keyed by `key_func`.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        key_func: Callable[[Scope], str] = get_client_address,
+    ):
+        """
+        Initialise the middleware and pre-render the constant parts of the responses.
+
+        Args:
+            app: The ASGI application instance.
+            limiter (RateLimiter): The limiter to check requests against.
+            key_func (Callable[[Scope], str]): Returns the rate limit key for a
+                                               request. Defaults to the client address.
+        """
+        self.app = app
+        self.limiter = limiter
+        self.key_func = key_func
+        self.rejections = RATE_LIMIT_REJECTIONS.labels()
+
+        limit = limiter.limit
+        self.limit_headers: RawHeaders = [
+            (b"ratelimit-limit", str(limit.amount).encode("latin-1")),
+            (
+                b"ratelimit-policy",
+                f"{limit.amount};w={int(limit.period)}".encode("latin-1"),
+            ),
+        ]
+        self.exceeded_body = json.dumps(
+            rate_limit_content(str(limit)), separators=(",", ":")
+        ).encode("utf-8")
+        self.exceeded_headers: RawHeaders = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self.exceeded_body)).encode("latin-1")),
+        ]
+
+    def quota_headers(self, result: RateLimitResult) -> RawHeaders:
+        """Builds the `RateLimit-*` headers for a rate limit check.
+
+        Args:
+            result (RateLimitResult): The outcome of the check.
+
+        Returns:
+            RawHeaders: The raw response headers.
+        """
+        return [
+            *self.limit_headers,
+            (b"ratelimit-remaining", b"%d" % result.remaining),
+            (b"ratelimit-reset", b"%d" % math.ceil(result.reset_after)),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Checks the request against the rate limit.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            result = await self.limiter.hit(self.key_func(scope))
+        except ServiceUnavailableError as exc:
+            body = json.dumps(
+                service_unavailable_content(exc.detail), separators=(",", ":")
+            ).encode("utf-8")
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", b"%d" % len(body)),
+                        (b"retry-after", b"%d" % exc.retry_after),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+        headers = self.quota_headers(result)
+
+        if not result.allowed:
+            self.rejections.inc()
+            logger.error("Rate limit exceeded error: %s", self.limiter.limit)
+            retry_after = max(math.ceil(result.retry_after), 1)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": status.HTTP_429_TOO_MANY_REQUESTS,
+                    "headers": [
+                        *self.exceeded_headers,
+                        *headers,
+                        (b"retry-after", b"%d" % retry_after),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": self.exceeded_body})
+            return
+
+        async def send_with_quota(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_quota)
@@ -0,0 +1,105 @@
+"""
+Middlewares that break the latency of each request down into stages, reported in
+the `Server-Timing` response header.
+
+`ServerTimingMiddleware` is the outermost middleware. It stores a `ServerTiming` in
+`server_timing_var` for the request and adds the header, with the total time until
+the response started, when the response starts. `StageMarkMiddleware` is placed
+directly inside each other middleware, and marks the end of that middleware's work
+before the request is passed on. Handlers and other code record their own stages
+with `timing_mark` and `timing_span`.
+
+The middlewares are only installed when `settings.server_timing_enabled` is set, so
+requests are not timed otherwise and the stage helpers return immediately.
+"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.context import ServerTiming, server_timing_var, timing_mark
+from src.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware that times each request and adds the `Server-Timing` header.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialise the middleware.
+
+        Args:
+            app: The ASGI application instance.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Times the request and reports its stages.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = ServerTiming()
+        token = server_timing_var.set(timing)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Time from the last stage until the response is started
+                timing.mark("response")
+                value = timing.header_value()
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (SERVER_TIMING_HEADER, value.encode("latin-1")),
+                ]
+                logger.debug(
+                    "Server timing for %s %s: %s", scope["method"], scope["path"], value
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            server_timing_var.reset(token)
+
+
+class StageMarkMiddleware:
+    """
+    Middleware ending a stage of the request timing, named after the middleware
+    directly wrapping it.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, app: ASGIApp, name: str):
+        """
+        Initialise the middleware.
+
+        Args:
+            app: The ASGI application instance.
+            name (str): The name of the stage ending here.
+        """
+        self.app = app
+        self.name = name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Marks the end of the stage and passes the request on.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        timing_mark(self.name)
+        await self.app(scope, receive, send)
@@ -4,18 +4,22 @@ Middleware to attach a unique trace ID to each incoming request.
 The trace ID is stored in both the request state and a context variable,
 allowing it to be accessed throughout the request lifecycle and included
 in logs or response headers for tracing purposes.
+
+The middleware is implemented as a pure ASGI application rather than a
+`BaseHTTPMiddleware`, so it does not spawn an extra task or buffer the response
+through memory streams. Streaming responses pass through untouched.
 """
 
 import uuid
-from typing import Awaitable, Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.core.context import trace_id_var
 
+TRACE_ID_HEADER = b"x-trace-id"
+
 
-class TraceIdMiddleware(BaseHTTPMiddleware):
+class TraceIdMiddleware:
     """
     Middleware that generates and attaches a trace ID to each request.
 
@@ -26,29 +30,44 @@ class TraceIdMiddleware(BaseHTTPMiddleware):
     """
 
     # pylint: disable=too-few-public-methods
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        """Handles the request lifecycle by injecting a trace ID.
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialise the middleware.
 
         Args:
-            request (Request): The incoming FastAPI request.
-            call_next (Callable): The next middleware or route handler.
+            app: The ASGI application instance.
+        """
+        self.app = app
 
-        Returns:
-            Response: The HTTP response with the trace ID added to headers.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handles the request lifecycle by injecting a trace ID.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Generate a unique trace ID
         trace_id = str(uuid.uuid4())
+        trace_id_header = (TRACE_ID_HEADER, trace_id.encode("latin-1"))
 
         # Add the trace ID to the request state
-        request.state.trace_id = trace_id
-        trace_id_var.set(trace_id)
-
-        # Call the next middleware or the actual request handler
-        response = await call_next(request)
+        scope.setdefault("state", {})["trace_id"] = trace_id
+        token = trace_id_var.set(trace_id)
 
-        # Optionally add the trace ID to response headers
-        response.headers["X-Trace-ID"] = trace_id
+        async def send_with_trace_id(message: Message) -> None:
+            # Only the start message carries headers, body chunks are forwarded as-is
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), trace_id_header]
+            await send(message)
 
-        return response
+        try:
+            # Call the next middleware or the actual request handler
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            trace_id_var.reset(token)
@@ -4,15 +4,19 @@ Data models for auth.
 
 from datetime import datetime
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class UserBase(BaseModel):
     """
     Base user model containing common fields shared across different user-related
     models.
+
+    Instances are immutable so they can be shared from the user profile cache.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     username: str = Field(..., min_length=3)
     first_name: str = Field(..., min_length=1)
     last_name: str = Field(..., min_length=1)
@@ -40,7 +44,19 @@ class Token(BaseModel):
 
 
 class TokenData(BaseModel):
-    """Data model for the JWT token payload."""
+    """Data model for the JWT token payload.
+
+    Instances are immutable so they can be safely shared from the token cache.
+    """
+
+    model_config = ConfigDict(frozen=True)
 
     sub: str  # The subject (e.g., user ID or username)
     exp: datetime  # The expiration time of the token
+    jti: str | None = None  # The token ID, None for tokens issued before token IDs
+
+
+class TokenIn(BaseModel):
+    """Data model for an access token sent by a client, e.g. to revoke it."""
+
+    token: str
@@ -4,22 +4,30 @@ Auth API routes.
 
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from jwt import PyJWTError
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
 from src.core.logger import setup_logger
-from src.core.security import create_access_token
+from src.core.metrics import AUTH_FAILURES
+from src.core.security import create_access_token, decode_token, revoke_token
 from src.core.settings import settings
-from src.models import Token, TokenData, UserIn
+from src.models import MessageResponse, Token, TokenData, TokenIn, UserIn
+from src.routes.base import StandardRoute
+from src.services.user_repository import UserAlreadyExistsError
 from src.services.users import authenticate_user, create_user, user_exists
 
 logger = setup_logger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=StandardRoute)
+
+INVALID_CREDENTIALS_FAILURES = AUTH_FAILURES.labels("invalid_credentials")
 
 
 @router.post("/register", response_model=Token)
-def register(user_in: UserIn) -> Token:
+async def register(user_in: UserIn) -> Token:
     """
     Registers a new user and returns a JWT access token.
 
@@ -34,18 +42,25 @@ def register(user_in: UserIn) -> Token:
     Returns:
         Token: The access token, its type (bearer) and the expiration datetime.
     """
-    if user_exists(user_in.username):
+    if await user_exists(user_in.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists"
         )
 
-    user = create_user(
-        user_in.username,
-        user_in.password,
-        user_in.first_name,
-        user_in.last_name,
-        user_in.email,
-    )
+    # The check above skips hashing for taken usernames, but a concurrent
+    # registration can still take the username while the password is hashed
+    try:
+        user = await create_user(
+            user_in.username,
+            user_in.password,
+            user_in.first_name,
+            user_in.last_name,
+            user_in.email,
+        )
+    except UserAlreadyExistsError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists"
+        ) from error
 
     logger.info("Registered new user: %s", user_in.username)
 
@@ -60,7 +75,7 @@ def register(user_in: UserIn) -> Token:
 
 
 @router.post("/token", response_model=Token, response_class=JSONResponse)
-def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
+async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
     """
     Authenticates a user and returns a JWT access token using the OAuth2 password flow.
 
@@ -77,9 +92,10 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
     Returns:
         Token: The access token, its type (bearer) and the expiration datetime.
     """
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
 
     if not user:
+        INVALID_CREDENTIALS_FAILURES.inc()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -94,3 +110,73 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
     return Token(
         access_token=access_token, token_type="bearer", expires_at=expire.isoformat()
     )
+
+
+@router.post("/logout", response_model=MessageResponse)
+async def logout(request: Request) -> MessageResponse:
+    """
+    Revokes the access token the request was made with, so it is rejected until it
+    expires. Without `settings.revocation_file` revocations are kept in memory per
+    worker, so with several workers only the one serving this request rejects it.
+
+    Args:
+        request (Request): The incoming request, authenticated by `AuthMiddleware`.
+
+    Raises:
+        HTTPException: If the token has no token ID, raises a 400 error.
+
+    Returns:
+        MessageResponse: A message confirming the logout.
+    """
+    # Persisting the revocation blocks on the denylist file
+    if not await run_in_threadpool(revoke_token, request.state.token):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked",
+        )
+
+    logger.info("User logged out: %s", request.state.user.username)
+
+    return MessageResponse(message="Successfully logged out")
+
+
+@router.post("/revoke", response_model=MessageResponse)
+async def revoke(token_in: TokenIn, request: Request) -> MessageResponse:
+    """
+    Revokes another access token of the current user, e.g. one that has leaked, so
+    it is rejected until it expires. Per worker without `settings.revocation_file`,
+    see `logout`.
+
+    Args:
+        token_in (TokenIn): The access token to revoke.
+        request (Request): The incoming request, authenticated by `AuthMiddleware`.
+
+    Raises:
+        HTTPException: If the token is invalid, expired or has no token ID, raises a
+                       400 error. If it belongs to another user, raises a 403 error.
+
+    Returns:
+        MessageResponse: A message confirming the revocation.
+    """
+    try:
+        payload = decode_token(token_in.token)
+    except (PyJWTError, ValidationError) as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token"
+        ) from error
+
+    username = request.state.user.username
+    if payload.sub != username:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token belongs to another user",
+        )
+    if not await run_in_threadpool(revoke_token, payload):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked",
+        )
+
+    logger.info("User revoked a token: %s", username)
+
+    return MessageResponse(message="Token revoked")
@@ -0,0 +1,214 @@
+"""
+Shared response and route classes for the API routers.
+
+`StandardRoute` adds a fast path for routes that declare a `response_model`: when the
+endpoint returns an instance of exactly that model, FastAPI's revalidation, dump to a
+dict and second serialization are skipped. The model is serialized once to JSON bytes
+with a cached `TypeAdapter` and spliced straight into the response body.
+
+Routes whose endpoint is decorated with `cache_response` serve GET requests from the
+response cache, with ETags and 304 responses, see `src.core.response_cache`.
+
+When `settings.server_timing_enabled` is set, `StandardRoute` also marks the
+"validation" stage (routing, dependencies and request parsing) and the "handler"
+stage of each request, and serialization is timed as "render".
+"""
+
+import functools
+import inspect
+from typing import Any, Callable
+
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.models import Dependant
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from starlette.routing import request_response
+
+from src.core.context import timing_mark, timing_span
+from src.core.response_cache import CachedEndpoint, get_response_cache_config
+from src.core.settings import settings
+from src.utils.serialization import dumps
+
+
+class EncodedJSON:  # pylint: disable=too-few-public-methods
+    """JSON content that has already been serialized to bytes."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        """
+        Initialise the wrapper.
+
+        Args:
+            data (bytes): The UTF-8 encoded JSON document.
+        """
+        self.data = data
+
+
+class StandardResponse(JSONResponse):
+    """
+    Custom response class to standardise the response format for success.
+
+    Inherits from `JSONResponse` to provide JSON response functionality. Only the
+    content is serialized, the constant envelope around it is spliced in as
+    pre-encoded bytes.
+    """
+
+    ENVELOPE_PREFIX = b'{"status":"success","detail":'
+    ENVELOPE_SUFFIX = b"}"
+
+    def render(self, content: Any) -> bytes:
+        """
+        Renders the response content by wrapping it in a standardised success format.
+
+        Args:
+            content (Any): The original content to include in the response, or
+                           `EncodedJSON` if it is already serialized.
+
+        Returns:
+            bytes: The serialized JSON response with the standardised structure.
+        """
+        with timing_span("render"):
+            data = content.data if isinstance(content, EncodedJSON) else dumps(content)
+            return b"".join((self.ENVELOPE_PREFIX, data, self.ENVELOPE_SUFFIX))
+
+
+@functools.lru_cache(maxsize=None)
+def get_type_adapter(model: Any) -> TypeAdapter[Any]:
+    """
+    Returns a cached `TypeAdapter` for a response model.
+
+    Args:
+        model (Any): The response model type.
+
+    Returns:
+        TypeAdapter: The adapter used to serialize instances of the model.
+    """
+    return TypeAdapter(model)
+
+
+def _uses_response_param(dependant: Dependant) -> bool:
+    """Returns whether the endpoint or any dependency injects the `Response`."""
+    return dependant.response_param_name is not None or any(
+        _uses_response_param(dependency) for dependency in dependant.dependencies
+    )
+
+
+def _timed(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps an endpoint to mark the end of the "validation" and "handler" stages."""
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_endpoint(*args: Any, **kwargs: Any) -> Any:
+            timing_mark("validation")
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                timing_mark("handler")
+
+        return async_endpoint
+
+    @functools.wraps(call)
+    def endpoint(*args: Any, **kwargs: Any) -> Any:
+        timing_mark("validation")
+        try:
+            return call(*args, **kwargs)
+        finally:
+            timing_mark("handler")
+
+    return endpoint
+
+
+class StandardRoute(APIRoute):
+    """
+    API route that serializes matching response models only once.
+
+    The fast path applies when the route has a `response_model`, its response class is
+    `StandardResponse` or `JSONResponse`, none of the `response_model_include`,
+    `response_model_exclude` or `response_model_exclude_*` options are used and no
+    dependency injects the `Response`. Any other return value, including subclasses
+    of the response model, goes through FastAPI's normal validation.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        """
+        Initialise the route and install the fast path and response cache if they
+        apply.
+
+        Args:
+            path (str): The route path.
+            endpoint (Callable[..., Any]): The endpoint function.
+            **kwargs: Any other `APIRoute` arguments.
+        """
+        super().__init__(path, endpoint, **kwargs)
+        response_class: type[Response] = (
+            self.response_class.value
+            if isinstance(self.response_class, DefaultPlaceholder)
+            else self.response_class
+        )
+        call = self.dependant.call
+        assert call is not None
+        if settings.server_timing_enabled:
+            call = _timed(call)
+        if (
+            self.response_model is not None
+            and issubclass(response_class, JSONResponse)
+            and not self._changes_response_content()
+            and not _uses_response_param(self.dependant)
+        ):
+            call = self._fast_path(call, response_class)
+
+        if call is not self.dependant.call:
+            self.dependant.call = call
+            self.app = request_response(self.get_route_handler())
+
+        cache_config = get_response_cache_config(endpoint)
+        if cache_config is not None and "GET" in self.methods:
+            self.app = CachedEndpoint(self.app, cache_config)
+
+    def _changes_response_content(self) -> bool:
+        """Returns whether any `response_model_*` option filters the model fields."""
+        return (
+            self.response_model_include is not None
+            or self.response_model_exclude is not None
+            or self.response_model_exclude_unset
+            or self.response_model_exclude_defaults
+            or self.response_model_exclude_none
+        )
+
+    def _fast_path(
+        self, call: Callable[..., Any], response_class: type[JSONResponse]
+    ) -> Callable[..., Any]:
+        """Wraps the endpoint so matching models are returned as ready responses."""
+        model = self.response_model
+        adapter = get_type_adapter(model)
+        by_alias = self.response_model_by_alias
+        status_code = self.status_code or 200
+        envelope = issubclass(response_class, StandardResponse)
+
+        def encode(result: Any) -> Any:
+            if type(result) is not model:  # pylint: disable=unidiomatic-typecheck
+                return result
+            with timing_span("render"):
+                data = adapter.dump_json(result, by_alias=by_alias)
+            if envelope:
+                return response_class(EncodedJSON(data), status_code=status_code)
+            return Response(
+                data, status_code=status_code, media_type="application/json"
+            )
+
+        if inspect.iscoroutinefunction(call):
+
+            @functools.wraps(call)
+            async def async_endpoint(*args: Any, **kwargs: Any) -> Any:
+                return encode(await call(*args, **kwargs))
+
+            return async_endpoint
+
+        @functools.wraps(call)
+        def endpoint(*args: Any, **kwargs: Any) -> Any:
+            return encode(call(*args, **kwargs))
+
+        return endpoint
@@ -5,8 +5,9 @@ Test API routes to ensure functionality for errors.
 from fastapi import APIRouter
 
 from src.models import ErrorRouteResponse
+from src.routes.base import StandardRoute
 
-router = APIRouter()
+router = APIRouter(route_class=StandardRoute)
 
 
 @router.get("/force", response_model=ErrorRouteResponse)
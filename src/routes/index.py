@@ -4,12 +4,15 @@ Index API routes.
 
 from fastapi import APIRouter
 
+from src.core.response_cache import cache_response
 from src.models import MessageResponse
+from src.routes.base import StandardRoute
 
-router = APIRouter()
+router = APIRouter(route_class=StandardRoute)
 
 
 @router.get("/", response_model=MessageResponse)
+@cache_response()
 def get_index() -> object:
     """Handles the root route of the API.
 
@@ -0,0 +1,40 @@
+"""
+JWKS API route, served outside the API prefix and without authentication so services
+can verify tokens themselves with the public keys of the key ring.
+"""
+
+from fastapi import APIRouter, Request, Response
+
+from src.core.response_cache import etag_matches
+from src.core.security import get_key_ring
+from src.core.settings import settings
+
+CONTENT_TYPE = "application/jwk-set+json"
+
+router = APIRouter()
+
+
+@router.get("/.well-known/jwks.json", include_in_schema=False)
+async def get_jwks(request: Request) -> Response:
+    """Returns the public keys tokens are signed with as a JSON Web Key Set.
+
+    The JWKS is rendered when the key ring is loaded. Clients may cache it for
+    `settings.jwks_max_age_seconds` and revalidate it with its ETag.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        Response: The JWKS, or 304 Not Modified when the client's copy is current.
+    """
+    ring = get_key_ring()
+    headers = {
+        "ETag": ring.jwks_etag.decode(),
+        "Cache-Control": f"public, max-age={settings.jwks_max_age_seconds}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(
+        if_none_match.encode("latin-1"), ring.jwks_etag
+    ):
+        return Response(status_code=304, headers=headers)
+    return Response(ring.jwks, media_type=CONTENT_TYPE, headers=headers)
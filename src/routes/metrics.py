@@ -0,0 +1,25 @@
+"""
+Metrics API route, served outside the API prefix and without authentication so it
+can be scraped by Prometheus.
+"""
+
+from fastapi import APIRouter, Response
+
+from src.core.metrics import REGISTRY
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """Returns the application metrics in the Prometheus text format.
+
+    The metrics of all workers are read from disk, so the route is synchronous and
+    runs in the thread pool.
+
+    Returns:
+        Response: The metrics exposition.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,301 @@
+"""
+User storage backends.
+
+`UserRepository` defines the async interface used by the user services. Two
+implementations are provided:
+- `InMemoryUserRepository`: a process-local dict, used by default and in tests.
+- `SQLiteUserRepository`: a persistent SQLite database accessed from a dedicated
+  thread pool so queries never block the event loop.
+"""
+
+import asyncio
+import functools
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Protocol, TypeVar
+
+from src.models import User, UserBase
+
+T = TypeVar("T")
+
+USER_COLUMNS = "username, hashed_password, first_name, last_name, email"
+
+# Statements are kept as constants so sqlite3's per-connection statement cache reuses
+# the prepared statement on every call
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    hashed_password TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    email TEXT NOT NULL
+)
+"""
+CREATE_INDEX_SQL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username)"
+)
+SELECT_USER_SQL = f"SELECT {USER_COLUMNS} FROM users WHERE username = ?"
+SELECT_USER_BASE_SQL = (
+    "SELECT username, first_name, last_name, email FROM users WHERE username = ?"
+)
+USER_EXISTS_SQL = "SELECT 1 FROM users WHERE username = ?"
+INSERT_USER_SQL = f"INSERT INTO users ({USER_COLUMNS}) VALUES (?, ?, ?, ?, ?)"
+
+
+class UserAlreadyExistsError(Exception):
+    """Raised when creating a user whose username is taken."""
+
+    def __init__(self, username: str):
+        """
+        Initialise the error.
+
+        Args:
+            username (str): The username that is taken.
+        """
+        super().__init__(f"User already exists: {username}")
+        self.username = username
+
+
+class UserRepository(Protocol):
+    """Async interface for reading and writing users."""
+
+    async def get(self, username: str) -> User | None:
+        """Returns the user with the given username, including the password hash."""
+
+    async def exists(self, username: str) -> bool:
+        """Returns whether a user with the given username exists."""
+
+    async def create(self, user: User) -> User:
+        """Stores a new user, raising `UserAlreadyExistsError` if the username is
+        taken."""
+
+    async def get_base(self, username: str) -> UserBase | None:
+        """Returns the user with the given username, without the password hash."""
+
+    async def close(self) -> None:
+        """Releases any resources held by the repository."""
+
+
+class InMemoryUserRepository:
+    """User repository backed by a process-local dict."""
+
+    def __init__(self, users: list[User] | None = None):
+        """
+        Initialise the repository.
+
+        Args:
+            users (list[User] | None): Users to seed the repository with.
+        """
+        self.users = {user.username: user for user in users or []}
+
+    async def get(self, username: str) -> User | None:
+        """Returns the user with the given username, including the password hash.
+
+        Args:
+            username (str): The username to look up.
+
+        Returns:
+            User | None: The user if found, otherwise None.
+        """
+        return self.users.get(username)
+
+    async def exists(self, username: str) -> bool:
+        """Returns whether a user with the given username exists.
+
+        Args:
+            username (str): The username to check.
+
+        Returns:
+            bool: True if the user exists, False otherwise.
+        """
+        return username in self.users
+
+    async def create(self, user: User) -> User:
+        """Stores a new user.
+
+        Args:
+            user (User): The user to store.
+
+        Returns:
+            User: The stored user.
+
+        Raises:
+            UserAlreadyExistsError: If a user with the same username exists.
+        """
+        # No await between the check and the write, so creation is atomic
+        if user.username in self.users:
+            raise UserAlreadyExistsError(user.username)
+        self.users[user.username] = user
+        return user
+
+    async def get_base(self, username: str) -> UserBase | None:
+        """Returns the user with the given username, without the password hash.
+
+        Args:
+            username (str): The username to look up.
+
+        Returns:
+            UserBase | None: The user if found, otherwise None.
+        """
+        user = self.users.get(username)
+        if user is None:
+            return None
+        # Stored users are already validated, so skip revalidation
+        return UserBase.model_construct(
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            email=user.email,
+        )
+
+    async def close(self) -> None:
+        """Nothing to release for the in-memory repository."""
+
+
+class SQLiteUserRepository:
+    """User repository backed by a SQLite database.
+
+    Queries run on a dedicated thread pool where every worker thread keeps its own
+    connection, giving a connection pool of `pool_size` connections. The database
+    uses WAL mode so readers do not block each other or the writer, and usernames
+    are indexed.
+
+    Note that each connection to `:memory:` opens a separate database, so a file
+    path should be used.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4):
+        """
+        Initialise the repository. Connections are opened lazily.
+
+        Args:
+            path (str): The path of the SQLite database file.
+            pool_size (int): The number of worker threads and connections.
+        """
+        self.path = path
+        self.pool_size = pool_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="sqlite"
+        )
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns the calling worker thread's connection, opening it if needed."""
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(CREATE_TABLE_SQL)
+            connection.execute(CREATE_INDEX_SQL)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    async def _run(self, query: Callable[[sqlite3.Connection], T]) -> T:
+        """Runs a query function with a pooled connection on a worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: query(self._connection())
+        )
+
+    @staticmethod
+    def _fetch_one(sql: str, *params: Any) -> Callable[[sqlite3.Connection], Any]:
+        """Builds a query function returning the first row of a statement."""
+
+        def query(connection: sqlite3.Connection) -> Any:
+            return connection.execute(sql, params).fetchone()
+
+        return query
+
+    async def get(self, username: str) -> User | None:
+        """Returns the user with the given username, including the password hash.
+
+        Args:
+            username (str): The username to look up.
+
+        Returns:
+            User | None: The user if found, otherwise None.
+        """
+        row = await self._run(self._fetch_one(SELECT_USER_SQL, username))
+        if row is None:
+            return None
+        return User(
+            username=row[0],
+            hashed_password=row[1],
+            first_name=row[2],
+            last_name=row[3],
+            email=row[4],
+        )
+
+    async def exists(self, username: str) -> bool:
+        """Returns whether a user with the given username exists.
+
+        Args:
+            username (str): The username to check.
+
+        Returns:
+            bool: True if the user exists, False otherwise.
+        """
+        return await self._run(self._fetch_one(USER_EXISTS_SQL, username)) is not None
+
+    async def create(self, user: User) -> User:
+        """Stores a new user. The unique index on usernames makes creation atomic.
+
+        Args:
+            user (User): The user to store.
+
+        Returns:
+            User: The stored user.
+
+        Raises:
+            UserAlreadyExistsError: If a user with the same username exists.
+        """
+        try:
+            await self._run(
+                self._fetch_one(
+                    INSERT_USER_SQL,
+                    user.username,
+                    user.hashed_password,
+                    user.first_name,
+                    user.last_name,
+                    user.email,
+                )
+            )
+        except sqlite3.IntegrityError as error:
+            raise UserAlreadyExistsError(user.username) from error
+        return user
+
+    async def get_base(self, username: str) -> UserBase | None:
+        """Returns the user with the given username, without the password hash.
+
+        Args:
+            username (str): The username to look up.
+
+        Returns:
+            UserBase | None: The user if found, otherwise None.
+        """
+        row = await self._run(self._fetch_one(SELECT_USER_BASE_SQL, username))
+        if row is None:
+            return None
+        # Rows were validated when the user was created, so skip revalidation
+        return UserBase.model_construct(
+            username=row[0], first_name=row[1], last_name=row[2], email=row[3]
+        )
+
+    async def close(self) -> None:
+        """Waits for running queries and closes all pooled connections."""
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._executor.shutdown, wait=True)
+        )
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
@@ -1,25 +1,99 @@
 """
-Fake user database. To be replaced.
+User services backed by a pluggable `UserRepository`.
+
+The repository is selected by `settings.user_store`. The default in-memory store is a
+fake user database seeded with a demo user and should be replaced with a persistent
+store in production.
+
+User profiles returned by `get_user_base` are cached per process, so the auth hot
+path does no repository or Pydantic work for known users. Any code that changes a
+user must call `invalidate_user_cache`.
 """
 
-from src.core.security import get_password_hash, verify_password
+from src.core.response_cache import invalidate_cached_responses
+from src.core.security import get_password_hash_async, verify_password_async
+from src.core.settings import settings
 from src.models import User, UserBase
-
-# Simulated user DB
-fake_users_db = {
-    "user": User(
+from src.services.user_repository import (
+    InMemoryUserRepository,
+    SQLiteUserRepository,
+    UserRepository,
+)
+from src.utils.ttl_cache import TTLCache
+
+# Demo user for the in-memory store. The password ("password") is hashed ahead of
+# time so importing this module does not run bcrypt.
+SEED_USERS = [
+    User(
         username="user",
-        hashed_password=get_password_hash("password"),
+        hashed_password="$2b$12$6Q8B.JqP.J/7vxLsD8ve1uEUsC8d0YQTQpoM9KIRhUMgCajvA608S",
         first_name="Jane",
         last_name="Doe",
         email="jane.doe@testuser.com",
     )
-}
+]
+
+_repository: UserRepository | None = None
+
+# Immutable user profiles keyed by username
+user_cache: TTLCache[str, UserBase] = TTLCache(
+    max_size=settings.user_cache_max_size, ttl=settings.user_cache_ttl_seconds
+)
+
+
+def get_user_repository() -> UserRepository:
+    """
+    Returns the configured user repository, creating it on first use.
+
+    Returns:
+        UserRepository: The repository selected by `settings.user_store`.
+    """
+    global _repository  # pylint: disable=global-statement
+    if _repository is None:
+        if settings.user_store == "sqlite":
+            _repository = SQLiteUserRepository(
+                settings.sqlite_path, pool_size=settings.sqlite_pool_size
+            )
+        else:
+            _repository = InMemoryUserRepository(SEED_USERS)
+    return _repository
+
+
+def set_user_repository(repository: UserRepository | None) -> None:
+    """
+    Replaces the user repository, e.g. to use a different backend in tests.
+
+    Args:
+        repository (UserRepository | None): The repository to use. None resets it so
+                                            the configured one is created on next use.
+    """
+    global _repository  # pylint: disable=global-statement
+    _repository = repository
+    user_cache.clear()
 
 
-def user_exists(username: str) -> bool:
+def invalidate_user_cache(username: str) -> None:
     """
-    Checks if a user already exists in the fake user database.
+    Drops a user's cached profile and the responses cached for them. Must be called
+    whenever a user is changed.
+
+    Args:
+        username (str): The username whose profile changed.
+    """
+    user_cache.invalidate(username)
+    invalidate_cached_responses(username=username)
+
+
+async def close_user_repository() -> None:
+    """Closes the current user repository, if one has been created."""
+    if _repository is not None:
+        await _repository.close()
+        set_user_repository(None)
+
+
+async def user_exists(username: str) -> bool:
+    """
+    Checks if a user already exists.
 
     Args:
         username (str): The username to check.
@@ -27,12 +101,12 @@ def user_exists(username: str) -> bool:
     Returns:
         bool: True if the user exists, False otherwise.
     """
-    return username in fake_users_db
+    return await get_user_repository().exists(username)
 
 
-def get_user(username: str) -> User | None:
+async def get_user(username: str) -> User | None:
     """
-    Retrieves a user from the fake user database by username.
+    Retrieves a user by username.
 
     Args:
         username (str): The username to search for in the database.
@@ -40,13 +114,13 @@ def get_user(username: str) -> User | None:
     Returns:
         Optional[User]: The user if found, otherwise None.
     """
-    return fake_users_db.get(username)
+    return await get_user_repository().get(username)
 
 
-def get_user_base(username: str) -> UserBase | None:
+async def get_user_base(username: str) -> UserBase | None:
     """
-    Retrieves a user from the fake user database by username but does not return
-    password.
+    Retrieves a user by username but does not return password. Profiles are served
+    from the user cache when possible.
 
     Args:
         username (str): The username to search for in the database.
@@ -54,18 +128,20 @@ def get_user_base(username: str) -> UserBase | None:
     Returns:
         Optional[UserBase]: The user if found, otherwise None.
     """
-    user_data = fake_users_db.get(username)
-    if user_data:
-        return UserBase(**user_data.model_dump(exclude={"hashed_password"}))
-    return None
+    user = user_cache.get(username)
+    if user is None:
+        user = await get_user_repository().get_base(username)
+        if user is not None:
+            user_cache.set(username, user)
+    return user
 
 
-def create_user(
+async def create_user(
     username: str, password: str, first_name: str, last_name: str, email: str
 ) -> User:
     """
-    Creates a new user, hashes the password, and stores the user in the fake user
-    database.
+    Creates a new user, hashes the password, and stores the user in the user
+    repository.
 
     Args:
         username (str): The username for the new user.
@@ -73,8 +149,12 @@ def create_user(
 
     Returns:
         User: The newly created user.
+
+    Raises:
+        UserAlreadyExistsError: If the username is taken, e.g. by a concurrent
+                                registration.
     """
-    hashed_password = get_password_hash(password)
+    hashed_password = (await get_password_hash_async(password)).decode("utf-8")
     user = User(
         username=username,
         hashed_password=hashed_password,
@@ -82,11 +162,12 @@ def create_user(
         last_name=last_name,
         email=email,
     )
-    fake_users_db[username] = user
+    user = await get_user_repository().create(user)
+    invalidate_user_cache(username)
     return user
 
 
-def authenticate_user(username: str, password: str) -> User | None:
+async def authenticate_user(username: str, password: str) -> User | None:
     """
     Authenticates a user by checking the password.
 
@@ -97,7 +178,7 @@ def authenticate_user(username: str, password: str) -> User | None:
     Returns:
         Optional[User]: The user if authentication is successful, otherwise None.
     """
-    user = get_user(username)
-    if user and verify_password(password, user.hashed_password):
+    user = await get_user(username)
+    if user and await verify_password_async(password, user.hashed_password):
         return user
     return None
@@ -0,0 +1,142 @@
+"""
+Response body encoders and `Accept-Encoding` negotiation.
+
+gzip is always available. Brotli is used when `brotli` is installed
+(`poetry add brotli`) and zstd when `zstandard` is installed (`poetry add zstandard`)
+or the standard library has `compression.zstd` (Python 3.14+). When a client accepts
+several encodings equally, zstd is preferred, then brotli, then gzip.
+
+The levels favour speed, since responses are compressed on every request: brotli's
+quality 4 and zstd's level 3 compress about as fast as gzip's level 6 but smaller.
+"""
+
+import gzip
+from typing import Any, Callable
+
+try:
+    import brotli  # type: ignore[import-not-found, unused-ignore]
+except ImportError:  # pragma: no cover - exercised when the extra is not installed
+    brotli = None  # type: ignore[assignment, unused-ignore]
+
+try:
+    import zstandard  # type: ignore[import-not-found, unused-ignore]
+except ImportError:  # pragma: no cover - exercised when the extra is not installed
+    zstandard = None  # type: ignore[assignment, unused-ignore]
+
+try:
+    from compression import zstd  # type: ignore[import-not-found, unused-ignore]
+except ImportError:  # pragma: no cover - before Python 3.14
+    zstd = None  # type: ignore[assignment, unused-ignore]
+
+Encoder = Callable[[bytes], bytes]
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+def gzip_encode(data: bytes) -> bytes:
+    """Compresses data with gzip, without a timestamp so output is deterministic.
+
+    Args:
+        data (bytes): The data to compress.
+
+    Returns:
+        bytes: The compressed data.
+    """
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def brotli_encode(data: bytes) -> bytes:
+    """Compresses data with brotli.
+
+    Args:
+        data (bytes): The data to compress.
+
+    Returns:
+        bytes: The compressed data.
+    """
+    result: bytes = brotli.compress(data, quality=BROTLI_QUALITY)
+    return result
+
+
+def zstd_encode(data: bytes) -> bytes:
+    """Compresses data with zstd.
+
+    Args:
+        data (bytes): The data to compress.
+
+    Returns:
+        bytes: The compressed data.
+    """
+    if zstd is not None:
+        result: bytes = zstd.compress(data, level=ZSTD_LEVEL)
+    else:
+        # Compressors are not thread safe, so each call gets its own
+        result = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return result
+
+
+def get_encoders() -> dict[str, Encoder]:
+    """Returns the available encoders by content coding, most preferred first.
+
+    Returns:
+        dict[str, Encoder]: The encoder of each available content coding.
+    """
+    encoders: dict[str, Encoder] = {}
+    if zstd is not None or zstandard is not None:
+        encoders["zstd"] = zstd_encode
+    if brotli is not None:
+        encoders["br"] = brotli_encode
+    encoders["gzip"] = gzip_encode
+    return encoders
+
+
+def parse_accept_encoding(header: bytes) -> dict[str, float]:
+    """Parses an `Accept-Encoding` header into the quality of each coding.
+
+    Args:
+        header (bytes): The header value, e.g. `gzip, br;q=0.9, *;q=0`.
+
+    Returns:
+        dict[str, float]: The quality of each listed coding, in lower case.
+    """
+    qualities = {}
+    for item in header.decode("latin-1").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def choose_encoding(header: bytes | None, encoders: dict[str, Any]) -> str | None:
+    """Chooses the content coding of a response.
+
+    Args:
+        header (bytes | None): The request's `Accept-Encoding` header.
+        encoders (dict[str, Any]): The available codings, most preferred first.
+
+    Returns:
+        str | None: The accepted coding with the highest quality, ties going to the
+                    most preferred, or None to send the response unencoded.
+    """
+    if not header:
+        return None
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in encoders:
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
@@ -0,0 +1,61 @@
+"""
+Utility for matching URL paths against a precompiled set of rules.
+"""
+
+import fnmatch
+import re
+
+GLOB_CHARS = frozenset("*?[")
+
+
+class PathMatcher:
+    """Matches URL paths against exact, prefix and glob rules.
+
+    Rules are compiled once so each lookup costs a set lookup, a single
+    `str.startswith` call and at most one regular expression match.
+
+    Supported rule formats:
+    - Exact: `/api/v1/token` matches only that path.
+    - Prefix: `/static/*` matches any path starting with `/static/`.
+    - Glob: `/api/*/health` uses `fnmatch` syntax (`*`, `?`, `[...]`).
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, rules: list[str]):
+        """
+        Compile the given rules.
+
+        Args:
+            rules (list[str]): The path rules to match against.
+        """
+        exact: set[str] = set()
+        prefixes: list[str] = []
+        globs: list[str] = []
+
+        for rule in rules:
+            if rule.endswith("*") and not GLOB_CHARS.intersection(rule[:-1]):
+                prefixes.append(rule[:-1])
+            elif GLOB_CHARS.intersection(rule):
+                globs.append(fnmatch.translate(rule))
+            else:
+                exact.add(rule)
+
+        self.exact = frozenset(exact)
+        self.prefixes = tuple(prefixes)
+        self.glob = re.compile("|".join(globs)) if globs else None
+
+    def matches(self, path: str) -> bool:
+        """Checks whether a path matches any of the rules.
+
+        Args:
+            path (str): The URL path to check.
+
+        Returns:
+            bool: True if the path matches a rule, False otherwise.
+        """
+        if path in self.exact:
+            return True
+        if self.prefixes and path.startswith(self.prefixes):
+            return True
+        return self.glob is not None and self.glob.match(path) is not None
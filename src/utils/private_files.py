@@ -0,0 +1,75 @@
+"""
+Utilities for files shared between the processes of one deployment.
+
+Such files live in directories only the current user can access, and are opened
+without following symbolic links, so other local users can neither read them nor
+plant files or links for the app to overwrite.
+"""
+
+import os
+import stat
+
+
+def ensure_private_directory(path: str) -> None:
+    """Creates a directory only the current user can access, or checks an existing one.
+
+    Args:
+        path (str): The directory.
+
+    Raises:
+        PermissionError: If the path is not a directory owned by the current user, or
+                         other users can access it.
+        OSError: If the directory cannot be created.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise PermissionError(
+            f"{path} must be a directory owned by the current user that other users "
+            "cannot access (mode 0700)"
+        )
+
+
+def is_private_file(path: str) -> bool:
+    """Returns whether a path is a regular file owned by the current user.
+
+    Symbolic links are not followed, so a link is never a private file.
+
+    Args:
+        path (str): The path.
+
+    Returns:
+        bool: True if the path is a regular file of the current user.
+    """
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    return stat.S_ISREG(info.st_mode) and info.st_uid == os.getuid()
+
+
+def open_private_file(path: str, flags: int) -> int:
+    """Opens a regular file of the current user without following symbolic links.
+
+    Args:
+        path (str): The path of the file.
+        flags (int): The `os.open` flags, e.g. `os.O_RDWR | os.O_CREAT`. Created
+                     files are only accessible to the current user.
+
+    Returns:
+        int: The file descriptor.
+
+    Raises:
+        PermissionError: If the file is not a regular file of the current user.
+        OSError: If the file cannot be opened, e.g. because it is a symbolic link.
+    """
+    fd = os.open(path, flags | os.O_NOFOLLOW, 0o600)
+    info = os.fstat(fd)
+    if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid():
+        os.close(fd)
+        raise PermissionError(f"{path} is not a regular file of the current user")
+    return fd
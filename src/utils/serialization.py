@@ -0,0 +1,73 @@
+"""
+Fast JSON serialization helpers.
+
+`orjson` is used when it is installed (`poetry add orjson`), otherwise the standard
+library `json` module is used. Both produce compact UTF-8 output that matches
+Starlette's `JSONResponse` for JSON-compatible values.
+"""
+
+import dataclasses
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when the extra is not installed
+    orjson = None  # type: ignore[assignment]
+
+
+def default(obj: Any) -> Any:
+    """Converts values that are not natively JSON serializable.
+
+    Args:
+        obj (Any): The value the encoder could not serialize.
+
+    Returns:
+        Any: A JSON serializable representation of the value.
+
+    Raises:
+        TypeError: If the value type is not supported.
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (UUID, Decimal)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializes a value to compact UTF-8 encoded JSON.
+
+    Supports Pydantic models, datetimes and non-string dict keys in addition to the
+    standard JSON types.
+
+    Args:
+        obj (Any): The value to serialize.
+
+    Returns:
+        bytes: The JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=default,
+    ).encode("utf-8")
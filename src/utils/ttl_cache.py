@@ -0,0 +1,155 @@
+"""
+A small thread-safe LRU cache with per-entry expiry.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Callable, Generic, TypeVar
+
+KT = TypeVar("KT", bound=Hashable)
+VT = TypeVar("VT")
+
+
+class TTLCache(Generic[KT, VT]):
+    """LRU cache where every entry also carries an absolute expiry time.
+
+    The least recently used entry is evicted once `max_size` is exceeded and expired
+    entries are dropped lazily when they are looked up. Hit, miss, eviction and
+    expiry counters are kept for monitoring.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialise an empty cache.
+
+        Args:
+            max_size (int): The maximum number of entries to keep.
+            ttl (float | None): The default lifetime of an entry in seconds. None
+                                means entries only expire when an explicit expiry is
+                                given to `set`.
+            clock (Callable[[], float]): The time source used for expiry checks.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: OrderedDict[KT, tuple[float, VT]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: KT) -> VT | None:
+        """Looks up a key, refreshing its LRU position on a hit.
+
+        Args:
+            key (KT): The key to look up.
+
+        Returns:
+            VT | None: The cached value, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: KT,
+        value: VT,
+        ttl: float | None = None,
+        expires_at: float | None = None,
+    ) -> None:
+        """Stores a value, evicting the least recently used entry if the cache is full.
+
+        The entry expires at the earliest of `expires_at` and now plus the TTL (the
+        given `ttl` or the cache default).
+
+        Args:
+            key (KT): The key to store the value under.
+            value (VT): The value to store.
+            ttl (float | None): Lifetime of the entry in seconds, overriding the cache
+                                default.
+            expires_at (float | None): Absolute expiry time, in the clock's units.
+        """
+        now = self.clock()
+        ttl = self.ttl if ttl is None else ttl
+        deadline = float("inf") if ttl is None else now + ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        if deadline <= now:
+            return
+
+        with self._lock:
+            self._entries[key] = (deadline, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: KT) -> None:
+        """Removes a key from the cache if present.
+
+        Args:
+            key (KT): The key to remove.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[KT], bool]) -> int:
+        """Removes every key for which `predicate` returns True.
+
+        Args:
+            predicate (Callable[[KT], bool]): Called with each key in the cache.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        """Removes all entries from the cache, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Returns the cache counters.
+
+        Returns:
+            dict[str, int]: The current size and the hit, miss, eviction and expiry
+                            counts.
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,21 @@
+# pylint: disable=missing-module-docstring
+
+import pytest
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(name="clock")
+def fixture_clock() -> FakeClock:
+    """A clock starting at 1000 seconds, advanced by setting `now`."""
+    return FakeClock()
@@ -2,7 +2,13 @@
 
 import asyncio
 
-from src.core.context import trace_id_var
+from src.core.context import (
+    ServerTiming,
+    server_timing_var,
+    timing_mark,
+    timing_span,
+    trace_id_var,
+)
 
 
 def test_set_and_get_trace_id():
@@ -38,3 +44,42 @@ def test_context_isolation_across_async_tasks():
 
     results = asyncio.run(run_tasks())
     assert results == ["A", "B"]
+
+
+def test_server_timing_marks_and_spans(monkeypatch):
+    """Test that marks split time into stages and spans time blocks."""
+    now = iter([10.0, 10.002, 10.005, 10.006, 10.010, 10.020])
+    monkeypatch.setattr("src.core.context.time.perf_counter", lambda: next(now))
+    timing = ServerTiming()
+
+    timing.mark("auth")
+    with timing.span("render"):
+        pass
+    timing.mark("handler")
+
+    assert timing.header_value() == (
+        "auth;dur=2.000, render;dur=1.000, handler;dur=8.000, total;dur=20.000"
+    )
+
+
+def test_timing_helpers_without_timed_request():
+    """Test that the helpers do nothing when the request is not timed."""
+    assert server_timing_var.get() is None
+
+    with timing_span("render"):
+        timing_mark("handler")
+
+
+def test_timing_helpers_record_into_current_request():
+    """Test that the helpers record into the timing of the current request."""
+    timing = ServerTiming()
+    token = server_timing_var.set(timing)
+    try:
+        with timing_span("render"):
+            pass
+        timing_mark("handler")
+        timing_mark("handler")
+    finally:
+        server_timing_var.reset(token)
+
+    assert list(timing.durations) == ["render", "handler"]
@@ -0,0 +1,120 @@
+# pylint: disable=missing-module-docstring
+
+import asyncio
+import threading
+
+import pytest
+
+from src.core.executor import BoundedExecutor
+from src.exceptions import ServiceUnavailableError
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result():
+    """Test that jobs run on the pool and their results are returned."""
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0, retry_after=1)
+    result = await executor.run(lambda a, b: a + b, 1, b=2)
+
+    assert result == 3
+    assert executor.pending == 0
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_on_dedicated_threads():
+    """Test that jobs run on the executor's own named worker threads."""
+    executor = BoundedExecutor("dedicated", max_workers=1, max_queue=0, retry_after=1)
+    thread_name = await executor.run(lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("dedicated")
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_when_saturated():
+    """Test that jobs beyond the workers and queue size are rejected."""
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1, retry_after=7)
+    release = threading.Event()
+
+    running = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(ServiceUnavailableError) as exc_info:
+        await executor.run(release.wait)
+    assert exc_info.value.retry_after == 7
+
+    release.set()
+    await asyncio.gather(*running)
+
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["queue_wait_seconds_max"] >= 0
+    assert stats["run_seconds_total"] > 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_propagates_exceptions():
+    """Test that exceptions raised by a job reach the caller."""
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0, retry_after=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await executor.run(fail)
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_place_until_job_finishes():
+    """Test that a job still counts against the limit after its caller is
+    cancelled, until it finishes on the pool."""
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0, retry_after=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def job():
+        started.set()
+        release.wait()
+
+    task = asyncio.create_task(executor.run(job))
+    await asyncio.to_thread(started.wait)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert executor.pending == 1
+    with pytest.raises(ServiceUnavailableError):
+        await executor.run(job)
+
+    release.set()
+    await asyncio.to_thread(executor.shutdown)
+    assert executor.pending == 0
+    assert await executor.run(lambda: 1) == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_job_frees_its_place():
+    """Test that a job cancelled before it ran no longer counts against the
+    limit."""
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1, retry_after=1)
+    release = threading.Event()
+
+    running = asyncio.create_task(executor.run(release.wait))
+    queued = asyncio.create_task(executor.run(release.wait))
+    await asyncio.sleep(0)
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+
+    assert executor.pending == 1
+    release.set()
+    await running
+    assert executor.pending == 0
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
@@ -0,0 +1,196 @@
+# pylint: disable=missing-module-docstring
+
+import json
+import os
+from unittest.mock import patch
+
+import jwt
+import pytest
+from jwt.algorithms import has_crypto
+
+from src.core.key_ring import (
+    DEFAULT_KEY_ID,
+    KeyRing,
+    KeyRingFile,
+    load_key,
+    load_key_ring,
+)
+
+requires_crypto = pytest.mark.skipif(
+    not has_crypto, reason="cryptography is not installed"
+)
+
+
+def ec_private_pem() -> bytes:
+    """Returns a new P-256 private key in PEM format."""
+    # pylint: disable=import-outside-toplevel
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    return ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def ed25519_public_pem() -> bytes:
+    """Returns a new Ed25519 public key in PEM format."""
+    # pylint: disable=import-outside-toplevel
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+
+    return (
+        ed25519.Ed25519PrivateKey.generate()
+        .public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+
+
+def test_hmac_key_signs_and_verifies_but_is_not_published():
+    """Test that an HMAC key both signs and verifies, and is left out of the JWKS."""
+    ring = KeyRing.from_secret("secret", "HS256")
+
+    token = jwt.encode({"sub": "a"}, ring.signing_key, algorithm="HS256")
+
+    assert jwt.decode(token, ring.get(DEFAULT_KEY_ID).verifying_key)["sub"] == "a"
+    assert json.loads(ring.jwks) == {"keys": []}
+
+
+@requires_crypto
+def test_asymmetric_key_publishes_public_jwk():
+    """Test that a private key signs and only its public part is published."""
+    ring = KeyRing([load_key("ec", "ES256", ec_private_pem())], "ec")
+
+    token = jwt.encode({"sub": "a"}, ring.signing_key, algorithm="ES256")
+
+    assert jwt.decode(token, ring.get("ec").verifying_key)["sub"] == "a"
+    (jwk,) = json.loads(ring.jwks)["keys"]
+    assert jwk["kid"] == "ec"
+    assert jwk["alg"] == "ES256"
+    assert jwk["use"] == "sig"
+    assert "d" not in jwk
+    assert ring.jwks_etag.startswith(b'"')
+
+
+@requires_crypto
+def test_public_key_only_verifies():
+    """Test that a public key cannot be the active key."""
+    key = load_key("old", "EdDSA", ed25519_public_pem())
+
+    assert key.signing_key is None
+    with pytest.raises(ValueError, match="not a private key"):
+        KeyRing([key], "old")
+    ring = KeyRing([key, load_key("new", "HS256", "secret")], "new")
+    assert [jwk["kid"] for jwk in json.loads(ring.jwks)["keys"]] == ["old"]
+
+
+def test_load_key_rejects_unsupported_algorithms_and_keys():
+    """Test that unknown algorithms and unsuitable keys are rejected."""
+    with pytest.raises(ValueError, match="unsupported algorithm"):
+        load_key("a", "none", "secret")
+    with pytest.raises(ValueError, match="unsupported algorithm"):
+        load_key("a", "XS256", "secret")
+    if has_crypto:
+        with pytest.raises(ValueError, match="not a valid ES256 key"):
+            load_key("a", "ES256", "not a pem key")
+
+
+def test_key_ring_rejects_duplicate_and_missing_key_ids():
+    """Test that key IDs must be unique and the active key must exist."""
+    key = load_key("a", "HS256", "secret")
+    with pytest.raises(ValueError, match="unique"):
+        KeyRing([key, key], "a")
+    with pytest.raises(ValueError, match="'b'"):
+        KeyRing([key], "b")
+
+
+def test_get_falls_back_to_default_key_and_rejects_unknown():
+    """Test that tokens without a key ID use the default key."""
+    ring = KeyRing.from_secret("secret", "HS256")
+
+    assert ring.get(None).kid == DEFAULT_KEY_ID
+    with pytest.raises(jwt.InvalidTokenError, match="Unknown key ID"):
+        ring.get("other")
+
+
+def test_load_key_ring(tmp_path):
+    """Test that keys are loaded inline and from files relative to the key file."""
+    (tmp_path / "new.key").write_text("new secret")
+    path = tmp_path / "keys.json"
+    path.write_text(
+        json.dumps(
+            {
+                "active": "new",
+                "keys": [
+                    {"kid": "new", "alg": "HS512", "key_file": "new.key"},
+                    {"kid": "old", "alg": "HS256", "key": "old secret"},
+                ],
+            }
+        )
+    )
+
+    ring = load_key_ring(str(path))
+
+    assert ring.active.kid == "new"
+    assert ring.active.algorithm == "HS512"
+    assert set(ring.keys) == {"new", "old"}
+
+
+def test_load_key_ring_rejects_invalid_file(tmp_path):
+    """Test that a key file with missing fields is rejected."""
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"keys": [{"kid": "a", "key": "secret"}]}))
+
+    with pytest.raises(ValueError, match="missing 'alg'"):
+        load_key_ring(str(path))
+
+
+def test_key_ring_file_reloads_changes(tmp_path):
+    """Test that the file is only reloaded after it changed, and kept when invalid."""
+    path = tmp_path / "keys.json"
+    path.write_text(
+        json.dumps(
+            {"active": "a", "keys": [{"kid": "a", "alg": "HS256", "key": "secret"}]}
+        )
+    )
+    key_file = KeyRingFile(str(path), reload_interval=30)
+    key_file.load()
+    reloaded = []
+
+    key_file.reload(reloaded.append)
+    assert not reloaded
+
+    mtime = os.stat(path).st_mtime + 10
+    os.utime(path, (mtime, mtime))
+    key_file.reload(reloaded.append)
+    assert [ring.active.kid for ring in reloaded] == ["a"]
+    assert not key_file.changed()
+
+    path.write_text("not json")
+    os.utime(path, (mtime + 10, mtime + 10))
+    key_file.reload(reloaded.append)
+    assert len(reloaded) == 1
+
+
+def test_key_ring_file_reload_disabled(tmp_path):
+    """Test that a reload interval of 0 never starts the reload thread."""
+    key_file = KeyRingFile(str(tmp_path / "keys.json"), reload_interval=0)
+    key_file.start(lambda ring: None)
+    assert key_file.thread is None
+
+
+def test_get_for_token_remembers_headers():
+    """Test that a token's header is parsed once and maps to its key."""
+    ring = KeyRing([load_key("a", "HS256", "a"), load_key("b", "HS256", "b")], "a")
+    token = jwt.encode({"sub": "x"}, "b", algorithm="HS256", headers={"kid": "b"})
+
+    assert ring.get_for_token(token).kid == "b"
+    with patch("src.core.key_ring.jwt.get_unverified_header") as get_header:
+        assert ring.get_for_token(token).kid == "b"
+        get_header.assert_not_called()
+    with pytest.raises(jwt.DecodeError):
+        ring.get_for_token("not-a-token")
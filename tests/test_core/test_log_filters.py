@@ -0,0 +1,118 @@
+# pylint: disable=missing-module-docstring
+
+import logging
+
+import pytest
+
+from src.core import logger as logger_module
+from src.core.log_filters import RateLimitFilter, SamplingFilter
+from src.core.settings import LogFilterConfig
+
+
+def make_record(msg="failed for %s", args=("user",), level=logging.ERROR):
+    """Builds a log record."""
+    return logging.LogRecord("app", level, __file__, 1, msg, args, None)
+
+
+def test_sampling_filter():
+    """Test that records are kept when the random number is below the rate."""
+    values = iter([0.05, 0.5, 0.09, 0.95])
+    sampler = SamplingFilter(0.1, rng=lambda: next(values))
+
+    assert [sampler.filter(make_record()) for _ in range(4)] == [
+        True,
+        False,
+        True,
+        False,
+    ]
+
+
+def test_sampling_filter_keeps_everything_at_full_rate():
+    """Test that a rate of 1 never drops records."""
+    sampler = SamplingFilter(1.0, rng=lambda: 0.999)
+
+    assert sampler.filter(make_record())
+
+
+def test_rate_limit_filter_burst_and_refill(clock):
+    """Test that a template is capped after its burst and refills over time."""
+    limiter = RateLimitFilter(rate=2, burst=3, clock=clock)
+
+    assert [limiter.filter(make_record()) for _ in range(5)] == [
+        True,
+        True,
+        True,
+        False,
+        False,
+    ]
+    assert limiter.suppressed == 2
+
+    clock.now += 0.5  # One token refilled
+    assert limiter.filter(make_record())
+    assert not limiter.filter(make_record())
+
+
+def test_rate_limit_filter_summary(clock):
+    """Test that the next record let through reports the suppressed count."""
+    limiter = RateLimitFilter(rate=1, burst=1, clock=clock)
+    limiter.filter(make_record())
+    for _ in range(4):
+        limiter.filter(make_record())
+
+    clock.now += 1
+    record = make_record(args=("admin",))
+
+    assert limiter.filter(record)
+    assert record.getMessage() == "failed for admin (4 similar messages suppressed)"
+
+    clock.now += 1
+    assert make_record().getMessage() == "failed for user"
+
+
+def test_rate_limit_filter_separates_templates_and_levels(clock):
+    """Test that each template and level has its own bucket."""
+    limiter = RateLimitFilter(rate=1, burst=1, clock=clock)
+
+    assert limiter.filter(make_record(msg="first %s"))
+    assert limiter.filter(make_record(msg="second %s"))
+    assert limiter.filter(make_record(msg="first %s", level=logging.WARNING))
+    assert not limiter.filter(make_record(msg="first %s"))
+
+
+@pytest.fixture(name="log_filters")
+def fixture_log_filters(monkeypatch):
+    """Configures log filters for the `test_filtered` logger hierarchy."""
+    filters = {
+        "test_filtered": LogFilterConfig(sample_rate=0.5),
+        "test_filtered.child": LogFilterConfig(rate_limit=5, burst=2),
+    }
+    monkeypatch.setattr(logger_module.settings, "log_filters", filters)
+    yield filters
+    for name in ("test_filtered", "test_filtered.child", "test_filtered.other"):
+        logging.getLogger(name).filters.clear()
+
+
+def test_get_log_filter_config(log_filters):
+    """Test that loggers use the config for their own name or closest parent."""
+    assert logger_module.get_log_filter_config("test_filtered") is (
+        log_filters["test_filtered"]
+    )
+    assert logger_module.get_log_filter_config("test_filtered.child.leaf") is (
+        log_filters["test_filtered.child"]
+    )
+    assert logger_module.get_log_filter_config("test_filtered.other") is (
+        log_filters["test_filtered"]
+    )
+    assert logger_module.get_log_filter_config("unrelated") is None
+
+
+def test_setup_logger_attaches_filters_once(log_filters):
+    """Test that `setup_logger` attaches the configured filters only once."""
+    assert log_filters
+    parent = logger_module.setup_logger("test_filtered")
+    child = logger_module.setup_logger("test_filtered.child")
+    logger_module.setup_logger("test_filtered.child")
+
+    assert [type(f) for f in parent.filters] == [SamplingFilter]
+    assert [type(f) for f in child.filters] == [RateLimitFilter]
+    assert logger_module.setup_logger("unrelated_logger").filters == []
@@ -1,6 +1,17 @@
 # pylint: disable=missing-module-docstring
 
-from src.core.logger import setup_logger
+import json
+import logging
+import sys
+import threading
+
+from src.core.logger import (
+    BoundedQueueHandler,
+    ColourFormatter,
+    JsonFormatter,
+    get_log_handler,
+    setup_logger,
+)
 
 
 def test_log_something(caplog):
@@ -28,3 +39,189 @@ def test_no_duplicate_handlers():
     logger = setup_logger()
 
     assert len(logger.handlers) == initial_handler_count
+
+
+class RecordingHandler(logging.Handler):
+    """Handler that records the handled messages and the threads handling them."""
+
+    def __init__(self, release: threading.Event | None = None):
+        super().__init__()
+        self.gate = release
+        self.messages: list[str] = []
+        self.threads: set[str] = set()
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.messages.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+
+
+def make_logger(handler: logging.Handler) -> logging.Logger:
+    """Returns a non-propagating logger writing only to `handler`."""
+    logger = logging.getLogger(f"test_queue_{id(handler)}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_queue_handler_writes_on_background_thread():
+    """Test that queued records are written by the listener and flushed on stop."""
+    target = RecordingHandler()
+    handler = BoundedQueueHandler(target, max_size=100)
+    logger = make_logger(handler)
+
+    handler.start()
+    for i in range(50):
+        logger.info("message %d", i)
+    handler.stop()
+
+    assert target.messages == [f"message {i}" for i in range(50)]
+    assert threading.current_thread().name not in target.threads
+
+
+def test_queue_handler_without_listener_writes_synchronously():
+    """Test that records are written directly while the listener is not running."""
+    target = RecordingHandler()
+    logger = make_logger(BoundedQueueHandler(target, max_size=10))
+
+    logger.info("direct")
+
+    assert target.messages == ["direct"]
+    assert target.threads == {threading.current_thread().name}
+
+
+def test_queue_handler_drop_policy():
+    """Test that records are dropped and counted when the queue is full."""
+    release = threading.Event()
+    target = RecordingHandler(release)
+    handler = BoundedQueueHandler(target, max_size=2, policy="drop")
+    logger = make_logger(handler)
+
+    handler.start()
+    for i in range(10):
+        logger.info("message %d", i)
+    release.set()
+    handler.stop()
+
+    # The listener holds at most one record while blocked and the queue two more
+    assert handler.dropped >= 7
+    assert len(target.messages) + handler.dropped == 10
+    assert handler.stats() == {"queued": 0, "dropped": handler.dropped}
+
+
+def test_queue_handler_block_policy():
+    """Test that the block policy waits for space instead of dropping records."""
+    target = RecordingHandler()
+    handler = BoundedQueueHandler(target, max_size=1, policy="block")
+    logger = make_logger(handler)
+
+    handler.start()
+    for i in range(200):
+        logger.info("message %d", i)
+    handler.stop()
+
+    assert handler.dropped == 0
+    assert len(target.messages) == 200
+
+
+def test_queue_handler_does_not_change_record():
+    """Test that other handlers still see the original message template."""
+    handler = BoundedQueueHandler(RecordingHandler(), max_size=10)
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "hello %s", ("a",), None)
+
+    prepared = handler.prepare(record)
+
+    assert prepared.msg == "hello a" and prepared.args is None
+    assert record.msg == "hello %s" and record.args == ("a",)
+
+
+def test_loggers_share_one_handler():
+    """Test that all loggers and the Uvicorn loggers use the same handler."""
+    handler = get_log_handler()
+
+    assert setup_logger("test_shared_a").handlers == [handler]
+    assert setup_logger("test_shared_b").handlers == [handler]
+    assert logging.getLogger("uvicorn.access").handlers == [handler]
+
+
+def make_record(msg="hello %s", args=("world",), level=logging.INFO, exc_info=None):
+    """Builds a log record carrying a trace ID."""
+    record = logging.LogRecord("app.test", level, __file__, 42, msg, args, exc_info)
+    record.trace_id = "trace-123"
+    return record
+
+
+def test_colour_formatter_output():
+    """Test that the level and trace ID are coloured and the message formatted."""
+    record = make_record(level=logging.WARNING)
+
+    output = ColourFormatter().format(record)
+
+    assert output.startswith(f"{ColourFormatter.YELLOW}WARNING{ColourFormatter.RESET}:")
+    assert f"[{ColourFormatter.CYAN}trace-123{ColourFormatter.RESET}]" in output
+    assert output.endswith(" app.test:42 [\x1b[36mtrace-123\x1b[0m] hello world")
+
+
+def test_colour_formatter_does_not_change_record():
+    """Test that a second handler sees the record without colour codes."""
+    record = make_record()
+
+    ColourFormatter().format(record)
+
+    assert record.levelname == "INFO"
+    assert record.trace_id == "trace-123"
+    assert logging.Formatter("%(levelname)s %(trace_id)s").format(record) == (
+        "INFO trace-123"
+    )
+
+
+def test_colour_formatter_without_trace_id():
+    """Test that records that did not pass the trace ID filter can be formatted."""
+    record = logging.LogRecord("x", 25, __file__, 1, "custom level", None, None)
+
+    output = ColourFormatter().format(record)
+
+    assert f"[{ColourFormatter.CYAN}-{ColourFormatter.RESET}]" in output
+
+
+def test_json_formatter():
+    """Test that records are written as a single line of JSON without colour codes."""
+    record = make_record()
+    record.created = 1704067200.5
+
+    output = JsonFormatter().format(record)
+
+    assert "\n" not in output and "\x1b" not in output
+    assert json.loads(output) == {
+        "timestamp": "2024-01-01T00:00:00.500+00:00",
+        "level": "INFO",
+        "logger": "app.test",
+        "trace_id": "trace-123",
+        "message": "hello world",
+    }
+
+
+def test_json_formatter_exception():
+    """Test that exception information is included as a formatted traceback."""
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record(msg="failed", args=None, exc_info=sys.exc_info())
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "failed"
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_colour_formatter_time_matches_default():
+    """Test that cached timestamps match the standard formatter's output."""
+    formatter = ColourFormatter()
+    for created in (1704067200.125, 1704067200.875, 1704067201.5):
+        record = make_record()
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+
+        assert formatter.formatTime(record) == logging.Formatter().formatTime(record)
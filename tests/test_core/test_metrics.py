@@ -0,0 +1,180 @@
+# pylint: disable=missing-module-docstring
+
+import multiprocessing
+
+import pytest
+
+from src.core.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    reset_metrics_directory,
+)
+
+
+def record_in_worker(directory: str, hits: int) -> None:
+    """Records metrics in a separate process sharing `directory`."""
+    registry = MetricsRegistry(directory)
+    Counter("hits_total", "Hits.", ["route"], registry=registry).labels("/").inc(hits)
+    Gauge("in_progress", "In progress.", registry=registry).labels().inc(5)
+
+
+def run_worker(directory: str, hits: int) -> None:
+    """Runs `record_in_worker` in a child process and waits for it to exit."""
+    process = multiprocessing.get_context("spawn").Process(
+        target=record_in_worker, args=(directory, hits)
+    )
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+
+def test_counter_and_gauge_render():
+    """Test that counters and gauges are rendered in the Prometheus text format."""
+    registry = MetricsRegistry()
+    counter = Counter("hits_total", "Hits.", ["route"], registry=registry)
+    gauge = Gauge("in_progress", "In progress.", registry=registry)
+
+    counter.labels("/a").inc()
+    counter.labels("/a").inc(2)
+    counter.labels('/"b"').inc()
+    gauge.labels().inc(3)
+    gauge.labels().dec()
+
+    assert registry.render().decode() == (
+        "# HELP hits_total Hits.\n"
+        "# TYPE hits_total counter\n"
+        'hits_total{route="/\\"b\\""} 1.0\n'
+        'hits_total{route="/a"} 3.0\n'
+        "# HELP in_progress In progress.\n"
+        "# TYPE in_progress gauge\n"
+        "in_progress 2.0\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test that histogram buckets count observations up to their bound."""
+    registry = MetricsRegistry()
+    histogram = Histogram(
+        "latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0), registry=registry
+    )
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels("/").observe(value)
+
+    lines = registry.render().decode().splitlines()[2:]
+
+    assert lines == [
+        'latency_seconds_bucket{route="/",le="0.1"} 2.0',
+        'latency_seconds_bucket{route="/",le="1.0"} 3.0',
+        'latency_seconds_bucket{route="/",le="+Inf"} 4.0',
+        'latency_seconds_sum{route="/"} 3.65',
+        'latency_seconds_count{route="/"} 4.0',
+    ]
+
+
+def test_labels_must_match_label_names():
+    """Test that series need one value per label name."""
+    counter = Counter("hits_total", "Hits.", ["route"], registry=MetricsRegistry())
+
+    with pytest.raises(ValueError):
+        counter.labels("/", "GET")
+
+
+def test_duplicate_metric_names_are_rejected():
+    """Test that a metric name can only be registered once."""
+    registry = MetricsRegistry()
+    Counter("hits_total", "Hits.", registry=registry)
+
+    with pytest.raises(ValueError):
+        Counter("hits_total", "Hits.", registry=registry)
+
+
+def test_full_registry_keeps_recording():
+    """Test that series beyond the capacity still record but are not exported."""
+    registry = MetricsRegistry(capacity=2)
+    counter = Counter("hits_total", "Hits.", ["route"], registry=registry)
+
+    for route in ("/a", "/b", "/c"):
+        counter.labels(route).inc()
+
+    assert counter.labels("/c").get() == 1
+    assert "/c" not in registry.render().decode()
+
+
+def test_metrics_are_summed_across_processes(tmp_path):
+    """Test that counters from all worker files are summed, gauges only if alive."""
+    directory = str(tmp_path)
+    run_worker(directory, 2)
+    run_worker(directory, 3)
+    registry = MetricsRegistry(directory)
+    Counter("hits_total", "Hits.", ["route"], registry=registry).labels("/").inc()
+    gauge = Gauge("in_progress", "In progress.", registry=registry)
+    gauge.labels().inc()
+
+    text = registry.render().decode()
+
+    # The second worker adopted the first one's file, this process the second's
+    assert len(list(tmp_path.iterdir())) == 1
+    assert 'hits_total{route="/"} 6.0' in text
+    assert "in_progress 1.0" in text
+
+
+def test_files_of_live_processes_are_not_adopted(tmp_path):
+    """Test that each live process gets its own file."""
+    directory = str(tmp_path)
+    registry = MetricsRegistry(directory)
+    Counter("hits_total", "Hits.", ["route"], registry=registry).labels("/").inc()
+    run_worker(directory, 2)
+
+    assert len(list(tmp_path.iterdir())) == 2
+    assert 'hits_total{route="/"} 3.0' in registry.render().decode()
+
+
+def test_reset_metrics_directory(tmp_path):
+    """Test that the files of a previous run are removed."""
+    run_worker(str(tmp_path), 1)
+    (tmp_path / "other.txt").write_text("kept")
+
+    reset_metrics_directory(str(tmp_path))
+
+    assert [path.name for path in tmp_path.iterdir()] == ["other.txt"]
+
+
+def test_reset_metrics_directory_rejects_shared_directories(tmp_path):
+    """Test that a directory other users can access is not used."""
+    tmp_path.chmod(0o777)
+
+    with pytest.raises(PermissionError):
+        reset_metrics_directory(str(tmp_path))
+
+
+def test_links_and_foreign_files_are_not_adopted(tmp_path):
+    """Test that a planted link named like a dead worker's file is neither adopted
+    nor written through."""
+    directory = tmp_path / "metrics"
+    directory.mkdir(mode=0o700)
+    target = tmp_path / "target"
+    target.write_bytes(b"precious")
+    (directory / "999999.metrics").symlink_to(target)
+    registry = MetricsRegistry(str(directory))
+
+    Counter("hits_total", "Hits.", registry=registry).labels().inc()
+
+    assert target.read_bytes() == b"precious"
+    assert (directory / "999999.metrics").is_symlink()
+    assert "hits_total 1.0" in registry.render().decode()
+
+
+def test_shared_directory_falls_back_to_process_memory(tmp_path):
+    """Test that metrics are kept in memory when other users can access the
+    directory."""
+    tmp_path.chmod(0o777)
+    registry = MetricsRegistry(str(tmp_path))
+
+    Counter("hits_total", "Hits.", registry=registry).labels().inc()
+
+    assert registry.directory is None
+    assert list(tmp_path.iterdir()) == []
+    assert "hits_total 1.0" in registry.render().decode()
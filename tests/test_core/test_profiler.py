@@ -0,0 +1,99 @@
+# pylint: disable=missing-module-docstring
+
+import asyncio
+import json
+import time
+
+from src.core.profiler import AWAIT_FRAME, SamplingProfiler
+
+
+def spin(seconds: float) -> None:
+    """Keeps the thread busy for `seconds`."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def handler() -> None:
+    """Runs on the event loop, then waits."""
+    spin(0.05)
+    await asyncio.sleep(0.05)
+
+
+async def other_request() -> None:
+    """Keeps the event loop busy while the profiled request sleeps."""
+    await asyncio.sleep(0.01)
+    spin(0.02)
+
+
+async def profile(interval: float = 0.001) -> SamplingProfiler:
+    """Profiles `handler` while another task shares the event loop."""
+    coroutine = handler()
+    profiler = SamplingProfiler(coroutine, interval)
+    other = asyncio.create_task(other_request())
+    profiler.start()
+    try:
+        await coroutine
+    finally:
+        profiler.stop()
+    await other
+    return profiler
+
+
+def names(profiler: SamplingProfiler) -> dict[tuple[str, ...], float]:
+    """Returns the time spent in each stack, by function name."""
+    return {
+        tuple(name for name, _, _ in stack): seconds
+        for stack, seconds in profiler.samples.items()
+    }
+
+
+def test_running_and_awaiting_time_is_attributed():
+    """Test that samples cover the request's own code and what it awaits."""
+    profiler = asyncio.run(profile())
+    stacks = names(profiler)
+
+    running = sum(t for stack, t in stacks.items() if stack[-1] == "spin")
+    awaiting = sum(t for stack, t in stacks.items() if stack[-1] == AWAIT_FRAME[0])
+
+    assert all(stack[0] == "handler" for stack in stacks)
+    assert not any("other_request" in stack for stack in stacks)
+    assert running > 0.03
+    assert awaiting > 0.03
+    assert ("handler", "sleep", "<await>") in stacks
+
+
+def test_collapsed_stacks():
+    """Test that stacks are exported as one weighted line each."""
+    profiler = SamplingProfiler(handler())
+    profiler.coroutine.close()
+    profiler.samples = {
+        (("handler", "app.py", 10), ("spin", "app.py", 3)): 0.002,
+        (("handler", "app.py", 10), AWAIT_FRAME): 0.0015,
+    }
+
+    assert profiler.collapsed() == (
+        "handler (app.py:10);spin (app.py:3) 2000\n"
+        "handler (app.py:10);<await> 1500\n"
+    )
+
+
+def test_speedscope_profile():
+    """Test that stacks are exported as a speedscope sampled profile."""
+    profiler = SamplingProfiler(handler())
+    profiler.coroutine.close()
+    profiler.samples = {
+        (("handler", "app.py", 10), ("spin", "app.py", 3)): 0.002,
+        (("handler", "app.py", 10), AWAIT_FRAME): 0.001,
+    }
+
+    document = json.loads(profiler.speedscope("trace"))
+
+    assert document["shared"]["frames"] == [
+        {"name": "handler", "file": "app.py", "line": 10},
+        {"name": "spin", "file": "app.py", "line": 3},
+        {"name": "<await>"},
+    ]
+    assert document["profiles"][0]["samples"] == [[0, 1], [0, 2]]
+    assert document["profiles"][0]["weights"] == [2.0, 1.0]
+    assert document["profiles"][0]["endValue"] == 3.0
@@ -0,0 +1,168 @@
+# pylint: disable=missing-module-docstring
+
+import pytest
+
+from src.core.rate_limit import (
+    MemoryRateLimitStorage,
+    RateLimit,
+    RateLimiter,
+    create_rate_limit_storage,
+    parse_rate_limit,
+)
+from src.core.settings import settings
+from src.core.shared_rate_limit import SharedMemoryRateLimitStorage
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("100/minute", RateLimit(100, 1, "minute")),
+        ("100 per minute", RateLimit(100, 1, "minute")),
+        ("100 per 1 minute", RateLimit(100, 1, "minute")),
+        ("10/5 seconds", RateLimit(10, 5, "second")),
+        (" 5 PER 2 Hours ", RateLimit(5, 2, "hour")),
+        ("0/minute", RateLimit(0, 1, "minute")),
+        ("1/day", RateLimit(1, 1, "day")),
+    ],
+)
+def test_parse_rate_limit(value, expected):
+    """Test that the slowapi rate limit syntax is parsed."""
+    assert parse_rate_limit(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value", ["", "100", "minute", "100/fortnight", "1/hour;2/day"]
+)
+def test_parse_rate_limit_invalid(value):
+    """Test that invalid rate limits are rejected."""
+    with pytest.raises(ValueError):
+        parse_rate_limit(value)
+
+
+def test_rate_limit_str_and_period():
+    """Test that limits render like slowapi's and know their window length."""
+    limit = parse_rate_limit("10/5 seconds")
+
+    assert str(limit) == "10 per 5 second"
+    assert limit.period == 5.0
+
+
+@pytest.mark.asyncio
+async def test_burst_then_reject(clock):
+    """Test that a full burst is allowed and the next request is rejected."""
+    limiter = RateLimiter(parse_rate_limit("5/minute"), clock=clock)
+
+    results = [await limiter.hit("client") for _ in range(6)]
+
+    assert [result.allowed for result in results] == [True] * 5 + [False]
+    assert [result.remaining for result in results] == [4, 3, 2, 1, 0, 0]
+    assert results[0].reset_after == pytest.approx(12)
+    assert results[4].reset_after == pytest.approx(60)
+    assert results[5].retry_after == pytest.approx(12)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("value, amount", [("3/second", 3), ("7/minute", 7)])
+@pytest.mark.parametrize("now", [1000.0, 12345.678, 1e6, 1e8])
+async def test_burst_with_uneven_interval(value, amount, now, clock):
+    """Test that a full burst is allowed when the period does not divide evenly,
+    despite the float rounding of the TATs."""
+    clock.now = now
+    limiter = RateLimiter(parse_rate_limit(value), clock=clock)
+
+    results = [await limiter.hit("client") for _ in range(amount + 1)]
+
+    assert [result.allowed for result in results] == [True] * amount + [False]
+    assert [result.remaining for result in results] == [
+        *range(amount - 1, -1, -1),
+        0,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_refill_one_interval(clock):
+    """Test that one request becomes available after each emission interval."""
+    limiter = RateLimiter(parse_rate_limit("5/minute"), clock=clock)
+    for _ in range(5):
+        await limiter.hit("client")
+
+    clock.now += 11.9
+    assert not (await limiter.hit("client")).allowed
+
+    clock.now += 0.1
+    result = await limiter.hit("client")
+    assert result.allowed
+    assert result.remaining == 0
+    assert not (await limiter.hit("client")).allowed
+
+
+@pytest.mark.asyncio
+async def test_keys_are_independent(clock):
+    """Test that each key has its own quota."""
+    limiter = RateLimiter(parse_rate_limit("1/minute"), clock=clock)
+
+    assert (await limiter.hit("a")).allowed
+    assert (await limiter.hit("b")).allowed
+    assert not (await limiter.hit("a")).allowed
+
+
+@pytest.mark.asyncio
+async def test_zero_limit_rejects_everything(clock):
+    """Test that a limit of zero requests rejects every request."""
+    limiter = RateLimiter(parse_rate_limit("0/minute"), clock=clock)
+
+    result = await limiter.hit("client")
+
+    assert not result.allowed
+    assert result.retry_after == 60
+
+
+@pytest.mark.asyncio
+async def test_rejected_requests_do_not_consume_quota(clock):
+    """Test that rejected requests do not push the retry time further out."""
+    limiter = RateLimiter(parse_rate_limit("1/10 seconds"), clock=clock)
+    await limiter.hit("client")
+
+    for _ in range(100):
+        await limiter.hit("client")
+    clock.now += 10
+
+    assert (await limiter.hit("client")).allowed
+
+
+@pytest.mark.asyncio
+async def test_sweep_removes_idle_keys(clock):
+    """Test that keys whose quota has fully recovered are swept."""
+    storage = MemoryRateLimitStorage(sweep_interval=30)
+    limiter = RateLimiter(parse_rate_limit("10/minute"), storage, clock=clock)
+    await limiter.hit("idle")
+    clock.now += 5
+    for _ in range(10):
+        await limiter.hit("busy")
+    assert len(storage) == 2
+
+    # The idle key's TAT (6s after its request) has passed, the busy key's has not
+    clock.now += 30
+    await limiter.hit("new")
+
+    assert len(storage) == 2
+    assert storage.sweep(clock.now + 3600) == 2
+    assert len(storage) == 0
+
+
+@pytest.mark.asyncio
+async def test_create_rate_limit_storage(monkeypatch, tmp_path):
+    """Test that the storage backend is selected by the settings."""
+    assert isinstance(create_rate_limit_storage(), MemoryRateLimitStorage)
+
+    monkeypatch.setattr(settings, "rate_limit_storage", "shared")
+    monkeypatch.setattr(settings, "rate_limit_shared_path", "")
+    with pytest.raises(ValueError):
+        create_rate_limit_storage()
+
+    monkeypatch.setattr(settings, "rate_limit_shared_path", str(tmp_path / "table"))
+    storage = create_rate_limit_storage()
+
+    assert isinstance(storage, SharedMemoryRateLimitStorage)
+    assert storage.path == str(tmp_path / "table")
+    await storage.close()
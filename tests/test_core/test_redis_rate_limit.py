@@ -0,0 +1,406 @@
+# pylint: disable=missing-module-docstring
+
+import asyncio
+import math
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.rate_limit import RateLimiter, create_rate_limit_storage, parse_rate_limit
+from src.core.rate_limit_storage import RateLimitStorageError
+from src.core.redis_rate_limit import (
+    GCRA_SCRIPT,
+    GCRA_SCRIPT_SHA,
+    RedisRateLimitStorage,
+    encode_command,
+    read_reply,
+)
+from src.core.settings import settings
+from src.exceptions.service_unavailable import ServiceUnavailableError
+from src.middlewares import RateLimitMiddleware
+
+try:
+    from lupa import lua51
+except ImportError:
+    lua51 = None
+
+requires_lua = pytest.mark.skipif(lua51 is None, reason="lupa is not installed")
+
+
+def encode_reply(value) -> bytes:
+    """Encodes a reply in RESP."""
+    if isinstance(value, Exception):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+
+
+class GcraScript:
+    """`GCRA_SCRIPT` run with lupa in Lua 5.1, the version embedded in Redis, with
+    the Redis commands it calls served from a dict."""
+
+    def __init__(self, values: dict[bytes, bytes], clock):
+        self.values = values
+        self.clock = clock
+        self.expiries: dict[bytes, int] = {}
+        self.lua = lua51.LuaRuntime(encoding=None)
+        self.script = self.lua.eval("loadstring")(GCRA_SCRIPT)
+        self.lua.globals().redis = self.lua.table_from({b"call": self.call})
+
+    def call(self, name: bytes, *args):
+        """Serves `redis.call`."""
+        if name == b"TIME":
+            now = int(self.clock() * 1_000_000)
+            return self.lua.table(b"%d" % (now // 1_000_000), b"%d" % (now % 1_000_000))
+        if name == b"GET":
+            return self.values.get(args[0], False)
+        assert name == b"SET" and args[2] == b"PX"
+        assert float(args[3]).is_integer() and args[3] > 0
+        self.values[args[0]] = args[1]
+        self.expiries[args[0]] = int(args[3])
+        return b"OK"
+
+    def __call__(self, key: bytes, interval: bytes, period: bytes) -> list:
+        globals_ = self.lua.globals()
+        globals_.KEYS = self.lua.table(key)
+        globals_.ARGV = self.lua.table(interval, period)
+        allowed, tat = self.script().values()
+        # Redis truncates Lua numbers to integer replies
+        return [int(allowed), tat]
+
+
+class FakeRedis:
+    """In-process RESP server running the GCRA script.
+
+    The script runs in Lua when lupa is installed, and is otherwise mirrored in
+    Python. Scripts are unknown until loaded with EVAL, so EVALSHA first fails with
+    NOSCRIPT like on a freshly started Redis.
+    """
+
+    def __init__(self, password: str | None = None):
+        self.password = password
+        self.tats: dict[bytes, bytes] = {}
+        self.scripts: set[str] = set()
+        self.commands: list[bytes] = []
+        self.clock = time.time
+        self.server: asyncio.Server | None = None
+        self.script = GcraScript(self.tats, lambda: self.clock()) if lua51 else None
+
+    @property
+    def url(self) -> str:
+        port = self.server.sockets[0].getsockname()[1]
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{port}/2"
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *_):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        authenticated = self.password is None
+        try:
+            while True:
+                command = await read_reply(reader)
+                name = command[0].upper()
+                self.commands.append(name)
+                if name == b"AUTH":
+                    authenticated = command[-1].decode() == self.password
+                    reply = "OK" if authenticated else Exception("WRONGPASS")
+                elif not authenticated:
+                    reply = Exception("NOAUTH Authentication required.")
+                elif name == b"SELECT":
+                    reply = "OK"
+                elif name == b"EVAL":
+                    self.scripts.add(
+                        GCRA_SCRIPT_SHA if command[1] == GCRA_SCRIPT else ""
+                    )
+                    reply = self.gcra(*command[3:])
+                elif name == b"EVALSHA" and command[1].decode() in self.scripts:
+                    reply = self.gcra(*command[3:])
+                elif name == b"EVALSHA":
+                    reply = Exception("NOSCRIPT No matching script.")
+                else:
+                    reply = Exception("ERR unknown command")
+                writer.write(encode_reply(reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    def gcra(self, key: bytes, interval: bytes, period: bytes):
+        """Runs `GCRA_SCRIPT`, or mirrors it without lupa."""
+        if self.script is not None:
+            return self.script(key, interval, period)
+        now = int(self.clock() * 1_000_000)
+        interval_us = math.floor(float(interval) * 1_000_000)
+        period_us = math.floor(float(period) * 1_000_000 + 0.5)
+        stored = self.tats.get(key)
+        tat = max(int(stored), now) if stored else now
+        new_tat = tat + interval_us
+        if new_tat - now > period_us:
+            return [0, repr((tat - now) / 1_000_000).encode()]
+        self.tats[key] = b"%d" % new_tat
+        return [1, repr((new_tat - now) / 1_000_000).encode()]
+
+
+def unused_url() -> str:
+    """Returns the URL of a port with nothing listening on it."""
+
+    async def reserve():
+        server = await asyncio.start_server(lambda *_: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        return f"redis://127.0.0.1:{port}/0"
+
+    return asyncio.run(reserve())
+
+
+def test_encode_command():
+    """Test that commands are encoded as RESP arrays of bulk strings."""
+    assert (
+        encode_command("GET", "key", 1)
+        == b"*3\r\n$3\r\nGET\r\n$3\r\nkey\r\n$1\r\n1\r\n"
+    )
+
+
+def test_gcra_over_redis():
+    """Test that the Redis storage applies the limit with a shared server-side state."""
+
+    async def run():
+        async with FakeRedis(password="secret") as redis:
+            storage = RedisRateLimitStorage(redis.url)
+            limiter = RateLimiter(parse_rate_limit("3/minute"), storage)
+            results = [await limiter.hit("client") for _ in range(4)]
+            other = await limiter.hit("other")
+            await storage.close()
+            return redis, results, other
+
+    redis, results, other = asyncio.run(run())
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == pytest.approx(20, abs=0.5)
+    assert other.allowed
+    assert set(redis.tats) == {b"rate-limit:client", b"rate-limit:other"}
+    assert redis.commands[:2] == [b"AUTH", b"SELECT"]
+
+
+@requires_lua
+@pytest.mark.parametrize("value, amount", [("3/second", 3), ("7/minute", 7)])
+def test_gcra_script_burst_with_uneven_interval(value, amount):
+    """Test that the Lua script allows a full burst when the period does not divide
+    evenly, and a request once one interval has passed."""
+    clock = [1_790_000_000.123456]
+    script = GcraScript({}, lambda: clock[0])
+    limit = parse_rate_limit(value)
+    interval, period = repr(limit.period / amount).encode(), repr(limit.period).encode()
+
+    replies = [script(b"client", interval, period) for _ in range(amount + 1)]
+
+    assert [allowed for allowed, _ in replies] == [1] * amount + [0]
+    assert float(replies[-1][1]) == pytest.approx(limit.period, abs=1e-5)
+    clock[0] += limit.period / amount - 1e-3
+    assert script(b"client", interval, period)[0] == 0
+    clock[0] += 1e-3
+    assert script(b"client", interval, period)[0] == 1
+
+
+@requires_lua
+def test_gcra_script_expires_keys_once_recovered():
+    """Test that the Lua script stores the TAT with an expiry of the time left."""
+    script = GcraScript({}, lambda: 1_790_000_000.5)
+
+    assert script(b"client", b"12.0", b"60.0") == [1, b"12"]
+    assert script(b"client", b"12.0", b"60.0") == [1, b"24"]
+    assert script.values == {b"client": b"1790000024500000"}
+    assert script.expiries == {b"client": 24000}
+
+
+def test_noscript_falls_back_to_eval_once():
+    """Test that the script is loaded with EVAL once, then run by its SHA."""
+
+    async def run():
+        async with FakeRedis() as redis:
+            storage = RedisRateLimitStorage(redis.url)
+            for _ in range(3):
+                await storage.update("client", 0.0, 1.0, 60.0)
+            await storage.close()
+            return redis.commands
+
+    commands = asyncio.run(run())
+
+    assert commands == [b"SELECT", b"EVALSHA", b"EVAL", b"EVALSHA", b"EVALSHA"]
+
+
+def test_concurrent_checks_are_pipelined():
+    """Test that checks issued together share one round trip."""
+
+    async def run():
+        async with FakeRedis() as redis:
+            storage = RedisRateLimitStorage(redis.url, pool_size=2, max_batch=64)
+            redis.scripts.add(GCRA_SCRIPT_SHA)
+            limiter = RateLimiter(parse_rate_limit("1000/minute"), storage)
+            results = await asyncio.gather(
+                *(limiter.hit(f"client-{i % 10}") for i in range(256))
+            )
+            await storage.close()
+            return storage.batches, results
+
+    batches, results = asyncio.run(run())
+
+    assert all(result.allowed for result in results)
+    assert batches == 4
+
+
+def test_unreachable_redis_fails_open():
+    """Test that requests are allowed when Redis is down and the limiter fails open."""
+    storage = RedisRateLimitStorage(unused_url(), reconnect_delay=60)
+    limiter = RateLimiter(parse_rate_limit("1/minute"), storage)
+
+    async def run():
+        results = [await limiter.hit("client") for _ in range(3)]
+        await storage.close()
+        return results
+
+    results = asyncio.run(run())
+
+    assert all(result.allowed for result in results)
+    assert results[0].remaining == 1
+
+
+def test_unreachable_redis_logs_only_changes(caplog):
+    """Test that a Redis outage is logged once when it starts and once when it ends,
+    not on every request."""
+    url = unused_url()
+
+    async def run():
+        async with FakeRedis() as redis:
+            storage = RedisRateLimitStorage(url, reconnect_delay=0)
+            limiter = RateLimiter(parse_rate_limit("100/minute"), storage)
+            for _ in range(5):
+                await limiter.hit("client")
+            storage.url = redis.url
+            for _ in range(2):
+                await limiter.hit("client")
+            await storage.close()
+
+    with caplog.at_level("INFO", logger="src.core"):
+        asyncio.run(run())
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert [message.split(":")[0] for message in messages] == [
+        "Redis rate limit storage unavailable",
+        "Rate limit storage unavailable, allowing requests until it recovers",
+        "Redis rate limit storage recovered",
+        "Rate limit storage recovered, applying limits again",
+    ]
+
+
+def test_unreachable_redis_fails_fast():
+    """Test that checks fail without a connection attempt while Redis is down."""
+    storage = RedisRateLimitStorage(unused_url(), reconnect_delay=60)
+
+    async def run():
+        with pytest.raises(RateLimitStorageError):
+            await storage.update("client", 0.0, 1.0, 60.0)
+        started = time.perf_counter()
+        with pytest.raises(RateLimitStorageError, match="unavailable"):
+            await storage.update("client", 0.0, 1.0, 60.0)
+        return time.perf_counter() - started
+
+    assert asyncio.run(run()) < 0.01
+
+
+@pytest.mark.parametrize("reply", [b":not-a-number\r\n", b":1\r\n:1\r\n"])
+def test_malformed_reply_fails_the_batch(reply):
+    """Test that checks fail instead of hanging when Redis sends a malformed reply."""
+
+    async def handle(reader, writer):
+        await reader.read(1024)
+        writer.write(reply)
+        await writer.drain()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        storage = RedisRateLimitStorage(f"redis://127.0.0.1:{port}/0", timeout=5)
+        try:
+            async with asyncio.timeout(1):
+                results = await asyncio.gather(
+                    storage.update("client", 0.0, 1.0, 60.0),
+                    storage.update("other", 0.0, 1.0, 60.0),
+                    return_exceptions=True,
+                )
+        finally:
+            await storage.close()
+            server.close()
+        return results
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RateLimitStorageError) for result in results)
+
+
+def test_unreachable_redis_fails_closed():
+    """Test that a limiter failing closed rejects requests when Redis is down."""
+    limiter = RateLimiter(
+        parse_rate_limit("1/minute"),
+        RedisRateLimitStorage(unused_url()),
+        fail_open=False,
+    )
+
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(limiter.hit("client"))
+
+
+def test_middleware_fails_closed_with_503():
+    """Test that the middleware answers with a 503 when the limiter fails closed."""
+    app = FastAPI()
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=RateLimiter(
+            parse_rate_limit("1/minute"),
+            RedisRateLimitStorage(unused_url()),
+            fail_open=False,
+        ),
+    )
+
+    @app.get("/ping")
+    def ping():
+        return {"message": "pong"}
+
+    response = TestClient(app).get("/ping")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {
+        "status": "error",
+        "error": "service_unavailable",
+        "detail": "Rate limit storage is unavailable",
+    }
+
+
+def test_create_redis_storage(monkeypatch):
+    """Test that the Redis storage is selected from the settings."""
+    monkeypatch.setattr(settings, "rate_limit_storage", "redis")
+    monkeypatch.setattr(settings, "rate_limit_redis_url", "redis://cache:6380/1")
+    monkeypatch.setattr(settings, "rate_limit_redis_pool_size", 4)
+
+    storage = create_rate_limit_storage()
+
+    assert isinstance(storage, RedisRateLimitStorage)
+    assert storage.url == "redis://cache:6380/1"
+    assert storage.pool_size == 4
@@ -0,0 +1,180 @@
+# pylint: disable=missing-module-docstring
+
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.core.response_cache import (
+    cache_response,
+    etag_matches,
+    invalidate_cached_responses,
+    response_cache,
+)
+from src.models import MessageResponse, UserBase
+from src.routes.base import StandardResponse, StandardRoute
+
+calls: list[str] = []
+
+
+class FakeAuthMiddleware:
+    """Attaches the user named in the `X-User` header."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        for name, value in scope["headers"]:
+            if name == b"x-user":
+                scope.setdefault("state", {})["user"] = UserBase(
+                    username=value.decode(),
+                    first_name="Jane",
+                    last_name="Doe",
+                    email="jane@example.com",
+                )
+        await self.app(scope, receive, send)
+
+
+router = APIRouter(default_response_class=StandardResponse, route_class=StandardRoute)
+
+
+@router.get("/cached", response_model=MessageResponse)
+@cache_response()
+def get_cached(name: str = "world") -> MessageResponse:
+    calls.append("cached")
+    return MessageResponse(message=f"hello {name}")
+
+
+@router.get("/shared", response_model=MessageResponse)
+@cache_response(ttl=0.05, vary_by_user=False)
+async def get_shared() -> MessageResponse:
+    calls.append("shared")
+    return MessageResponse(message="hello")
+
+
+@router.get("/missing")
+@cache_response()
+def get_missing() -> None:
+    calls.append("missing")
+    raise HTTPException(status_code=404, detail="Not found")
+
+
+app = FastAPI()
+app.include_router(router, prefix="/cache-test")
+app.add_middleware(FakeAuthMiddleware)
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Starts each test with an empty cache and no recorded calls."""
+    response_cache.clear()
+    calls.clear()
+
+
+def test_etag_matches():
+    """Test the weak comparison of `If-None-Match` against an ETag."""
+    assert etag_matches(b'"abc"', b'"abc"')
+    assert etag_matches(b'"x", W/"abc"', b'"abc"')
+    assert etag_matches(b"*", b'"abc"')
+    assert not etag_matches(b'"abd"', b'"abc"')
+
+
+def test_responses_are_cached_with_an_etag():
+    """Test that repeated requests are served from the cache."""
+    first = client.get("/cache-test/cached", headers={"X-User": "jane"})
+    second = client.get("/cache-test/cached", headers={"X-User": "jane"})
+
+    assert calls == ["cached"]
+    assert (
+        second.json()
+        == first.json()
+        == {
+            "status": "success",
+            "detail": {"message": "hello world"},
+        }
+    )
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert first.headers["ETag"].startswith('"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert int(second.headers["Content-Length"]) == len(second.content)
+
+
+def test_matching_if_none_match_is_not_modified():
+    """Test that a current client copy gets a 304 without a body."""
+    etag = client.get("/cache-test/cached", headers={"X-User": "jane"}).headers["ETag"]
+
+    response = client.get(
+        "/cache-test/cached", headers={"X-User": "jane", "If-None-Match": etag}
+    )
+    stale = client.get(
+        "/cache-test/cached", headers={"X-User": "jane", "If-None-Match": '"old"'}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert stale.status_code == 200
+
+
+def test_if_none_match_is_answered_on_a_miss():
+    """Test that a client copy still matching a freshly rendered response gets a 304."""
+    etag = client.get("/cache-test/cached", headers={"X-User": "jane"}).headers["ETag"]
+    response_cache.clear()
+
+    response = client.get(
+        "/cache-test/cached", headers={"X-User": "jane", "If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert calls == ["cached", "cached"]
+
+
+def test_cache_is_keyed_by_query_and_user():
+    """Test that other query strings and users get their own responses."""
+    client.get("/cache-test/cached", headers={"X-User": "jane"})
+    other_user = client.get("/cache-test/cached", headers={"X-User": "john"})
+    other_query = client.get("/cache-test/cached?name=you", headers={"X-User": "jane"})
+
+    assert calls == ["cached", "cached", "cached"]
+    assert other_user.json()["detail"]["message"] == "hello world"
+    assert other_query.json()["detail"]["message"] == "hello you"
+
+
+def test_shared_responses_expire_after_the_route_ttl():
+    """Test that responses not varying by user are shared and expire."""
+    client.get("/cache-test/shared", headers={"X-User": "jane"})
+    client.get("/cache-test/shared", headers={"X-User": "john"})
+    time.sleep(0.06)
+    client.get("/cache-test/shared", headers={"X-User": "john"})
+
+    assert calls == ["shared", "shared"]
+
+
+def test_errors_are_not_cached():
+    """Test that only successful responses are cached."""
+    for _ in range(2):
+        response = client.get("/cache-test/missing")
+
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
+
+    assert calls == ["missing", "missing"]
+
+
+def test_invalidate_cached_responses():
+    """Test that responses can be invalidated by path and by user."""
+    client.get("/cache-test/cached", headers={"X-User": "jane"})
+    client.get("/cache-test/cached", headers={"X-User": "john"})
+    client.get("/cache-test/shared")
+
+    assert invalidate_cached_responses(username="jane") == 1
+    assert invalidate_cached_responses(path="/cache-test/shared") == 1
+    client.get("/cache-test/cached", headers={"X-User": "jane"})
+    client.get("/cache-test/cached", headers={"X-User": "john"})
+
+    assert calls == ["cached", "cached", "shared", "cached"]
@@ -0,0 +1,190 @@
+# pylint: disable=missing-module-docstring
+
+import time
+
+import pytest
+
+from src.core import revocation
+from src.core.revocation import (
+    MAGIC,
+    RECORD,
+    TokenDenylist,
+    decode_token_id,
+    encode_token_id,
+    new_token_id,
+)
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture(name="clock")
+def fixture_clock(clock):
+    """The shared clock, set to `NOW`."""
+    clock.now = NOW
+    return clock
+
+
+def test_token_id_round_trip():
+    """Test that token IDs are 16 random bytes and encode to their raw bytes."""
+    token_id = new_token_id()
+
+    assert len(token_id) == 22
+    assert token_id != new_token_id()
+    assert decode_token_id(encode_token_id(token_id)) == token_id
+
+
+@pytest.mark.parametrize("token_id", ["", "short", "a" * 23, "!" * 22, "a" * 22])
+def test_encode_token_id_rejects_foreign_ids(token_id):
+    """Test that IDs not made by `new_token_id` are rejected."""
+    with pytest.raises(ValueError, match="Invalid token ID"):
+        encode_token_id(token_id)
+
+
+def test_revoked_until_expiry(clock):
+    """Test that a revoked token is denied until its expiry."""
+    denylist = TokenDenylist(clock=clock)
+    token_id = new_token_id()
+
+    assert not denylist.is_revoked(token_id)
+    denylist.revoke(token_id, NOW + 60)
+    assert denylist.is_revoked(token_id)
+
+    clock.now = NOW + 60
+    assert not denylist.is_revoked(token_id)
+
+
+def test_expired_entries_are_dropped(clock):
+    """Test that expired IDs are dropped as revocations are added."""
+    denylist = TokenDenylist(clock=clock)
+    denylist.revoke(new_token_id(), NOW + 10)
+    denylist.revoke(new_token_id(), NOW + 100)
+    assert len(denylist) == 2
+
+    clock.now = NOW + 50
+    denylist.revoke(new_token_id(), NOW + 100)
+    assert len(denylist) == 2
+
+    denylist.revoke(new_token_id(), NOW + 10)
+    assert len(denylist) == 2
+
+
+def test_persisted_for_restarts(tmp_path, clock):
+    """Test that a new denylist loads the revocations of a previous one."""
+    path = str(tmp_path / "revoked")
+    token_id = new_token_id()
+    TokenDenylist(path, clock=clock).revoke(token_id, NOW + 60)
+
+    denylist = TokenDenylist(path, clock=clock)
+    assert not denylist.is_revoked(token_id)
+    denylist.sync()
+    assert denylist.is_revoked(token_id)
+    with open(path, "rb") as file:
+        assert len(file.read()) == len(MAGIC) + RECORD.size
+
+
+def test_shared_between_processes(tmp_path, clock):
+    """Test that revocations appended by another process are read on sync, and
+    checks never read the file."""
+    path = str(tmp_path / "revoked")
+    reader = TokenDenylist(path, clock=clock)
+    writer = TokenDenylist(path, clock=clock)
+    first, second = new_token_id(), new_token_id()
+
+    reader.sync()
+    writer.revoke(first, NOW + 60)
+    assert not reader.is_revoked(first)
+    reader.sync()
+    assert reader.is_revoked(first)
+
+    writer.revoke(second, NOW + 60)
+    reader.sync()
+    assert reader.is_revoked(second)
+    assert reader.offset == len(MAGIC) + 2 * RECORD.size
+
+
+def test_partial_records_are_read_once_complete(tmp_path, clock):
+    """Test that a record still being appended is not read."""
+    path = tmp_path / "revoked"
+    token_id = new_token_id()
+    record = RECORD.pack(encode_token_id(token_id), int(NOW + 60))
+    path.write_bytes(MAGIC + record[:10])
+    denylist = TokenDenylist(str(path), clock=clock)
+
+    denylist.sync()
+    assert not denylist.is_revoked(token_id)
+    with open(path, "ab") as file:
+        file.write(record[10:])
+    denylist.sync()
+    assert denylist.is_revoked(token_id)
+
+
+def test_compacted_when_most_records_expired(tmp_path, monkeypatch, clock):
+    """Test that a file of mostly expired records is rewritten on load."""
+    monkeypatch.setattr(revocation, "COMPACT_MIN_RECORDS", 4)
+    path = str(tmp_path / "revoked")
+    writer = TokenDenylist(path, clock=clock)
+    kept = new_token_id()
+    for _ in range(4):
+        writer.revoke(new_token_id(), NOW + 10)
+    writer.revoke(kept, NOW + 100)
+
+    clock.now = NOW + 50
+    denylist = TokenDenylist(path, clock=clock)
+    denylist.sync()
+    assert denylist.is_revoked(kept)
+    assert len(denylist) == 1
+    with open(path, "rb") as file:
+        assert len(file.read()) == len(MAGIC) + RECORD.size
+
+    # Other processes notice the new file and reload it
+    writer.sync()
+    assert len(writer) == 1
+    assert writer.is_revoked(kept)
+
+
+def test_invalid_file_disables_persistence(tmp_path, clock):
+    """Test that a file of another format is left alone and revocations kept in
+    memory."""
+    path = tmp_path / "revoked"
+    path.write_bytes(b"not a denylist")
+    denylist = TokenDenylist(str(path), clock=clock)
+    token_id = new_token_id()
+
+    denylist.revoke(token_id, NOW + 60)
+
+    assert denylist.is_revoked(token_id)
+    assert denylist.path is None
+    assert path.read_bytes() == b"not a denylist"
+
+
+def test_sync_thread_reads_other_revocations(tmp_path, clock):
+    """Test that the background thread loads the file on start and then reads the
+    revocations of other processes at the sync interval."""
+    path = str(tmp_path / "revoked")
+    writer = TokenDenylist(path, clock=clock)
+    first, second = new_token_id(), new_token_id()
+    writer.revoke(first, NOW + 60)
+    reader = TokenDenylist(path, sync_interval=0.01, clock=clock)
+
+    reader.start()
+    try:
+        assert reader.is_revoked(first)
+        writer.revoke(second, NOW + 60)
+        deadline = time.monotonic() + 5
+        while not reader.is_revoked(second):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        reader.stop()
+
+    assert reader.thread is None
+
+
+def test_start_without_file_is_a_no_op():
+    """Test that an in-memory denylist starts no thread."""
+    denylist = TokenDenylist()
+
+    denylist.start()
+
+    assert denylist.thread is None
+    denylist.stop()
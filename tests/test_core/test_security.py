@@ -1,16 +1,55 @@
 # pylint: disable=missing-module-docstring
 
+import json
+import os
+import time
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
+import jwt
+import pytest
+
+from src.core import security
+from src.core.key_ring import KeyRing, KeyRingFile, load_key
+from src.core.revocation import TokenDenylist
 from src.core.security import (
     create_access_token,
     decode_token,
+    get_key_ring,
     get_password_hash,
+    is_token_revoked,
+    revoke_token,
+    set_key_ring,
+    start_key_ring_reload,
+    stop_key_ring_reload,
+    token_cache,
     verify_password,
 )
+from src.core.settings import settings
 from src.models import TokenData
 
 
+@pytest.fixture(name="cache_enabled")
+def fixture_cache_enabled(monkeypatch):
+    """Enables the verified token cache for the duration of a test."""
+    monkeypatch.setattr(settings, "token_cache_enabled", True)
+    token_cache.clear()
+    yield token_cache
+    token_cache.clear()
+
+
+@pytest.fixture(name="reset_key_ring")
+def fixture_reset_key_ring():
+    """Restores the configured key ring after a test."""
+    yield
+    set_key_ring(None)
+
+
+def make_token(sub: str = "test_user") -> TokenData:
+    """Returns the payload of a token expiring in an hour."""
+    return TokenData(sub=sub, exp=datetime.now(timezone.utc) + timedelta(minutes=60))
+
+
 def test_get_password_hash():
     """Test hashed password is not equal to the original."""
     password = "test_password"
@@ -50,3 +89,188 @@ def test_decode_access_token():
 
     assert payload.sub == "test_user"
     assert payload.exp.replace(microsecond=0) == expire.replace(microsecond=0)
+
+
+def test_decode_token_cache_skips_verification(cache_enabled):
+    """Test that a repeated token is served from the cache without verification."""
+    data = TokenData(
+        sub="test_user", exp=datetime.now(timezone.utc) + timedelta(minutes=60)
+    )
+    token = create_access_token(data)
+
+    first = decode_token(token)
+    with patch("src.core.security.jwt.decode") as mock_decode:
+        second = decode_token(token)
+        mock_decode.assert_not_called()
+
+    assert second is first
+    assert cache_enabled.stats()["hits"] == 1
+    assert cache_enabled.stats()["misses"] == 1
+
+
+def test_decode_token_cache_respects_exp(cache_enabled, monkeypatch):
+    """Test that cached tokens stop being served once they reach `exp`."""
+    expire = datetime.now(timezone.utc) + timedelta(minutes=60)
+    token = create_access_token(TokenData(sub="test_user", exp=expire))
+    decode_token(token)
+
+    monkeypatch.setattr(cache_enabled, "clock", expire.timestamp)
+    with patch(
+        "src.core.security.jwt.decode", side_effect=jwt.ExpiredSignatureError
+    ) as mock_decode:
+        with pytest.raises(jwt.ExpiredSignatureError):
+            decode_token(token)
+        mock_decode.assert_called_once()
+
+
+def test_decode_token_cache_rejects_invalid(cache_enabled):
+    """Test that invalid tokens are never cached."""
+    with pytest.raises(jwt.PyJWTError):
+        decode_token("not-a-token")
+    assert len(cache_enabled) == 0
+
+
+def test_decode_token_cache_disabled():
+    """Test that tokens are not cached unless the cache is enabled."""
+    data = TokenData(
+        sub="test_user", exp=datetime.now(timezone.utc) + timedelta(minutes=60)
+    )
+    decode_token(create_access_token(data))
+    assert len(token_cache) == 0
+
+
+def test_create_access_token_names_active_key(reset_key_ring):
+    """Test that tokens are signed with the active key and carry its key ID."""
+    set_key_ring(
+        KeyRing(
+            [load_key("new", "HS512", "new"), load_key("old", "HS256", "old")], "new"
+        )
+    )
+
+    token = create_access_token(make_token())
+
+    assert jwt.get_unverified_header(token) == {
+        "alg": "HS512",
+        "kid": "new",
+        "typ": "JWT",
+    }
+    assert jwt.decode(token, "new", algorithms=["HS512"])["sub"] == "test_user"
+
+
+def test_decode_token_without_key_id_uses_default_key():
+    """Test that tokens issued before key IDs are verified with the secret key."""
+    payload = make_token().model_dump(exclude_none=True)
+    token = jwt.encode(payload, settings.secret_key, algorithm=settings.algorithm)
+
+    assert decode_token(token).sub == "test_user"
+
+
+def test_decode_token_rejects_unknown_key_id():
+    """Test that tokens naming a key not in the ring are rejected."""
+    payload = make_token().model_dump(exclude_none=True)
+    token = jwt.encode(
+        payload, settings.secret_key, algorithm="HS256", headers={"kid": "unknown"}
+    )
+
+    with pytest.raises(jwt.InvalidTokenError, match="Unknown key ID"):
+        decode_token(token)
+
+
+def test_decode_token_only_accepts_algorithm_of_key(reset_key_ring):
+    """Test that a token cannot pick another algorithm than its key's."""
+    set_key_ring(KeyRing([load_key("a", "HS512", "secret")], "a"))
+    payload = make_token().model_dump(exclude_none=True)
+    token = jwt.encode(payload, "secret", algorithm="HS256", headers={"kid": "a"})
+
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        decode_token(token)
+
+
+def test_key_rotation(cache_enabled, reset_key_ring):
+    """Test that tokens of a retired key verify until the key is removed."""
+    old = load_key("old", "HS256", "old secret")
+    new = load_key("new", "HS256", "new secret")
+    set_key_ring(KeyRing([old], "old"))
+    old_token = create_access_token(make_token("old_user"))
+    decode_token(old_token)
+
+    set_key_ring(KeyRing([new, old], "new"))
+    new_token = create_access_token(make_token("new_user"))
+    assert jwt.get_unverified_header(new_token)["kid"] == "new"
+    assert decode_token(old_token).sub == "old_user"
+    assert len(cache_enabled) == 1
+
+    set_key_ring(KeyRing([new], "new"))
+    assert len(cache_enabled) == 0
+    assert decode_token(new_token).sub == "new_user"
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_token(old_token)
+
+
+def test_key_file_is_reloaded_in_the_background(tmp_path, monkeypatch, reset_key_ring):
+    """Test that changes to the key file are picked up by the reload thread, not by
+    requests, and that an invalid file keeps the previous ring."""
+    path = tmp_path / "keys.json"
+
+    def write(active: str) -> None:
+        keys = [{"kid": kid, "alg": "HS256", "key": kid} for kid in ("a", "b")]
+        path.write_text(json.dumps({"active": active, "keys": keys}))
+
+    def wait_for_active(kid: str) -> None:
+        deadline = time.monotonic() + 5
+        while get_key_ring().active.kid != kid and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    write("a")
+    key_file = KeyRingFile(str(path), reload_interval=0.01)
+    monkeypatch.setattr(security, "KEY_RING_FILE", key_file)
+    set_key_ring(None)
+    with patch.object(key_file, "load", wraps=key_file.load) as load:
+        assert get_key_ring().active.kid == "a"
+        write("b")
+        os.utime(path, (1e9, 1e9))
+        assert get_key_ring().active.kid == "a"
+        assert load.call_count == 1
+
+    start_key_ring_reload()
+    try:
+        wait_for_active("b")
+        assert get_key_ring().active.kid == "b"
+
+        path.write_text("not json")
+        os.utime(path, (2e9, 2e9))
+        time.sleep(0.05)
+        assert get_key_ring().active.kid == "b"
+    finally:
+        stop_key_ring_reload()
+    assert key_file.thread is None
+
+
+def test_create_access_token_adds_token_id():
+    """Test that every token gets its own token ID."""
+    data = make_token()
+
+    first = decode_token(create_access_token(data))
+    second = decode_token(create_access_token(data))
+
+    assert first.jti is not None
+    assert first.jti != second.jti
+
+
+def test_revoke_token(monkeypatch):
+    """Test that revoked tokens are reported as revoked until they expire."""
+    monkeypatch.setattr(security, "token_denylist", TokenDenylist())
+    payload = decode_token(create_access_token(make_token()))
+
+    assert not is_token_revoked(payload)
+    assert revoke_token(payload)
+    assert is_token_revoked(payload)
+
+
+def test_revoke_token_without_token_id(monkeypatch):
+    """Test that tokens issued before token IDs, or by others, cannot be revoked."""
+    monkeypatch.setattr(security, "token_denylist", TokenDenylist())
+
+    assert not revoke_token(make_token())
+    assert not revoke_token(make_token().model_copy(update={"jti": "foreign"}))
+    assert not is_token_revoked(make_token())
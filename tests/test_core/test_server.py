@@ -0,0 +1,241 @@
+# pylint: disable=missing-module-docstring
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from src.core.server import Supervisor, bind_socket, get_server_config
+from src.core.settings import settings
+
+ROOT = Path(__file__).resolve().parents[2]
+
+APP_MODULE = """
+import asyncio
+import os
+
+from fastapi import FastAPI
+
+
+def create_app():
+    app = FastAPI()
+
+    @app.get("/pid")
+    def pid():
+        return os.getpid()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(3)
+        return os.getpid()
+
+    return app
+"""
+
+
+def free_port() -> int:
+    """Returns a port nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_pid(port: int) -> int:
+    """Returns the PID of the worker serving a request."""
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/pid", timeout=5) as response:
+        return json.load(response)
+
+
+def wait_for_pids(port: int, count: int, timeout: float = 30) -> set[int]:
+    """Makes requests until `count` distinct workers have answered."""
+    pids: set[int] = set()
+    deadline = time.monotonic() + timeout
+    while len(pids) < count:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Only workers {pids} answered")
+        try:
+            pids.add(get_pid(port))
+        except OSError:
+            time.sleep(0.1)
+    return pids
+
+
+@pytest.fixture(name="start_supervisor")
+def fixture_start_supervisor(tmp_path):
+    """Starts a supervisor serving a test app that returns the worker PID."""
+    (tmp_path / "pid_app.py").write_text(APP_MODULE)
+    processes = []
+
+    def start(**env):
+        port = free_port()
+        process = subprocess.Popen(  # pylint: disable=consider-using-with
+            [
+                sys.executable,
+                "-c",
+                "from src.core.server import run; run('pid_app:create_app')",
+            ],
+            cwd=ROOT,
+            env={
+                **os.environ,
+                "PYTHONPATH": os.pathsep.join([str(tmp_path), str(ROOT)]),
+                "SERVER_PORT": str(port),
+                "SERVER_LOOP": "asyncio",
+                "SERVER_GRACEFUL_TIMEOUT_SECONDS": "5",
+                **env,
+            },
+        )
+        processes.append(process)
+        return process, port
+
+    yield start
+
+    for process in processes:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def test_server_config_from_settings(monkeypatch):
+    """Test that the worker configuration is read from the settings."""
+    monkeypatch.setattr(settings, "server_http", "httptools")
+    monkeypatch.setattr(settings, "server_backlog", 128)
+    monkeypatch.setattr(settings, "server_limit_concurrency", 500)
+
+    config = get_server_config("app:create_app")
+
+    assert config["app"] == "app:create_app"
+    assert config["factory"] is True
+    assert config["http"] == "httptools"
+    assert config["backlog"] == 128
+    assert config["limit_concurrency"] == 500
+    assert config["timeout_keep_alive"] == settings.server_keep_alive_seconds
+
+
+def test_bind_socket_with_reuse_port():
+    """Test that several sockets can bind the same port with SO_REUSEPORT."""
+    first = bind_socket("127.0.0.1", 0, reuse_port=True)
+    port = first.getsockname()[1]
+    second = bind_socket("127.0.0.1", port, reuse_port=True)
+
+    assert second.getsockname()[1] == port
+    first.close()
+    second.close()
+
+
+def test_run_directory_is_private():
+    """Test that the files shared by a run's workers live in a private directory."""
+    supervisor = Supervisor({})
+    run_dir = supervisor.get_run_dir()
+
+    assert supervisor.get_run_dir() == run_dir
+    assert os.stat(run_dir).st_mode & 0o777 == 0o700
+    supervisor.stop()
+    assert not os.path.exists(run_dir)
+
+
+def test_per_worker_revocation_is_warned_about(monkeypatch, caplog):
+    """Test that running several workers without a revocation file is warned about."""
+    monkeypatch.setattr(settings, "revocation_file", "")
+    monkeypatch.setattr(settings, "server_workers", 2)
+
+    with caplog.at_level("WARNING", logger="src.core.server"):
+        Supervisor({}).warn_about_per_worker_state()
+    assert "REVOCATION_FILE is not set" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setattr(settings, "server_workers", 1)
+    with caplog.at_level("WARNING", logger="src.core.server"):
+        Supervisor({}).warn_about_per_worker_state()
+    assert not caplog.text
+
+
+def test_workers_are_recycled_after_max_requests(start_supervisor):
+    """Test that a worker is replaced once it has served its maximum requests."""
+    _, port = start_supervisor(SERVER_WORKERS="1", SERVER_MAX_REQUESTS="3")
+    first = get_pid_when_up(port)
+    assert get_pid(port) == first
+    assert get_pid(port) == first
+
+    # Uvicorn checks the request count a few times per second
+    deadline = time.monotonic() + 30
+    while get_pid_when_up(port) == first:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_retiring_worker_is_replaced_before_it_exits(start_supervisor):
+    """Test that a worker is replaced as soon as it starts shutting down, while it
+    finishes its last requests."""
+    _, port = start_supervisor(SERVER_WORKERS="1", SERVER_MAX_REQUESTS="2")
+    first = get_pid_when_up(port)
+    slow: list[int] = []
+
+    def request_slow() -> None:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{port}/slow", timeout=10
+        ) as response:
+            slow.append(json.load(response))
+
+    thread = threading.Thread(target=request_slow)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 30
+        while (pid := get_pid_when_up(port)) == first:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert thread.is_alive()
+    finally:
+        thread.join()
+
+    assert pid != first
+    assert slow == [first]
+
+
+@pytest.mark.parametrize("reuse_port", ["true", "false"])
+def test_sighup_restarts_workers_without_downtime(start_supervisor, reuse_port):
+    """Test that SIGHUP replaces every worker while requests keep being served."""
+    supervisor, port = start_supervisor(
+        SERVER_WORKERS="2", SERVER_REUSE_PORT=reuse_port
+    )
+    before = wait_for_pids(port, 2)
+
+    supervisor.send_signal(signal.SIGHUP)
+    failures = 0
+    new: set[int] = set()
+    streak = 0
+    deadline = time.monotonic() + 60
+    # Restarted once two new workers answered and the old ones no longer do
+    while len(new) < 2 or streak < 20:
+        assert time.monotonic() < deadline
+        try:
+            pid = get_pid(port)
+        except OSError:
+            failures += 1
+            continue
+        if pid in before:
+            streak = 0
+        else:
+            new.add(pid)
+            streak += 1
+
+    assert failures == 0
+    assert len(new) == 2
+
+
+def get_pid_when_up(port: int) -> int:
+    """Returns the PID of the worker serving a request, waiting for one to listen."""
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            return get_pid(port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
@@ -0,0 +1,31 @@
+# pylint: disable=missing-module-docstring
+
+from importlib.metadata import PackageNotFoundError
+from unittest.mock import patch
+
+from src.core.settings import LogFilterConfig, Settings, get_version
+
+
+@patch("src.core.settings.version", return_value="1.2.3")
+def test_get_version_from_metadata(_):
+    """Test that the version is read from the installed package metadata."""
+    assert get_version() == "1.2.3"
+
+
+@patch("src.core.settings.version", side_effect=PackageNotFoundError)
+def test_get_version_not_installed(_):
+    """Test that a placeholder version is returned when not installed."""
+    assert get_version() == "0.0.0"
+
+
+def test_log_filters_from_environment(monkeypatch):
+    """Test that per logger filters can be configured as JSON in the environment."""
+    monkeypatch.setenv(
+        "LOG_FILTERS", '{"src.exceptions": {"rate_limit": 5, "sample_rate": 0.5}}'
+    )
+
+    filters = Settings(secret_key="test").log_filters
+
+    assert filters == {
+        "src.exceptions": LogFilterConfig(rate_limit=5, sample_rate=0.5, burst=10)
+    }
@@ -0,0 +1,205 @@
+# pylint: disable=missing-module-docstring
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from src.core.rate_limit import RateLimiter, parse_rate_limit
+from src.core.shared_rate_limit import SLOTS_PER_BUCKET, SharedMemoryRateLimitStorage
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+WORKER_SCRIPT = """
+import asyncio, sys, time
+from src.core.rate_limit import RateLimiter, parse_rate_limit
+from src.core.shared_rate_limit import SharedMemoryRateLimitStorage
+
+path, start_at, hits = sys.argv[1], float(sys.argv[2]), int(sys.argv[3])
+
+async def main():
+    storage = SharedMemoryRateLimitStorage(path, slots=1024, lock_stripes=4)
+    limiter = RateLimiter(parse_rate_limit("50/hour"), storage)
+    # Start together so the workers contend for the same key
+    time.sleep(max(start_at - time.time(), 0))
+    allowed = 0
+    for _ in range(hits):
+        allowed += (await limiter.hit("shared-client")).allowed
+    await storage.close()
+    print(allowed)
+
+asyncio.run(main())
+"""
+
+
+@pytest_asyncio.fixture(name="storage")
+async def fixture_storage(tmp_path):
+    """Creates a small shared table in a temporary file."""
+    storage = SharedMemoryRateLimitStorage(
+        str(tmp_path / "rate-limit"), slots=64, lock_stripes=4
+    )
+    yield storage
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_gcra_semantics(storage, clock):
+    """Test that the shared table enforces the same limit as the memory storage."""
+    limiter = RateLimiter(parse_rate_limit("3/minute"), storage, clock=clock)
+
+    results = [await limiter.hit("client") for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    assert results[3].retry_after == pytest.approx(20)
+
+    clock.now += 20
+    assert (await limiter.hit("client")).allowed
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("value, amount", [("3/second", 3), ("7/minute", 7)])
+@pytest.mark.parametrize("now", [1000.0, 12345.678, 1e6, 1e8])
+async def test_burst_with_uneven_interval(storage, value, amount, now, clock):
+    """Test that a full burst is allowed when the period does not divide evenly,
+    despite the float rounding of the TATs."""
+    clock.now = now
+    limiter = RateLimiter(parse_rate_limit(value), storage, clock=clock)
+
+    results = [await limiter.hit("client") for _ in range(amount + 1)]
+
+    assert [result.allowed for result in results] == [True] * amount + [False]
+
+
+@pytest.mark.asyncio
+async def test_tables_are_shared(storage, clock):
+    """Test that two handles on the same file see the same counters."""
+    other = SharedMemoryRateLimitStorage(storage.path, slots=64, lock_stripes=4)
+    try:
+        first = RateLimiter(parse_rate_limit("2/minute"), storage, clock=clock)
+        second = RateLimiter(parse_rate_limit("2/minute"), other, clock=clock)
+
+        assert (await first.hit("client")).allowed
+        assert (await second.hit("client")).allowed
+        assert not (await first.hit("client")).allowed
+        assert not (await second.hit("client")).allowed
+    finally:
+        await other.close()
+
+
+def test_layout_mismatch(storage):
+    """Test that opening a table with a different size is rejected."""
+    with pytest.raises(ValueError, match="different layout"):
+        SharedMemoryRateLimitStorage(storage.path, slots=128)
+
+
+@pytest.mark.asyncio
+async def test_full_bucket_evicts_closest_to_expiry(tmp_path, clock):
+    """Test that a full bucket evicts the key whose quota recovers first."""
+    storage = SharedMemoryRateLimitStorage(
+        str(tmp_path / "one-bucket"), slots=SLOTS_PER_BUCKET, lock_stripes=1
+    )
+    limiter = RateLimiter(parse_rate_limit("1/minute"), storage, clock=clock)
+    try:
+        for i in range(SLOTS_PER_BUCKET):
+            await limiter.hit(f"client-{i}")
+            clock.now += 1
+
+        # Every slot is active, so the oldest key is evicted for the new one
+        assert (await limiter.hit("newcomer")).allowed
+        assert (await limiter.hit("client-0")).allowed
+        assert not (await limiter.hit(f"client-{SLOTS_PER_BUCKET - 1}")).allowed
+    finally:
+        await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_slots_are_reused(tmp_path, clock):
+    """Test that slots of idle keys are reused without evicting active keys."""
+    storage = SharedMemoryRateLimitStorage(
+        str(tmp_path / "one-bucket"), slots=SLOTS_PER_BUCKET, lock_stripes=1
+    )
+    limiter = RateLimiter(parse_rate_limit("1/minute"), storage, clock=clock)
+    try:
+        for i in range(SLOTS_PER_BUCKET):
+            await limiter.hit(f"idle-{i}")
+        clock.now += 60
+        await limiter.hit("active")
+
+        for i in range(SLOTS_PER_BUCKET - 1):
+            assert (await limiter.hit(f"new-{i}")).allowed
+        assert not (await limiter.hit("active")).allowed
+    finally:
+        await storage.close()
+
+
+def test_global_limit_across_processes(tmp_path):
+    """Test that concurrent worker processes together stay within the limit."""
+    path = str(tmp_path / "rate-limit")
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    env.setdefault("SECRET_KEY", "test")
+    start_at = str(time.time() + 1.0)
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER_SCRIPT, path, start_at, "40"],
+            env=env,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(4)
+    ]
+    allowed = [int(worker.communicate(timeout=60)[0]) for worker in workers]
+
+    assert all(worker.returncode == 0 for worker in workers)
+    assert sum(allowed) == 50
+
+
+LOCK_SCRIPT = """
+import fcntl, os, sys
+fd = os.open(sys.argv[1], os.O_RDWR)
+fcntl.lockf(fd, fcntl.LOCK_EX, 64, 1)
+print("locked", flush=True)
+sys.stdin.read()
+"""
+
+
+@pytest.mark.asyncio
+async def test_busy_stripe_does_not_block_the_loop(storage):
+    """Test that a stripe locked by another process is awaited without blocking."""
+    holder = subprocess.Popen(
+        [sys.executable, "-c", LOCK_SCRIPT, storage.path],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        update = asyncio.create_task(storage.update("client", 1000.0, 1.0, 10.0))
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        assert not update.done()
+    finally:
+        holder.communicate(timeout=10)
+
+    assert await asyncio.wait_for(update, timeout=5) == (True, 1001.0)
+
+
+def test_table_must_be_private(tmp_path):
+    """Test that tables in shared directories or behind symbolic links are refused."""
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        SharedMemoryRateLimitStorage(str(shared / "rate-limit"), slots=64)
+
+    target = tmp_path / "target"
+    target.write_bytes(b"")
+    (tmp_path / "rate-limit").symlink_to(target)
+    with pytest.raises(OSError):
+        SharedMemoryRateLimitStorage(str(tmp_path / "rate-limit"), slots=64)
+    assert target.read_bytes() == b""
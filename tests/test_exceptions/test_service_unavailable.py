@@ -0,0 +1,36 @@
+# pylint: disable=missing-module-docstring
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.exceptions.service_unavailable import (
+    ServiceUnavailableError,
+    service_unavailable_handler,
+)
+
+app = FastAPI()
+app.add_exception_handler(ServiceUnavailableError, service_unavailable_handler)
+
+
+@app.get("/busy")
+def busy():
+    """Raises a ServiceUnavailableError."""
+    raise ServiceUnavailableError("Too busy", retry_after=3)
+
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+def test_service_unavailable_handler():
+    """
+    Test that the service unavailable handler returns a 503 with `Retry-After`.
+    """
+    response = client.get("/busy")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert response.json() == {
+        "status": "error",
+        "error": "service_unavailable",
+        "detail": "Too busy",
+    }
@@ -1,16 +1,144 @@
 # pylint: disable=missing-module-docstring
 
-import pytest
-from fastapi import HTTPException
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
 from fastapi.testclient import TestClient
 
+from src.core import security
+from src.core.revocation import TokenDenylist
+from src.core.security import create_access_token
 from src.main import api
+from src.models import TokenData
 
 client = TestClient(api)
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Maximum time allowed for `import src.main` in a fresh interpreter, in seconds
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "1.5"))
+
+IMPORT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "app_built": "api" in vars(src.main),
+}))
+"""
+
 
 def test_read_root():
     """Test API call fails without auth."""
-    with pytest.raises(HTTPException) as exc_info:
-        client.get("/api/v1")
-    assert exc_info.value.status_code == 401
+    response = client.get("/api/v1")
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Not authenticated"}
+
+
+def test_lifespan_startup_and_shutdown():
+    """Test that the application starts and stops through its lifespan."""
+    with TestClient(api) as lifespan_client:
+        response = lifespan_client.get("/api/v1")
+    assert response.status_code == 401
+
+
+def test_import_is_fast_and_side_effect_free(tmp_path):
+    """
+    Test that `import src.main` works outside the repository root, does not build
+    the application and stays within the import time budget.
+    """
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    env.setdefault("SECRET_KEY", "test")
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report["app_built"] is False
+    assert report["elapsed"] < IMPORT_TIME_BUDGET, (
+        f"import src.main took {report['elapsed']:.3f}s, "
+        f"budget is {IMPORT_TIME_BUDGET:.3f}s"
+    )
+
+
+def test_metrics_do_not_require_auth():
+    """Test that the metrics can be scraped without a token."""
+    client.get("/api/v1/")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'auth_failures_total{reason="missing_token"}' in response.text
+    assert 'http_requests_total{method="GET",route="/api/v1/",status="401"}' in (
+        response.text
+    )
+
+
+def test_large_responses_are_compressed():
+    """Test that responses the client accepts compressed are gzipped."""
+    client.get("/api/v1/")
+
+    response = client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert "http_requests_total" in response.text
+
+
+def test_jwks_does_not_require_auth():
+    """Test that the JWKS can be fetched without a token."""
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.json() == {"keys": []}
+
+
+def bearer(username: str = "user") -> dict[str, str]:
+    """Returns the `Authorization` header of a new token for a user."""
+    expire = datetime.now(timezone.utc) + timedelta(minutes=5)
+    token = create_access_token(TokenData(sub=username, exp=expire))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_logout_and_revoke(monkeypatch):
+    """Test that logged out and revoked tokens are rejected."""
+    monkeypatch.setattr(security, "token_denylist", TokenDenylist())
+    current, leaked = bearer(), bearer()
+    leaked_token = leaked["Authorization"].removeprefix("Bearer ")
+
+    assert client.get("/api/v1/", headers=leaked).status_code == 200
+    response = client.post(
+        "/api/v1/revoke", headers=current, json={"token": leaked_token}
+    )
+    assert response.status_code == 200
+    assert client.get("/api/v1/", headers=leaked).status_code == 401
+
+    assert client.post("/api/v1/logout", headers=current).status_code == 200
+    assert client.get("/api/v1/", headers=current).status_code == 401
+
+
+def test_revoke_token_of_other_user(monkeypatch):
+    """Test that users can only revoke their own tokens."""
+    monkeypatch.setattr(security, "token_denylist", TokenDenylist())
+    other_token = bearer("other")["Authorization"].removeprefix("Bearer ")
+
+    response = client.post(
+        "/api/v1/revoke", headers=bearer(), json={"token": other_token}
+    )
+    assert response.status_code == 403
+
+    response = client.post("/api/v1/revoke", headers=bearer(), json={"token": "x"})
+    assert response.status_code == 400
@@ -11,7 +11,7 @@ from src.middlewares.auth import AuthMiddleware
 from src.models import UserBase
 
 app = FastAPI()
-app.add_middleware(AuthMiddleware, exclude_paths=["/open"])
+app.add_middleware(AuthMiddleware, exclude_paths=["/open", "/public/*", "/docs/*/page"])
 
 
 @app.get("/open")
@@ -20,6 +20,18 @@ def open_route():
     return {"status": "success"}
 
 
+@app.get("/public/{name}")
+def public_route(name: str):
+    """Open route matched by a prefix exclusion rule."""
+    return {"name": name}
+
+
+@app.get("/docs/{section}/page")
+def docs_route(section: str):
+    """Open route matched by a glob exclusion rule."""
+    return {"section": section}
+
+
 @app.get("/protected")
 def protected_route(request: Request):
     """Protected route that requires a valid JWT token to access."""
@@ -37,19 +49,39 @@ def test_open_route_no_auth():
     assert response.json() == {"status": "success"}
 
 
-@patch("src.middlewares.auth.oauth2_scheme", new_callable=AsyncMock)
+def test_prefix_and_glob_excluded_routes_no_auth():
+    """Test that auth is not required for paths matching prefix or glob rules."""
+    assert client.get("/public/readme").json() == {"name": "readme"}
+    assert client.get("/docs/intro/page").json() == {"section": "intro"}
+
+
+def test_protected_route_without_token():
+    """Test that a protected route returns 401 when no token is sent."""
+    response = client.get("/protected")
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Not authenticated"}
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_protected_route_with_non_bearer_scheme():
+    """Test that a non bearer `Authorization` header is rejected."""
+    response = client.get("/protected", headers={"Authorization": "Basic abc"})
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Not authenticated"}
+
+
 @patch("src.middlewares.auth.decode_token")
-@patch("src.middlewares.auth.get_user_base")
+@patch("src.middlewares.auth.get_user_base", new_callable=AsyncMock)
 def test_protected_route_with_valid_token(
-    mock_get_user_base: MagicMock,
+    mock_get_user_base: AsyncMock,
     mock_decode_token: MagicMock,
-    mock_oauth2_scheme: AsyncMock,
 ):
     """
     Test that auth properly executed on a protected route and user details are attached
     to the request state.
     """
-    mock_oauth2_scheme.return_value = "validtoken"
     mock_decode_token.return_value = MagicMock(
         sub="testuser", exp=datetime.now(timezone.utc) + timedelta(minutes=60)
     )
@@ -70,14 +102,11 @@ def test_protected_route_with_valid_token(
     }
 
 
-@patch("src.middlewares.auth.oauth2_scheme", new_callable=AsyncMock)
 @patch("src.middlewares.auth.decode_token")
 def test_protected_route_with_invalid_token(
     mock_decode_token: MagicMock,
-    mock_oauth2_scheme: AsyncMock,
 ):
     """Test the auth middleware when the token is invalid."""
-    mock_oauth2_scheme.return_value = "invalidtoken"
     mock_decode_token.return_value = MagicMock(sub=None)
 
     response = client.get(
@@ -87,16 +116,13 @@ def test_protected_route_with_invalid_token(
     assert response.json() == {"detail": "Invalid token"}
 
 
-@patch("src.middlewares.auth.oauth2_scheme", new_callable=AsyncMock)
 @patch("src.middlewares.auth.decode_token")
-@patch("src.middlewares.auth.get_user_base")
+@patch("src.middlewares.auth.get_user_base", new_callable=AsyncMock)
 def test_protected_route_with_missing_user(
-    mock_get_user_base: MagicMock,
+    mock_get_user_base: AsyncMock,
     mock_decode_token: MagicMock,
-    mock_oauth2_scheme: AsyncMock,
 ):
     """Test the auth middleware when the user is invalid."""
-    mock_oauth2_scheme.return_value = "token"
     mock_decode_token.return_value = MagicMock(
         sub="testuser", exp=datetime.now(timezone.utc) + timedelta(minutes=60)
     )
@@ -108,15 +134,34 @@ def test_protected_route_with_missing_user(
 
 
 @patch("src.middlewares.auth.decode_token")
-@patch("src.middlewares.auth.oauth2_scheme", new_callable=AsyncMock)
 def test_protected_route_with_invalid_credentials(
-    mock_oauth2_scheme: AsyncMock,
     mock_decode_token: MagicMock,
 ):
     """Test the auth middleware when the credentials are invalid."""
-    mock_oauth2_scheme.return_value = "token"
     mock_decode_token.side_effect = PyJWTError("Invalid credentials")
 
     response = client.get("/protected", headers={"Authorization": "Bearer token"})
     assert response.status_code == 401
     assert response.json() == {"detail": "Invalid credentials"}
+
+
+@patch("src.middlewares.auth.decode_token")
+@patch("src.middlewares.auth.is_token_revoked")
+@patch("src.middlewares.auth.get_user_base", new_callable=AsyncMock)
+def test_protected_route_with_revoked_token(
+    mock_get_user_base: AsyncMock,
+    mock_is_token_revoked: MagicMock,
+    mock_decode_token: MagicMock,
+):
+    """Test the auth middleware when the token has been revoked."""
+    mock_decode_token.return_value = MagicMock(
+        sub="testuser", exp=datetime.now(timezone.utc) + timedelta(minutes=60)
+    )
+    mock_is_token_revoked.return_value = True
+
+    response = client.get("/protected", headers={"Authorization": "Bearer token"})
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Invalid credentials"}
+    mock_is_token_revoked.assert_called_once_with(mock_decode_token.return_value)
+    mock_get_user_base.assert_not_called()
@@ -0,0 +1,138 @@
+# pylint: disable=missing-module-docstring
+
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.middlewares import CompressionMiddleware
+from src.utils.compression import gzip_encode
+
+BODY = "hello world " * 100
+
+
+def build_app(**options) -> CompressionMiddleware:
+    """Builds an app compressing with gzip only."""
+    app = FastAPI()
+
+    @app.get("/text")
+    async def text() -> PlainTextResponse:
+        return PlainTextResponse(BODY, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small() -> PlainTextResponse:
+        return PlainTextResponse("hello")
+
+    @app.get("/image")
+    async def image() -> Response:
+        return Response(BODY.encode(), media_type="image/png")
+
+    @app.get("/encoded")
+    async def encoded() -> Response:
+        return Response(
+            gzip_encode(BODY.encode()),
+            media_type="text/plain",
+            headers={"Content-Encoding": "gzip"},
+        )
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            yield BODY.encode()
+            yield BODY.encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return CompressionMiddleware(app, encoders={"gzip": gzip_encode}, **options)
+
+
+def get_raw(client: TestClient, path: str, accept_encoding: str = "gzip"):
+    """Requests a path, leaving the body encoded."""
+    return client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+
+def test_compresses_large_body():
+    """Test that a large body is gzipped with matching headers and a weak ETag."""
+    app = build_app()
+    client = TestClient(app)
+
+    response = get_raw(client, "/text")
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"v1"'
+    # The test client decodes the body
+    assert response.text == BODY
+    assert int(response.headers["content-length"]) < len(BODY)
+
+
+def test_not_compressed_without_accepted_encoding():
+    """Test that clients not accepting an available encoding get the plain body."""
+    app = build_app()
+    client = TestClient(app)
+
+    response = get_raw(client, "/text", accept_encoding="identity")
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    assert response.text == BODY
+
+
+def test_small_other_type_and_encoded_bodies_are_passed_through():
+    """Test that small, disallowed content type and encoded bodies are unchanged."""
+    app = build_app()
+    client = TestClient(app)
+
+    assert "content-encoding" not in get_raw(client, "/small").headers
+    assert "content-encoding" not in get_raw(client, "/image").headers
+    response = get_raw(client, "/encoded")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "vary" not in response.headers
+    assert response.text == BODY
+
+
+def test_streaming_body_is_passed_through():
+    """Test that streamed responses are sent as is."""
+    app = build_app()
+    client = TestClient(app)
+
+    response = get_raw(client, "/stream")
+
+    assert "content-encoding" not in response.headers
+    assert response.text == BODY * 2
+
+
+def test_compressed_body_is_cached():
+    """Test that a repeated response is only compressed once per encoding."""
+    middleware = build_app()
+    client = TestClient(middleware)
+    calls = []
+
+    def encoder(data: bytes) -> bytes:
+        calls.append(data)
+        return gzip_encode(data)
+
+    middleware.encoders = {"gzip": encoder}
+    for _ in range(3):
+        assert get_raw(client, "/text").text == BODY
+
+    assert len(calls) == 1
+    assert middleware.cache.stats()["hits"] == 2
+
+
+def test_large_body_is_compressed_on_thread_pool():
+    """Test that bodies from the thread threshold up are compressed off the loop."""
+    app = build_app(thread_threshold=100)
+    client = TestClient(app)
+
+    with patch(
+        "src.middlewares.compression.run_in_threadpool",
+        side_effect=lambda func, body: func(body),
+    ) as run_in_threadpool:
+        response = get_raw(client, "/text")
+
+    run_in_threadpool.assert_called_once()
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BODY
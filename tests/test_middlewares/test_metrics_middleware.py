@@ -0,0 +1,80 @@
+# pylint: disable=missing-module-docstring
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.metrics import HTTP_REQUESTS, HTTP_REQUESTS_IN_PROGRESS, REGISTRY
+from src.middlewares import MetricsMiddleware
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/metrics-test/items/{item_id}")
+def get_item(item_id: int):
+    return {"item_id": item_id}
+
+
+@app.get("/metrics-test/fail")
+def fail():
+    raise RuntimeError("boom")
+
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+def count(method: str, route: str, status: str) -> float:
+    """Returns the number of requests recorded for a series."""
+    return HTTP_REQUESTS.labels(method, route, status).get()
+
+
+def test_requests_are_labelled_by_route_template():
+    """Test that requests to different paths of one route share a series."""
+    before = count("GET", "/metrics-test/items/{item_id}", "200")
+
+    client.get("/metrics-test/items/1")
+    client.get("/metrics-test/items/2")
+
+    assert count("GET", "/metrics-test/items/{item_id}", "200") == before + 2
+    assert 'route="/metrics-test/items/1"' not in REGISTRY.render().decode()
+
+
+def test_status_codes_are_counted():
+    """Test that validation errors, unknown paths and failures are counted."""
+    before = [
+        count("GET", "/metrics-test/items/{item_id}", "422"),
+        count("GET", "unmatched", "404"),
+        count("GET", "/metrics-test/fail", "500"),
+        count("other", "unmatched", "404"),
+    ]
+
+    client.get("/metrics-test/items/abc")
+    client.get("/metrics-test/missing/1")
+    client.get("/metrics-test/fail")
+    client.request("FOO", "/metrics-test/missing/2")
+
+    assert [
+        count("GET", "/metrics-test/items/{item_id}", "422"),
+        count("GET", "unmatched", "404"),
+        count("GET", "/metrics-test/fail", "500"),
+        count("other", "unmatched", "404"),
+    ] == [value + 1 for value in before]
+
+
+def test_latency_is_recorded():
+    """Test that the request duration histogram gets an observation."""
+    client.get("/metrics-test/items/3")
+
+    text = REGISTRY.render().decode()
+
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/metrics-test/items/{item_id}"}'
+    ) in text
+
+
+def test_in_progress_returns_to_zero():
+    """Test that the in progress gauge is decremented, even after failures."""
+    client.get("/metrics-test/fail")
+
+    assert HTTP_REQUESTS_IN_PROGRESS.labels().get() == 0
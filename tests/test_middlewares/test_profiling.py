@@ -0,0 +1,170 @@
+# pylint: disable=missing-module-docstring
+
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.core.settings import settings
+from src.main import create_app
+from src.middlewares import ProfilingMiddleware
+from src.models import UserBase
+
+TRACE_ID = "trace-123"
+
+
+class FakeAuthMiddleware:
+    """Attaches the user named in the `X-User` header and a fixed trace ID."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        state = scope.setdefault("state", {})
+        state["trace_id"] = TRACE_ID
+        for name, value in scope["headers"]:
+            if name == b"x-user":
+                state["user"] = UserBase(
+                    username=value.decode(),
+                    first_name="Jane",
+                    last_name="Doe",
+                    email="jane@example.com",
+                )
+        await self.app(scope, receive, send)
+
+
+def build_client(directory: str) -> TestClient:
+    """Builds an app profiling requests of the user "admin"."""
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow() -> dict[str, bool]:
+        await asyncio.sleep(0.02)
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, users=["admin"], directory=directory)
+    app.add_middleware(FakeAuthMiddleware)
+    return TestClient(app)
+
+
+def test_allowed_user_gets_collapsed_profile(tmp_path):
+    """Test that the profile is stored under the trace ID and named in a header."""
+    client = build_client(str(tmp_path))
+
+    response = client.get(
+        "/slow", headers={"X-User": "admin", "X-Profile": "collapsed"}
+    )
+
+    assert response.json() == {"ok": True}
+    assert response.headers["X-Profile"] == f"{TRACE_ID}.collapsed.txt"
+    profile = (tmp_path / f"{TRACE_ID}.collapsed.txt").read_text()
+    assert "slow (" in profile
+    assert "sleep (" in profile
+
+
+def test_profile_is_stored_off_the_event_loop(tmp_path, monkeypatch):
+    """Test that rendering and writing the profile does not block the event loop."""
+    threads = []
+    store = ProfilingMiddleware.store
+
+    def record_thread(self, *args):
+        threads.append(threading.current_thread())
+        store(self, *args)
+
+    monkeypatch.setattr(ProfilingMiddleware, "store", record_thread)
+    client = build_client(str(tmp_path))
+    loop_threads = []
+
+    @client.app.get("/thread")
+    async def thread() -> dict[str, bool]:
+        loop_threads.append(threading.current_thread())
+        return {"ok": True}
+
+    client.get("/thread", headers={"X-User": "admin", "X-Profile": "collapsed"})
+
+    assert len(threads) == 1
+    assert threads != loop_threads
+    assert (tmp_path / f"{TRACE_ID}.collapsed.txt").exists()
+
+
+def test_allowed_user_gets_speedscope_profile(tmp_path):
+    """Test that speedscope profiles are stored as JSON."""
+    client = build_client(str(tmp_path))
+
+    response = client.get(
+        "/slow", headers={"X-User": "admin", "X-Profile": "Speedscope"}
+    )
+
+    document = json.loads((tmp_path / response.headers["X-Profile"]).read_text())
+    assert document["profiles"][0]["type"] == "sampled"
+    assert document["name"] == TRACE_ID
+
+
+def test_other_users_and_formats_are_not_profiled(tmp_path):
+    """Test that only allowed users asking for a known format are profiled."""
+    client = build_client(str(tmp_path))
+
+    for headers in (
+        {"X-Profile": "collapsed"},
+        {"X-User": "user", "X-Profile": "collapsed"},
+        {"X-User": "admin", "X-Profile": "pstats"},
+        {"X-User": "admin"},
+    ):
+        response = client.get("/slow", headers=headers)
+
+        assert response.status_code == 200
+        assert "X-Profile" not in response.headers
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_middleware_is_installed_with_profiling_users(monkeypatch, tmp_path):
+    """Test that the middleware is only installed when users are configured."""
+
+    def installed() -> bool:
+        return any(
+            middleware.cls is ProfilingMiddleware
+            for middleware in create_app().user_middleware
+        )
+
+    assert not installed()
+
+    monkeypatch.setattr(settings, "profiling_users", "admin")
+    with pytest.raises(ValueError, match="PROFILING_DIR"):
+        create_app()
+
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+
+    assert installed()
+
+
+def test_profiles_are_not_stored_in_shared_directories(tmp_path):
+    """Test that no profile is written to a directory other users can access."""
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    client = build_client(str(shared))
+
+    response = client.get(
+        "/slow", headers={"X-User": "admin", "X-Profile": "collapsed"}
+    )
+
+    assert response.json() == {"ok": True}
+    assert not list(shared.iterdir())
+
+
+def test_profile_directory_is_created_private(tmp_path):
+    """Test that a missing profile directory is created for the current user only."""
+    directory = tmp_path / "profiles"
+    client = build_client(str(directory))
+
+    client.get("/slow", headers={"X-User": "admin", "X-Profile": "collapsed"})
+
+    assert directory.stat().st_mode & 0o777 == 0o700
+    assert (directory / f"{TRACE_ID}.collapsed.txt").exists()
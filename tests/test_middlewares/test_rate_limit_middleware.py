@@ -0,0 +1,88 @@
+# pylint: disable=missing-module-docstring
+
+from typing import Callable
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.rate_limit import RateLimiter, parse_rate_limit
+from src.middlewares import RateLimitMiddleware
+from src.middlewares.rate_limit import get_client_address
+
+
+def build_client(limit: str, clock: Callable[[], float]) -> TestClient:
+    """Builds an app limited by `limit` and returns a client for it."""
+    app = FastAPI()
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=RateLimiter(parse_rate_limit(limit), clock=clock),
+    )
+
+    @app.get("/ping")
+    def ping():
+        return {"message": "pong"}
+
+    return TestClient(app)
+
+
+def test_allowed_response_has_quota_headers(clock):
+    """Test that allowed responses describe the remaining quota."""
+    client = build_client("10/minute", clock)
+
+    response = client.get("/ping")
+
+    assert response.status_code == 200
+    assert response.json() == {"message": "pong"}
+    assert response.headers["RateLimit-Limit"] == "10"
+    assert response.headers["RateLimit-Policy"] == "10;w=60"
+    assert response.headers["RateLimit-Remaining"] == "9"
+    assert response.headers["RateLimit-Reset"] == "6"
+
+
+def test_exceeded_response_payload(clock):
+    """Test that the 429 response carries the rate limit error payload."""
+    client = build_client("2 per 1 minute", clock)
+    client.get("/ping")
+    client.get("/ping")
+    clock.now += 10
+
+    response = client.get("/ping")
+
+    assert response.status_code == 429
+    assert response.json() == {
+        "status": "error",
+        "error": "rate_limit_exceeded",
+        "detail": "Rate limit exceeded: 2 per 1 minute",
+    }
+    assert response.headers["Retry-After"] == "20"
+    assert response.headers["RateLimit-Remaining"] == "0"
+    assert response.headers["RateLimit-Reset"] == "50"
+    assert int(response.headers["Content-Length"]) == len(response.content)
+
+
+def test_zero_limit_matches_slowapi_detail(clock):
+    """Test that the payload matches what slowapi produced for the same limit."""
+    client = build_client("0/minute", clock)
+
+    response = client.get("/ping")
+
+    assert response.status_code == 429
+    assert response.json()["detail"] == "Rate limit exceeded: 0 per 1 minute"
+    assert response.headers["Retry-After"] == "60"
+
+
+def test_rate_limit_per_client(clock):
+    """Test that clients are limited independently."""
+    client = build_client("1/minute", clock)
+    other_client = TestClient(client.app, client=("10.0.0.2", 1234))
+
+    assert client.get("/ping").status_code == 200
+    assert other_client.get("/ping").status_code == 200
+    assert client.get("/ping").status_code == 429
+
+
+def test_get_client_address():
+    """Test that the client host is used, with slowapi's fallback."""
+    assert get_client_address({"client": ("10.0.0.1", 80)}) == "10.0.0.1"
+    assert get_client_address({"client": None}) == "127.0.0.1"
+    assert get_client_address({}) == "127.0.0.1"
@@ -0,0 +1,93 @@
+# pylint: disable=missing-module-docstring
+
+import re
+
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from src.core.settings import settings
+from src.middlewares import ServerTimingMiddleware, StageMarkMiddleware
+from src.models import MessageResponse
+from src.routes.base import StandardResponse, StandardRoute
+
+
+def build_client(monkeypatch) -> TestClient:
+    """Builds a timed app with a marked middleware stage and a standard route."""
+    monkeypatch.setattr(settings, "server_timing_enabled", True)
+    router = APIRouter(
+        default_response_class=StandardResponse, route_class=StandardRoute
+    )
+
+    @router.get("/message", response_model=MessageResponse)
+    async def get_message() -> MessageResponse:
+        return MessageResponse(message="hello")
+
+    @router.get("/fail")
+    def fail() -> None:
+        raise HTTPException(status_code=409, detail="Conflict")
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(StageMarkMiddleware, name="outer")
+    app.add_middleware(ServerTimingMiddleware)
+    return TestClient(app)
+
+
+def stages(header: str) -> list[str]:
+    """Returns the stage names of a `Server-Timing` header."""
+    assert re.fullmatch(r"(\w+;dur=\d+\.\d{3})(, \w+;dur=\d+\.\d{3})*", header)
+    return [metric.split(";")[0] for metric in header.split(", ")]
+
+
+def test_stages_are_reported(monkeypatch):
+    """Test that middleware, route and rendering stages are in the header."""
+    client = build_client(monkeypatch)
+
+    response = client.get("/message")
+
+    assert response.json() == {"status": "success", "detail": {"message": "hello"}}
+    assert stages(response.headers["Server-Timing"]) == [
+        "outer",
+        "validation",
+        "handler",
+        "render",
+        "response",
+        "total",
+    ]
+
+
+def test_unmatched_requests_are_timed(monkeypatch):
+    """Test that responses not produced by a route still get the header."""
+    client = build_client(monkeypatch)
+
+    response = client.get("/missing")
+
+    assert response.status_code == 404
+    assert stages(response.headers["Server-Timing"]) == ["outer", "response", "total"]
+
+
+def test_handler_stage_is_marked_on_errors(monkeypatch):
+    """Test that a failing handler still ends its stage."""
+    client = build_client(monkeypatch)
+
+    response = client.get("/fail")
+
+    assert response.status_code == 409
+    assert "handler" in stages(response.headers["Server-Timing"])
+
+
+def test_requests_are_not_timed_by_default():
+    """Test that routes are not wrapped and no header is added when disabled."""
+    app = FastAPI()
+    router = APIRouter(route_class=StandardRoute)
+
+    @router.get("/plain")
+    def plain():  # type: ignore[no-untyped-def]
+        return {"status": "ok"}
+
+    app.include_router(router)
+
+    response = TestClient(app).get("/plain")
+
+    assert "Server-Timing" not in response.headers
+    assert router.routes[0].dependant.call is plain
@@ -1,6 +1,9 @@
 # pylint: disable=missing-module-docstring
 
+import asyncio
+
 from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
 
 from src.core.context import trace_id_var
@@ -26,6 +29,12 @@ def get_trace_id(request: Request):
     }
 
 
+@app.get("/stream")
+def stream():
+    """Endpoint returning a streaming response in several chunks."""
+    return StreamingResponse(iter([b"first,", b"second,", b"third"]))
+
+
 client = TestClient(app)
 
 
@@ -44,3 +53,50 @@ def test_trace_id_in_response_header_and_body():
     # Check trace ID is set in request.state and context var (and they match)
     assert body["trace_id_state"] == trace_id_header
     assert body["trace_id_context"] == trace_id_header
+
+
+def test_trace_id_on_streaming_response():
+    """
+    Test that streaming responses keep their chunked body and still receive the
+    trace ID header.
+    """
+    response = client.get("/stream")
+
+    assert response.status_code == 200
+    assert response.content == b"first,second,third"
+    assert response.headers.get("X-Trace-ID") is not None
+
+
+def test_trace_id_unique_per_request():
+    """Test that each request is given a different trace ID."""
+    first = client.get("/trace-id").headers["X-Trace-ID"]
+    second = client.get("/trace-id").headers["X-Trace-ID"]
+
+    assert first != second
+
+
+def test_trace_id_context_reset_after_request():
+    """Test that the context variable is restored once the request has finished."""
+    seen = {}
+
+    async def inner_app(scope, receive, send):
+        seen["trace_id"] = trace_id_var.get()
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        middleware = TraceIdMiddleware(inner_app)
+        await middleware({"type": "http", "headers": []}, receive, send)
+        return trace_id_var.get()
+
+    assert asyncio.run(run()) is None
+    assert seen["trace_id"] is not None
+    assert (b"x-trace-id", seen["trace_id"].encode()) in messages[0]["headers"]
@@ -1,27 +1,34 @@
 # pylint: disable=missing-module-docstring
 
+import asyncio
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
+from src.exceptions import ServiceUnavailableError, service_unavailable_handler
 from src.models import User
 from src.routes.auth import router
+from src.services.user_repository import InMemoryUserRepository
+from src.services.users import get_user, set_user_repository
 
 app = FastAPI()
 app.include_router(router)
+app.add_exception_handler(ServiceUnavailableError, service_unavailable_handler)
 
 client = TestClient(app)
 
 
-@patch("src.routes.auth.user_exists")
-@patch("src.routes.auth.create_user")
+@patch("src.routes.auth.user_exists", new_callable=AsyncMock)
+@patch("src.routes.auth.create_user", new_callable=AsyncMock)
 @patch("src.routes.auth.create_access_token")
 def test_register_success(
     mock_create_access_token: MagicMock,
-    mock_create_user: MagicMock,
-    mock_user_exists: MagicMock,
+    mock_create_user: AsyncMock,
+    mock_user_exists: AsyncMock,
 ):
     """Test the registration route when user doesn't exist."""
     mock_user_exists.return_value = False
@@ -52,8 +59,8 @@ def test_register_success(
     )  # Assert ISO format
 
 
-@patch("src.routes.auth.user_exists")
-def test_register_user_exists(mock_user_exists: MagicMock):
+@patch("src.routes.auth.user_exists", new_callable=AsyncMock)
+def test_register_user_exists(mock_user_exists: AsyncMock):
     """Test the registration route when the user already exists."""
     mock_user_exists.return_value = True
 
@@ -70,10 +77,10 @@ def test_register_user_exists(mock_user_exists: MagicMock):
     assert response.json() == {"detail": "User already exists"}
 
 
-@patch("src.routes.auth.authenticate_user")
+@patch("src.routes.auth.authenticate_user", new_callable=AsyncMock)
 @patch("src.routes.auth.create_access_token")
 def test_login_success(
-    mock_create_access_token: MagicMock, mock_authenticate_user: MagicMock
+    mock_create_access_token: MagicMock, mock_authenticate_user: AsyncMock
 ):
     """Test the login route when credentials are correct."""
     mock_authenticate_user.return_value = User(
@@ -104,8 +111,8 @@ def test_login_success(
     )  # Assert ISO format
 
 
-@patch("src.routes.auth.authenticate_user")
-def test_login_invalid_credentials(mock_authenticate_user: MagicMock):
+@patch("src.routes.auth.authenticate_user", new_callable=AsyncMock)
+def test_login_invalid_credentials(mock_authenticate_user: AsyncMock):
     """Test the login route when credentials are incorrect."""
     mock_authenticate_user.return_value = None
 
@@ -121,3 +128,57 @@ def test_login_invalid_credentials(mock_authenticate_user: MagicMock):
 
     assert response.status_code == 401
     assert response.json() == {"detail": "Incorrect username or password"}
+
+
+@patch("src.routes.auth.authenticate_user", new_callable=AsyncMock)
+def test_login_hash_pool_saturated(mock_authenticate_user: AsyncMock):
+    """Test the login route returns 503 when the password hashing pool is full."""
+    mock_authenticate_user.side_effect = ServiceUnavailableError(
+        "Too many concurrent password-hash requests, please retry later",
+        retry_after=1,
+    )
+
+    response = client.post(
+        "/token",
+        data={
+            "username": "user",
+            "password": "password123",
+            "grant_type": "password",
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_registrations_of_same_username():
+    """Test that only one of two concurrent registrations of a username succeeds,
+    although both pass the existence check while their passwords are hashed."""
+    set_user_repository(InMemoryUserRepository())
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            responses = await asyncio.gather(
+                *(
+                    c.post(
+                        "/register",
+                        json={
+                            "username": "racer",
+                            "password": password,
+                            "first_name": "Race",
+                            "last_name": "User",
+                            "email": "racer@email.com",
+                        },
+                    )
+                    for password in ("first-password", "second-password")
+                )
+            )
+        statuses = sorted(response.status_code for response in responses)
+        assert statuses == [200, 400]
+        rejected = next(r for r in responses if r.status_code == 400)
+        assert rejected.json() == {"detail": "User already exists"}
+        assert await get_user("racer") is not None
+    finally:
+        set_user_repository(None)
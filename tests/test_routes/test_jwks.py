@@ -0,0 +1,58 @@
+# pylint: disable=missing-module-docstring
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core import security
+from src.core.key_ring import KeyRing, load_key
+from src.routes.jwks import router
+
+app = FastAPI()
+app.include_router(router)
+
+client = TestClient(app)
+
+
+@pytest.fixture(name="key_ring", autouse=True)
+def fixture_key_ring():
+    """Uses a ring with an HMAC key and a published RSA key."""
+    # pylint: disable=import-outside-toplevel
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    pem = rsa.generate_private_key(65537, 2048).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    ring = KeyRing([load_key("rsa", "RS256", pem), load_key("hs", "HS256", "s")], "hs")
+    security.set_key_ring(ring)
+    yield ring
+    security.set_key_ring(None)
+
+
+def test_get_jwks(key_ring):
+    """Test that the public keys are served with caching headers."""
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/jwk-set+json"
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert response.headers["etag"] == key_ring.jwks_etag.decode()
+    (jwk,) = json.loads(response.content)["keys"]
+    assert jwk["kid"] == "rsa"
+    assert jwk["kty"] == "RSA"
+
+
+def test_get_jwks_not_modified(key_ring):
+    """Test that a current client copy is revalidated with a 304."""
+    response = client.get(
+        "/.well-known/jwks.json", headers={"If-None-Match": key_ring.jwks_etag.decode()}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
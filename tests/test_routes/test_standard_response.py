@@ -0,0 +1,77 @@
+# pylint: disable=missing-module-docstring
+
+import json
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from src.routes import StandardResponse
+from src.utils import serialization
+
+CONTENTS = [
+    None,
+    "text",
+    "ünïcödé ✓  ",
+    'control \x01 chars " and \\ escapes',
+    0,
+    -17,
+    2**40,
+    0.1,
+    1.5,
+    -2.25,
+    True,
+    [],
+    {},
+    [1, "two", 3.0, None, False],
+    {"message": "Successfully connected to the API"},
+    {"nested": {"list": [{"a": 1}, {"b": [2, 3]}]}, "empty": {}},
+    {1: "int key", "str": "str key"},
+    {
+        "access_token": "abc.def.ghi",
+        "token_type": "bearer",
+        "expires_at": "2024-01-01T00:00:00Z",
+    },
+]
+
+
+def legacy_render(content):
+    """The previous `StandardResponse.render` implementation."""
+    return bytes(JSONResponse(None).render({"status": "success", "detail": content}))
+
+
+@pytest.fixture(
+    name="encoder",
+    params=[
+        "stdlib",
+        pytest.param(
+            "orjson",
+            marks=pytest.mark.skipif(
+                serialization.orjson is None, reason="orjson is not installed"
+            ),
+        ),
+    ],
+)
+def fixture_encoder(request, monkeypatch):
+    """Runs each test with both the stdlib and orjson encoders."""
+    if request.param == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("content", CONTENTS)
+def test_render_matches_legacy_output(encoder, content):
+    """Test that the rendered body is byte-for-byte identical to the old output."""
+    # pylint: disable=unused-argument
+    assert StandardResponse(content).body == legacy_render(content)
+
+
+def test_render_envelope(encoder):  # pylint: disable=unused-argument
+    """Test that content is wrapped in the standard success envelope."""
+    response = StandardResponse({"message": "hi"})
+
+    assert json.loads(response.body) == {
+        "status": "success",
+        "detail": {"message": "hi"},
+    }
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["content-length"] == str(len(response.body))
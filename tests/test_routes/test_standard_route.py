@@ -0,0 +1,164 @@
+# pylint: disable=missing-module-docstring
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import APIRouter, BackgroundTasks, FastAPI, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.models import Token
+from src.routes import StandardResponse
+from src.routes.base import EncodedJSON, StandardRoute, get_type_adapter
+
+EXPIRES_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class Profile(BaseModel):
+    """Response model with optional and aliased fields."""
+
+    name: str
+    nickname: str | None = None
+    user_id: int = 0
+
+    model_config = {"populate_by_name": True, "alias_generator": lambda f: f.upper()}
+
+
+class ProfileWithSecret(Profile):
+    """Subclass carrying a field that must never leak into the response."""
+
+    secret: str = "hunter2"
+
+
+background_runs: list[str] = []
+
+
+def build_router(route_class: type[APIRoute]) -> APIRouter:
+    """Builds the same set of routes with the given route class."""
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/token", response_model=Token)
+    async def token() -> Token:
+        return Token(access_token="abc", expires_at=EXPIRES_AT)
+
+    @router.get("/token-json", response_model=Token, response_class=JSONResponse)
+    async def token_json() -> Token:
+        return Token(access_token="abc", expires_at=EXPIRES_AT)
+
+    @router.get("/profile", response_model=Profile)
+    def profile() -> Profile:
+        return Profile(name="Jane", user_id=7)
+
+    @router.get("/dict", response_model=Profile)
+    def profile_dict() -> dict:
+        return {"name": "Jane", "ignored": True}
+
+    @router.get("/subclass", response_model=Profile)
+    def subclass() -> Profile:
+        return ProfileWithSecret(name="Jane")
+
+    @router.get(
+        "/exclude-none", response_model=Profile, response_model_exclude_none=True
+    )
+    def exclude_none() -> Profile:
+        return Profile(name="Jane")
+
+    @router.post("/created", response_model=Profile, status_code=201)
+    async def created(background_tasks: BackgroundTasks) -> Profile:
+        background_tasks.add_task(background_runs.append, "created")
+        return Profile(name="Jane")
+
+    @router.get("/header", response_model=Profile)
+    def header(response: Response) -> Profile:
+        response.headers["X-Custom"] = "yes"
+        return Profile(name="Jane")
+
+    return router
+
+
+def build_client(route_class: type[APIRoute]) -> TestClient:
+    """Builds a client for an app using `StandardResponse` by default."""
+    app = FastAPI(default_response_class=StandardResponse)
+    app.include_router(build_router(route_class))
+    return TestClient(app)
+
+
+fast_client = build_client(StandardRoute)
+default_client = build_client(APIRoute)
+
+
+def get_route(client: TestClient, path: str) -> APIRoute:
+    """Returns the route registered for a path."""
+    return next(route for route in client.app.routes if route.path == path)
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("GET", "/token"),
+        ("GET", "/token-json"),
+        ("GET", "/profile"),
+        ("GET", "/dict"),
+        ("GET", "/subclass"),
+        ("GET", "/exclude-none"),
+        ("POST", "/created"),
+        ("GET", "/header"),
+    ],
+)
+def test_matches_default_route(method, path):
+    """Test that responses are byte-for-byte identical to FastAPI's default route."""
+    fast = fast_client.request(method, path)
+    default = default_client.request(method, path)
+
+    assert fast.status_code == default.status_code
+    assert fast.content == default.content
+    assert fast.headers == default.headers
+
+
+def test_fast_path_installed():
+    """Test that the endpoint is only wrapped when the fast path applies."""
+    assert get_route(fast_client, "/token").dependant.call is not (
+        get_route(fast_client, "/token").endpoint
+    )
+    for path in ("/exclude-none", "/header"):
+        route = get_route(fast_client, path)
+        assert route.dependant.call is route.endpoint
+
+
+def test_envelope_and_aliases():
+    """Test that the fast path wraps the model in the envelope using aliases."""
+    response = fast_client.get("/profile")
+
+    assert response.json() == {
+        "status": "success",
+        "detail": {"NAME": "Jane", "NICKNAME": None, "USER_ID": 7},
+    }
+
+
+def test_subclass_is_revalidated():
+    """Test that subclasses of the response model do not leak extra fields."""
+    assert "secret" not in fast_client.get("/subclass").json()["detail"]
+
+
+def test_status_code_and_background_tasks():
+    """Test that the route status code is used and background tasks still run."""
+    background_runs.clear()
+
+    response = fast_client.post("/created")
+
+    assert response.status_code == 201
+    assert background_runs == ["created"]
+
+
+def test_render_encoded_json():
+    """Test that pre-encoded content is spliced into the envelope unchanged."""
+    response = StandardResponse(EncodedJSON(b'{"a":1}'))
+
+    assert response.body == b'{"status":"success","detail":{"a":1}}'
+
+
+def test_type_adapter_cached():
+    """Test that adapters are built once per model."""
+    assert get_type_adapter(Token) is get_type_adapter(Token)
@@ -0,0 +1,128 @@
+# pylint: disable=missing-module-docstring,protected-access
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from src.models import User
+from src.services.user_repository import (
+    InMemoryUserRepository,
+    SQLiteUserRepository,
+    UserAlreadyExistsError,
+)
+
+
+def make_user(username: str = "testuser", first_name: str = "Test") -> User:
+    """Builds a user for repository tests."""
+    return User(
+        username=username,
+        hashed_password="hashed",
+        first_name=first_name,
+        last_name="User",
+        email=f"{username}@email.com",
+    )
+
+
+@pytest_asyncio.fixture(name="repository", params=["memory", "sqlite"])
+async def fixture_repository(request, tmp_path):
+    """Yields each repository implementation in turn."""
+    if request.param == "sqlite":
+        repository = SQLiteUserRepository(str(tmp_path / "users.db"), pool_size=2)
+    else:
+        repository = InMemoryUserRepository()
+    yield repository
+    await repository.close()
+
+
+@pytest.mark.asyncio
+async def test_create_and_get(repository):
+    """Test that a created user can be read back with and without the password."""
+    await repository.create(make_user())
+
+    assert await repository.exists("testuser") is True
+    user = await repository.get("testuser")
+    assert user == make_user()
+
+    user_base = await repository.get_base("testuser")
+    assert user_base.username == "testuser"
+    assert user_base.email == "testuser@email.com"
+    assert not hasattr(user_base, "hashed_password")
+
+
+@pytest.mark.asyncio
+async def test_missing_user(repository):
+    """Test lookups of a user that does not exist."""
+    assert await repository.exists("missing") is False
+    assert await repository.get("missing") is None
+    assert await repository.get_base("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_create_rejects_existing(repository):
+    """Test that creating an existing username fails and keeps the stored user."""
+    await repository.create(make_user(first_name="Old"))
+    with pytest.raises(UserAlreadyExistsError):
+        await repository.create(make_user(first_name="New"))
+
+    user = await repository.get("testuser")
+    assert user.first_name == "Old"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_create_of_same_user(repository):
+    """Test that only one of several concurrent creations of a username succeeds."""
+    results = await asyncio.gather(
+        *(repository.create(make_user(first_name=f"N{i}")) for i in range(10)),
+        return_exceptions=True,
+    )
+
+    created = [result for result in results if isinstance(result, User)]
+    assert len(created) == 1
+    assert all(
+        isinstance(result, UserAlreadyExistsError)
+        for result in results
+        if result not in created
+    )
+    assert await repository.get("testuser") == created[0]
+
+
+@pytest.mark.asyncio
+async def test_in_memory_seed():
+    """Test that the in-memory repository can be seeded with users."""
+    repository = InMemoryUserRepository([make_user("seeded")])
+    assert await repository.exists("seeded") is True
+
+
+@pytest.mark.asyncio
+async def test_sqlite_persists_and_uses_wal(tmp_path):
+    """Test that SQLite users survive reopening and the database uses WAL mode."""
+    path = str(tmp_path / "users.db")
+    repository = SQLiteUserRepository(path)
+    await repository.create(make_user())
+    await repository.close()
+
+    reopened = SQLiteUserRepository(path)
+    assert await reopened.exists("testuser") is True
+    journal_mode = await reopened._run(reopened._fetch_one("PRAGMA journal_mode"))
+    index = await reopened._run(
+        reopened._fetch_one(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+            "users",
+        )
+    )
+    await reopened.close()
+
+    assert journal_mode == ("wal",)
+    assert index == ("idx_users_username",)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_concurrent_queries(tmp_path):
+    """Test that concurrent queries are spread over the connection pool."""
+    repository = SQLiteUserRepository(str(tmp_path / "users.db"), pool_size=4)
+    await asyncio.gather(*(repository.create(make_user(f"user{i}")) for i in range(20)))
+    results = await asyncio.gather(*(repository.exists(f"user{i}") for i in range(20)))
+    await repository.close()
+
+    assert all(results)
@@ -1,54 +1,71 @@
 # pylint: disable=missing-module-docstring
 
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.core.response_cache import CachedResponse, response_cache
+from src.models import UserBase
+from src.services.user_repository import UserAlreadyExistsError
 from src.services.users import (
     authenticate_user,
     create_user,
     get_user,
     get_user_base,
+    get_user_repository,
+    invalidate_user_cache,
+    user_cache,
     user_exists,
 )
 
 
-def test_user_exists_true():
+@pytest.mark.asyncio
+async def test_user_exists_true():
     """Test that user_exists returns True for an existing user."""
-    assert user_exists("user") is True
+    assert await user_exists("user") is True
 
 
-def test_user_exists_false():
+@pytest.mark.asyncio
+async def test_user_exists_false():
     """Test that user_exists returns False for a non-existing user."""
-    assert user_exists("nonexistent_user") is False
+    assert await user_exists("nonexistent_user") is False
 
 
-def test_get_user_existing():
+@pytest.mark.asyncio
+async def test_get_user_existing():
     """Test that get_user returns a user when the user exists."""
-    user = get_user("user")
+    user = await get_user("user")
     assert user is not None
     assert user.username == "user"
 
 
-def test_get_user_non_existing():
+@pytest.mark.asyncio
+async def test_get_user_non_existing():
     """Test that get_user returns None for a non-existing user."""
-    user = get_user("nonexistent_user")
+    user = await get_user("nonexistent_user")
     assert user is None
 
 
-def test_get_user_base_existing():
+@pytest.mark.asyncio
+async def test_get_user_base_existing():
     """Test that get_user returns a user base when the user exists."""
-    user = get_user_base("user")
+    user = await get_user_base("user")
     assert user is not None
     assert user.username == "user"
     assert not hasattr(user, "hashed_password")
 
 
-def test_get_user_base_non_existing():
+@pytest.mark.asyncio
+async def test_get_user_base_non_existing():
     """Test that get_user returns None for a non-existing user."""
-    user = get_user_base("nonexistent_user")
+    user = await get_user_base("nonexistent_user")
     assert user is None
 
 
-def test_create_user_success():
+@pytest.mark.asyncio
+async def test_create_user_success():
     """Test that create_user successfully creates a new user."""
-    new_user = create_user(
+    new_user = await create_user(
         "new_user", "newpassword", "New", "User", "newuser@email.com"
     )
     assert new_user.username == "new_user"
@@ -58,32 +75,86 @@ def test_create_user_success():
     assert new_user.email == "newuser@email.com"
 
 
-def test_create_user_duplicate():
+@pytest.mark.asyncio
+async def test_create_user_duplicate():
     """Test that create_user does not overwrite an existing user."""
-    create_user(
+    user = await create_user(
         "existing_user", "password123", "Existing", "User", "existinguser@email.com"
     )
-    new_user = create_user(
-        "existing_user", "newpassword", "Existing", "User", "existinguser@email.com"
-    )
-    assert new_user.username == "existing_user"
-    assert new_user.hashed_password != "newpassword"
+    with pytest.raises(UserAlreadyExistsError):
+        await create_user(
+            "existing_user", "newpassword", "Existing", "User", "existinguser@email.com"
+        )
+    assert await get_user("existing_user") == user
 
 
-def test_authenticate_user_success():
+@pytest.mark.asyncio
+async def test_authenticate_user_success():
     """Test that authenticate_user returns the user when credentials are correct."""
-    user = authenticate_user("user", "password")
+    user = await authenticate_user("user", "password")
     assert user is not None
     assert user.username == "user"
 
 
-def test_authenticate_user_wrong_password():
+@pytest.mark.asyncio
+async def test_authenticate_user_wrong_password():
     """Test that authenticate_user returns None when the password is incorrect."""
-    user = authenticate_user("user", "wrongpassword")
+    user = await authenticate_user("user", "wrongpassword")
     assert user is None
 
 
-def test_authenticate_user_non_existing_user():
+@pytest.mark.asyncio
+async def test_authenticate_user_non_existing_user():
     """Test that authenticate_user returns None when the user does not exist."""
-    user = authenticate_user("nonexistent_user", "password")
+    user = await authenticate_user("nonexistent_user", "password")
     assert user is None
+
+
+@pytest.mark.asyncio
+async def test_get_user_base_cached():
+    """Test that repeated lookups are served from the cache without the repository."""
+    user_cache.clear()
+    first = await get_user_base("user")
+
+    with patch.object(
+        get_user_repository(), "get_base", new_callable=AsyncMock
+    ) as mock_get_base:
+        second = await get_user_base("user")
+        mock_get_base.assert_not_called()
+
+    assert second is first
+
+
+@pytest.mark.asyncio
+async def test_get_user_base_missing_not_cached():
+    """Test that unknown users are not cached."""
+    user_cache.clear()
+    await get_user_base("nonexistent_user")
+    assert user_cache.get("nonexistent_user") is None
+
+
+@pytest.mark.asyncio
+async def test_create_user_invalidates_cache():
+    """Test that creating a user drops any cached profile for that username."""
+    user_cache.set(
+        "cached_user",
+        UserBase(
+            username="cached_user", first_name="Old", last_name="User", email="o@e.com"
+        ),
+    )
+
+    await create_user("cached_user", "password123", "New", "User", "new@email.com")
+    assert (await get_user_base("cached_user")).first_name == "New"
+
+
+def test_invalidate_user_cache_drops_cached_responses():
+    """Test that a user's cached responses are dropped when the user changes."""
+    response = CachedResponse(headers=[], body=b"{}", etag=b'"etag"')
+    response_cache.set(("/me", b"", "jane"), response)
+    response_cache.set(("/me", b"", "john"), response)
+
+    invalidate_user_cache("jane")
+
+    assert response_cache.get(("/me", b"", "jane")) is None
+    assert response_cache.get(("/me", b"", "john")) is response
+    response_cache.clear()
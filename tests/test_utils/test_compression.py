@@ -0,0 +1,62 @@
+# pylint: disable=missing-module-docstring
+
+import gzip
+
+from src.utils.compression import (
+    choose_encoding,
+    get_encoders,
+    gzip_encode,
+    parse_accept_encoding,
+)
+
+ENCODERS = {"zstd": None, "br": None, "gzip": None}
+
+
+def test_parse_accept_encoding():
+    """Test that codings are lower cased and get their quality, defaulting to 1."""
+    assert parse_accept_encoding(b"GZIP, br;q=0.5, zstd ; q=0, *;q=bad") == {
+        "gzip": 1.0,
+        "br": 0.5,
+        "zstd": 0.0,
+        "*": 0.0,
+    }
+
+
+def test_choose_encoding_prefers_highest_quality():
+    """Test that the coding with the highest quality is chosen."""
+    assert choose_encoding(b"gzip, br;q=0.5", ENCODERS) == "gzip"
+
+
+def test_choose_encoding_ties_go_to_most_preferred():
+    """Test that codings of equal quality are chosen in preference order."""
+    assert choose_encoding(b"gzip, br, zstd", ENCODERS) == "zstd"
+    assert choose_encoding(b"gzip, br", ENCODERS) == "br"
+
+
+def test_choose_encoding_wildcard():
+    """Test that the wildcard covers codings not listed, but not excluded ones."""
+    assert choose_encoding(b"*", ENCODERS) == "zstd"
+    assert choose_encoding(b"zstd;q=0, *", ENCODERS) == "br"
+
+
+def test_choose_encoding_none():
+    """Test that no coding is chosen without an acceptable one."""
+    assert choose_encoding(None, ENCODERS) is None
+    assert choose_encoding(b"", ENCODERS) is None
+    assert choose_encoding(b"identity", ENCODERS) is None
+    assert choose_encoding(b"gzip;q=0", {"gzip": None}) is None
+
+
+def test_get_encoders_has_gzip_last():
+    """Test that gzip is always available as the least preferred encoding."""
+    encoders = get_encoders()
+    assert list(encoders)[-1] == "gzip"
+
+
+def test_encoders_round_trip():
+    """Test that gzip output is deterministic and every encoder compresses."""
+    data = b'{"message": "hello"}' * 100
+    assert gzip_encode(data) == gzip_encode(data)
+    assert gzip.decompress(gzip_encode(data)) == data
+    for encoder in get_encoders().values():
+        assert len(encoder(data)) < len(data)
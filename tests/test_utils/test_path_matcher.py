@@ -0,0 +1,43 @@
+# pylint: disable=missing-module-docstring
+
+import pytest
+
+from src.utils.path_matcher import PathMatcher
+
+matcher = PathMatcher(["/api/v1/token", "/static/*", "/api/*/health", "/files/?.txt"])
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/api/v1/token", True),
+        ("/api/v1/token/", False),
+        ("/api/v1/tokens", False),
+        ("/static/", True),
+        ("/static/css/site.css", True),
+        ("/statics", False),
+        ("/api/v1/health", True),
+        ("/api/v2/health", True),
+        ("/api/v1/health/extra", False),
+        ("/files/a.txt", True),
+        ("/files/ab.txt", False),
+        ("/api/v1/", False),
+    ],
+)
+def test_path_matcher(path, expected):
+    """Test exact, prefix and glob rules are matched correctly."""
+    assert matcher.matches(path) is expected
+
+
+def test_path_matcher_compiles_rule_types():
+    """Test that rules are split into exact, prefix and glob matchers."""
+    assert matcher.exact == frozenset({"/api/v1/token"})
+    assert matcher.prefixes == ("/static/",)
+    assert matcher.glob is not None
+
+
+def test_path_matcher_empty():
+    """Test that an empty matcher does not match anything."""
+    empty = PathMatcher([])
+    assert not empty.matches("/")
+    assert empty.glob is None
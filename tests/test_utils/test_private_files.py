@@ -0,0 +1,57 @@
+# pylint: disable=missing-module-docstring
+
+import os
+
+import pytest
+
+from src.utils.private_files import (
+    ensure_private_directory,
+    is_private_file,
+    open_private_file,
+)
+
+
+def test_ensure_private_directory_creates_it(tmp_path):
+    """Test that a missing directory is created accessible to its owner only."""
+    path = tmp_path / "private"
+
+    ensure_private_directory(str(path))
+
+    assert path.stat().st_mode & 0o777 == 0o700
+
+
+@pytest.mark.parametrize("mode", [0o777, 0o750])
+def test_ensure_private_directory_rejects_shared_ones(tmp_path, mode):
+    """Test that a directory other users can access is rejected."""
+    path = tmp_path / "shared"
+    path.mkdir()
+    path.chmod(mode)
+
+    with pytest.raises(PermissionError):
+        ensure_private_directory(str(path))
+
+
+def test_ensure_private_directory_rejects_links(tmp_path):
+    """Test that a link to a private directory is rejected."""
+    (tmp_path / "private").mkdir(mode=0o700)
+    (tmp_path / "link").symlink_to(tmp_path / "private")
+
+    with pytest.raises(PermissionError):
+        ensure_private_directory(str(tmp_path / "link"))
+
+
+def test_open_private_file_does_not_follow_links(tmp_path):
+    """Test that files are opened and created, but links are not followed."""
+    target = tmp_path / "target"
+    target.write_bytes(b"precious")
+    (tmp_path / "link").symlink_to(target)
+
+    with pytest.raises(OSError):
+        open_private_file(str(tmp_path / "link"), os.O_RDWR | os.O_TRUNC)
+    os.close(open_private_file(str(tmp_path / "new"), os.O_RDWR | os.O_CREAT))
+
+    assert target.read_bytes() == b"precious"
+    assert (tmp_path / "new").stat().st_mode & 0o777 == 0o600
+    assert is_private_file(str(tmp_path / "new"))
+    assert not is_private_file(str(tmp_path / "link"))
+    assert not is_private_file(str(tmp_path / "missing"))
@@ -0,0 +1,72 @@
+# pylint: disable=missing-module-docstring
+
+import json
+from datetime import date, datetime, timezone
+from enum import Enum
+from uuid import UUID
+
+import pytest
+
+from src.models import MessageResponse
+from src.utils import serialization
+from src.utils.serialization import dumps
+
+
+class Colour(Enum):
+    """Enum used to test enum serialization."""
+
+    RED = "red"
+
+
+@pytest.fixture(
+    name="encoder",
+    params=[
+        "stdlib",
+        pytest.param(
+            "orjson",
+            marks=pytest.mark.skipif(
+                serialization.orjson is None, reason="orjson is not installed"
+            ),
+        ),
+    ],
+)
+def fixture_encoder(request, monkeypatch):
+    """Runs each test with both the stdlib and orjson encoders."""
+    if request.param == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_dumps_json_types(encoder):  # pylint: disable=unused-argument
+    """Test that standard JSON types serialize compactly."""
+    value = {"a": [1, 2.5, None, True], "b": "é"}
+    assert dumps(value) == '{"a":[1,2.5,null,true],"b":"é"}'.encode()
+
+
+def test_dumps_extended_types(encoder):  # pylint: disable=unused-argument
+    """Test datetimes, Pydantic models, enums and UUIDs."""
+    value = {
+        "when": datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=timezone.utc),
+        "day": date(2024, 1, 2),
+        "model": MessageResponse(message="hi"),
+        "colour": Colour.RED,
+        "id": UUID("12345678-1234-5678-1234-567812345678"),
+    }
+    assert json.loads(dumps(value)) == {
+        "when": "2024-01-02T03:04:05.000006+00:00",
+        "day": "2024-01-02",
+        "model": {"message": "hi"},
+        "colour": "red",
+        "id": "12345678-1234-5678-1234-567812345678",
+    }
+
+
+def test_dumps_non_str_keys(encoder):  # pylint: disable=unused-argument
+    """Test that non-string dict keys are converted to strings."""
+    assert dumps({1: "a", None: "b", 2.5: "c"}) == b'{"1":"a","null":"b","2.5":"c"}'
+
+
+def test_dumps_unsupported_type(encoder):  # pylint: disable=unused-argument
+    """Test that unsupported types raise a TypeError."""
+    with pytest.raises(TypeError):
+        dumps(object())
@@ -0,0 +1,83 @@
+# pylint: disable=missing-module-docstring
+
+from src.utils.ttl_cache import TTLCache
+
+
+def test_get_and_set():
+    """Test that stored values are returned and counted as hits."""
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted when full."""
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_default_ttl_expiry(clock):
+    """Test that entries expire after the default TTL."""
+    cache = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_explicit_expiry_caps_ttl(clock):
+    """Test that an explicit expiry earlier than the TTL wins."""
+    cache = TTLCache(max_size=10, ttl=60, clock=clock)
+    cache.set("a", 1, expires_at=clock.now + 2)
+
+    clock.now += 2
+    assert cache.get("a") is None
+
+
+def test_already_expired_not_stored(clock):
+    """Test that values whose expiry is in the past are not stored."""
+    cache = TTLCache(max_size=10, clock=clock)
+    cache.set("a", 1, expires_at=clock.now - 1)
+
+    assert len(cache) == 0
+
+
+def test_invalidate_and_clear():
+    """Test explicit invalidation of one key and of the whole cache."""
+    cache = TTLCache(max_size=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_invalidate_matching():
+    """Test that only the keys matching the predicate are removed."""
+    cache = TTLCache(max_size=10)
+    for key in ("a1", "a2", "b1"):
+        cache.set(key, key)
+
+    assert cache.invalidate_matching(lambda key: key.startswith("a")) == 2
+    assert cache.get("a1") is None
+    assert cache.get("b1") == "b1"